@@ -0,0 +1,228 @@
+"""
+AISCA - Contrôle d'Admission des Analyses
+Quand toute une classe clique sur « Terminer » en même temps, chaque session lance
+ses encodages SBERT et ses appels OpenAI simultanément : les analyses se disputent
+les cœurs et la latence s'effondre pour tout le monde.
+
+Le contrôleur laisse passer au plus max_active analyses à la fois ; les suivantes
+attendent dans une file FIFO, avec leur position et une estimation de l'attente
+(durée moyenne récente d'une analyse). Au-delà de max_queue demandes en attente,
+les nouvelles sont refusées immédiatement (Overloaded) : mieux vaut un refus
+rapide qu'une file qui s'allonge sans fin.
+
+Un contrôleur par processus (partagé entre les sessions Streamlit via
+st.cache_resource, ou détenu par le service HTTP).
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict
+
+from app import config
+from app.cancellation import CancellationToken
+
+# Poids de la dernière durée dans la moyenne glissante du temps de service
+SERVICE_TIME_SMOOTHING = 0.2
+
+
+class Overloaded(Exception):
+    """File d'attente pleine : demande refusée"""
+
+    def __init__(self, message: str, retry_after: float = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionTicket:
+    """
+    Place d'une demande : en file, admise, puis libérée
+    """
+
+    def __init__(self, controller: 'AdmissionController'):
+        self._controller = controller
+        self._admitted = threading.Event()
+        self.state = 'queued'
+        self.enqueued_at = time.monotonic()
+        self.admitted_at = None
+
+    @property
+    def admitted(self) -> bool:
+        return self._admitted.is_set()
+
+    @property
+    def position(self) -> int:
+        """Rang dans la file (1 = prochaine admise, 0 si déjà admise ou sortie)"""
+        return self._controller._position(self)
+
+    @property
+    def eta_s(self) -> float:
+        """Attente estimée avant admission (None tant qu'aucune analyse n'est terminée)"""
+        return self._controller._estimate_wait(self.position)
+
+    def wait(self, timeout: float = None) -> bool:
+        """Attendre l'admission (True si admise)"""
+        return self._admitted.wait(timeout)
+
+    def release(self):
+        """Libérer la place (admise) ou quitter la file (en attente) ; idempotent"""
+        self._controller._release(self)
+
+    def __enter__(self) -> 'AdmissionTicket':
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class AdmissionController:
+    """
+    Limite de concurrence + file FIFO bornée devant le pipeline d'analyse
+    """
+
+    def __init__(
+        self,
+        max_active: int = config.ADMISSION_MAX_ACTIVE,
+        max_queue: int = config.ADMISSION_MAX_QUEUE
+    ):
+        """
+        Args:
+            max_active: Analyses exécutées simultanément
+            max_queue: Demandes en attente au maximum (au-delà : Overloaded)
+        """
+        self.max_active = max(1, max_active)
+        self.max_queue = max(0, max_queue)
+
+        self._queue = deque()
+        self._active = 0
+        self._lock = threading.Lock()
+        self.mean_service_s = None
+
+        # Statistiques
+        self.admitted = 0
+        self.shed = 0
+        self.abandoned = 0
+        self.queue_seconds = 0.0
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    def enqueue(self) -> AdmissionTicket:
+        """
+        Prendre une place (admise tout de suite s'il reste un créneau libre)
+
+        Raises:
+            Overloaded: File d'attente pleine
+        """
+        ticket = AdmissionTicket(self)
+        with self._lock:
+            if self._active < self.max_active and not self._queue:
+                self._admit(ticket)
+                return ticket
+            if len(self._queue) >= self.max_queue:
+                self.shed += 1
+                retry_after = self._estimate_wait(len(self._queue) + 1)
+                raise Overloaded(f"trop de demandes en attente ({len(self._queue)})", retry_after)
+            self._queue.append(ticket)
+        return ticket
+
+    def admit(
+        self,
+        cancel_token: CancellationToken = None,
+        on_wait: Callable[[AdmissionTicket], None] = None,
+        poll_interval: float = 0.5
+    ) -> AdmissionTicket:
+        """
+        Entrer dans la file et attendre son tour
+
+        Args:
+            cancel_token: Jeton vérifié pendant l'attente (la place est rendue si annulé)
+            on_wait: Appelée à chaque intervalle tant que la demande attend
+                     (ex : afficher position et attente estimée)
+            poll_interval: Intervalle entre deux vérifications (secondes)
+
+        Returns:
+            Ticket admis, à libérer par release() (ou with ticket:)
+
+        Raises:
+            Overloaded: File d'attente pleine
+            AnalysisCancelled: Jeton annulé ou échéance dépassée pendant l'attente
+        """
+        ticket = self.enqueue()
+        try:
+            while not ticket.wait(poll_interval):
+                if cancel_token is not None:
+                    cancel_token.check()
+                if on_wait is not None:
+                    on_wait(ticket)
+        except BaseException:
+            ticket.release()
+            raise
+        return ticket
+
+    def _admit(self, ticket: AdmissionTicket):
+        # Appelée avec le verrou
+        self._active += 1
+        self.admitted += 1
+        ticket.state = 'active'
+        ticket.admitted_at = time.monotonic()
+        self.queue_seconds += ticket.admitted_at - ticket.enqueued_at
+        ticket._admitted.set()
+
+    def _release(self, ticket: AdmissionTicket):
+        with self._lock:
+            if ticket.state == 'active':
+                self._active -= 1
+                duration = time.monotonic() - ticket.admitted_at
+                if self.mean_service_s is None:
+                    self.mean_service_s = duration
+                else:
+                    self.mean_service_s += SERVICE_TIME_SMOOTHING * (duration - self.mean_service_s)
+            elif ticket.state == 'queued':
+                self._queue.remove(ticket)
+                self.abandoned += 1
+            else:
+                return
+            ticket.state = 'released'
+
+            # Créneau libéré : la demande la plus ancienne passe
+            while self._queue and self._active < self.max_active:
+                self._admit(self._queue.popleft())
+
+    def _position(self, ticket: AdmissionTicket) -> int:
+        with self._lock:
+            try:
+                return self._queue.index(ticket) + 1
+            except ValueError:
+                return 0
+
+    def _estimate_wait(self, position: int) -> float:
+        """Vagues de max_active analyses à attendre avant la position donnée"""
+        if not position:
+            return 0.0
+        if self.mean_service_s is None:
+            return None
+        return math.ceil(position / self.max_active) * self.mean_service_s
+
+    @property
+    def mean_queue_ms(self) -> float:
+        return self.queue_seconds / self.admitted * 1000 if self.admitted else 0.0
+
+    def stats(self) -> Dict:
+        return {
+            'max_active': self.max_active,
+            'max_queue': self.max_queue,
+            'active': self._active,
+            'queued': len(self._queue),
+            'admitted': self.admitted,
+            'shed': self.shed,
+            'abandoned': self.abandoned,
+            'mean_queue_ms': round(self.mean_queue_ms, 2),
+            'mean_service_ms': round(self.mean_service_s * 1000, 1) if self.mean_service_s is not None else None
+        }
@@ -0,0 +1,79 @@
+"""
+AISCA - Événements de l'Analyse par Étapes
+SemanticAnalyzer.iter_analysis() produit un événement à la fin de chaque étape :
+l'interface affiche les résultats partiels et une progression réelle, le scorer
+par lot s'en sert pour mesurer la durée de chaque étape.
+
+Étapes, dans l'ordre :
+    started     → analyse lancée (data : nombre de textes libres)
+    cached      → résultats trouvés dans le cache (les étapes suivantes sont rejouées)
+    similarity  → similarités Q1 / Q5 calculées (data : meilleures compétences de Q1)
+    block       → score d'un bloc (data : bloc_id, result) ; une fois par bloc
+    coverage    → coverage score global
+    jobs        → métiers recommandés
+    done        → résultats complets (format de get_results_summary)
+"""
+
+from typing import Dict
+
+
+STARTED = 'started'
+CACHED = 'cached'
+SIMILARITY = 'similarity'
+BLOCK = 'block'
+COVERAGE = 'coverage'
+JOBS = 'jobs'
+DONE = 'done'
+
+# Poids de chaque étape dans la progression (l'encodage domine le temps de calcul)
+STAGE_WEIGHTS = {
+    SIMILARITY: 6,
+    BLOCK: 1,
+    COVERAGE: 1,
+    JOBS: 1
+}
+TOTAL_WEIGHT = STAGE_WEIGHTS[SIMILARITY] + 5 * STAGE_WEIGHTS[BLOCK] + STAGE_WEIGHTS[COVERAGE] + STAGE_WEIGHTS[JOBS]
+
+
+class AnalysisEvent:
+    """
+    Fin d'une étape de l'analyse
+    """
+
+    __slots__ = ('kind', 'data', 'progress', 'duration_ms', 'elapsed_ms', 'index')
+
+    def __init__(
+        self,
+        kind: str,
+        data: Dict = None,
+        progress: float = 0.0,
+        duration_ms: float = 0.0,
+        elapsed_ms: float = 0.0,
+        index: int = None
+    ):
+        """
+        Args:
+            kind: Type d'événement (STARTED, SIMILARITY, BLOCK...)
+            data: Résultat partiel de l'étape
+            progress: Part du travail terminée (0 à 1)
+            duration_ms: Durée de l'étape
+            elapsed_ms: Temps écoulé depuis le début de l'analyse
+            index: Position du questionnaire (analyse par lot), None sinon
+        """
+        self.kind = kind
+        self.data = data or {}
+        self.progress = progress
+        self.duration_ms = duration_ms
+        self.elapsed_ms = elapsed_ms
+        self.index = index
+
+    @property
+    def stage(self) -> str:
+        """Nom de l'étape pour les mesures de durée (block1... block5 pour les blocs)"""
+        if self.kind == BLOCK:
+            return f"block{self.data['bloc_id']}"
+        return self.kind
+
+    def __repr__(self) -> str:
+        return (f"AnalysisEvent({self.stage}, progress={self.progress:.2f}, "
+                f"duration_ms={self.duration_ms:.1f})")
@@ -0,0 +1,315 @@
+"""
+AISCA - Index de Recherche Approchée (IVF) sur le Catalogue
+Pour les très gros référentiels (100k+ compétences), comparer chaque texte à
+toutes les compétences devient coûteux. L'index IVF partitionne le catalogue
+en listes (k-means sphérique) ; une requête n'explore que les n_probe listes
+les plus proches, puis les candidats sont re-scorés exactement.
+
+Le filtrage par bloc est intégré : si les listes explorées ne contiennent pas
+assez de compétences du bloc demandé, l'exploration est élargie.
+
+Benchmark de rappel contre la recherche exhaustive :
+    python -m app.ann_index --synthetic 100000
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Permettre l'exécution directe (python app/ann_index.py)
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.catalog_artifact import load_npz, save_npz
+
+
+# Lignes traitées à la fois lors des affectations aux listes
+ASSIGN_CHUNK_ROWS = 8192
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Liste la plus proche (produit scalaire max) de chaque vecteur"""
+    assignments = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), ASSIGN_CHUNK_ROWS):
+        chunk = vectors[start:start + ASSIGN_CHUNK_ROWS]
+        assignments[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+    return assignments
+
+
+class IVFIndex:
+    """
+    Index à fichiers inversés (IVF) avec re-scoring exact
+    """
+
+    def __init__(
+        self,
+        centroids: np.ndarray,
+        list_ids: np.ndarray,
+        list_offsets: np.ndarray,
+        block_ids: np.ndarray,
+        n_probe: int = 8
+    ):
+        self.centroids = centroids
+        self.list_ids = list_ids
+        self.list_offsets = list_offsets
+        self.block_ids = block_ids
+        self.n_probe = n_probe
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+    @classmethod
+    def build(
+        cls,
+        matrix: np.ndarray,
+        block_ids: np.ndarray,
+        n_lists: int = 0,
+        n_probe: int = 8,
+        n_iter: int = 10,
+        seed: int = 0
+    ) -> 'IVFIndex':
+        """
+        Construire l'index par k-means sphérique
+
+        Args:
+            matrix: Embeddings normalisés du catalogue (N, dim) en float32
+            block_ids: BlockID de chaque compétence (N,)
+            n_lists: Nombre de listes (0 = automatique, ≈ 4·√N)
+            n_probe: Listes explorées par défaut à la recherche
+            n_iter: Itérations de k-means
+            seed: Graine aléatoire (construction reproductible)
+        """
+        matrix = np.asarray(matrix, dtype=np.float32)
+        n_rows = len(matrix)
+        if n_lists <= 0:
+            n_lists = int(4 * np.sqrt(n_rows))
+        n_lists = max(1, min(n_lists, n_rows))
+
+        rng = np.random.default_rng(seed)
+        sample_size = min(n_rows, max(n_lists * 40, 10000))
+        sample = matrix[rng.choice(n_rows, sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+
+        for _ in range(n_iter):
+            assignments = _assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            counts = np.bincount(assignments, minlength=n_lists)
+
+            # Listes vides : réinitialisées sur un point tiré au hasard
+            empty = counts == 0
+            sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+            centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+
+        return cls.from_centroids(centroids, matrix, block_ids, n_probe=n_probe)
+
+    @classmethod
+    def from_centroids(
+        cls,
+        centroids: np.ndarray,
+        matrix: np.ndarray,
+        block_ids: np.ndarray,
+        n_probe: int = 8
+    ) -> 'IVFIndex':
+        """
+        Répartir le catalogue dans des listes dont les centroïdes sont connus
+        (fin de la construction, ou mise à jour après une petite modification
+        du catalogue sans relancer le k-means)
+        """
+        centroids = np.asarray(centroids, dtype=np.float32)
+        assignments = _assign(np.asarray(matrix, dtype=np.float32), centroids)
+        list_ids = np.argsort(assignments, kind='stable')
+        list_offsets = np.searchsorted(assignments[list_ids], np.arange(len(centroids) + 1))
+
+        return cls(
+            centroids,
+            list_ids.astype(np.int64),
+            list_offsets.astype(np.int64),
+            np.asarray(block_ids, dtype=np.int64),
+            n_probe=n_probe
+        )
+
+    def _candidates(self, list_order: np.ndarray, n_probe: int, k: int, block_id: int = None) -> np.ndarray:
+        """
+        Compétences des listes explorées (élargit l'exploration tant que
+        le filtre par bloc laisse moins de k candidats)
+        """
+        probe = min(n_probe, self.n_lists)
+        while True:
+            lists = list_order[:probe]
+            candidates = np.concatenate([
+                self.list_ids[self.list_offsets[l]:self.list_offsets[l + 1]] for l in lists
+            ])
+            if block_id is not None:
+                candidates = candidates[self.block_ids[candidates] == block_id]
+            if len(candidates) >= k or probe >= self.n_lists:
+                return candidates
+            probe = min(probe * 2, self.n_lists)
+
+    @staticmethod
+    def _top_k(candidates: np.ndarray, store, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Re-scoring exact des candidats puis sélection des k meilleurs (triés)"""
+        if len(candidates) == 0:
+            return candidates, np.zeros(0, dtype=np.float32)
+        sims = store.rows(candidates) @ query
+        k = min(k, len(candidates))
+        top = np.argpartition(-sims, k - 1)[:k]
+        top = top[np.argsort(-sims[top])]
+        return candidates[top], sims[top]
+
+    def search(self, query: np.ndarray, store, k: int, n_probe: int = None, block_id: int = None):
+        """
+        Rechercher les k compétences les plus similaires
+
+        Args:
+            query: Vecteur normalisé (dim,)
+            store: Matrice du catalogue (EmbeddingMatrix) pour le re-scoring exact
+            k: Nombre de résultats
+            n_probe: Listes explorées (défaut : self.n_probe)
+            block_id: Restreindre la recherche à un bloc
+
+        Returns:
+            (indices des compétences, similarités) triés par similarité décroissante
+        """
+        list_order = np.argsort(-(self.centroids @ query))
+        candidates = self._candidates(list_order, n_probe or self.n_probe, k, block_id)
+        return self._top_k(candidates, store, query, k)
+
+    def search_per_block(self, query: np.ndarray, store, k: int, n_probe: int = None):
+        """
+        Top-k de chaque bloc (l'ordre des listes n'est calculé qu'une fois)
+
+        Returns:
+            (indices, similarités) concaténés sur tous les blocs
+        """
+        list_order = np.argsort(-(self.centroids @ query))
+        all_ids, all_sims = [], []
+        for block_id in np.unique(self.block_ids):
+            candidates = self._candidates(list_order, n_probe or self.n_probe, k, int(block_id))
+            ids, sims = self._top_k(candidates, store, query, k)
+            all_ids.append(ids)
+            all_sims.append(sims)
+        return np.concatenate(all_ids), np.concatenate(all_sims)
+
+    def save(self, path: str, manifest: Dict):
+        """Sauvegarder l'index (npz) avec le manifeste du catalogue indexé"""
+        save_npz(path, {
+            'centroids': self.centroids,
+            'list_ids': self.list_ids,
+            'list_offsets': self.list_offsets,
+            'block_ids': self.block_ids
+        }, manifest)
+
+    @classmethod
+    def load(cls, path: str, manifest: Dict, n_probe: int = 8, ignore_keys=()):
+        """
+        Recharger un index sauvegardé
+
+        Returns:
+            L'index, ou None s'il a été construit pour un autre catalogue
+        """
+        data = load_npz(path, manifest, ignore_keys)
+        if data is None:
+            return None
+        return cls(
+            data['centroids'],
+            data['list_ids'],
+            data['list_offsets'],
+            data['block_ids'],
+            n_probe=n_probe
+        )
+
+
+def recall_benchmark(
+    matrix: np.ndarray,
+    block_ids: np.ndarray,
+    queries: np.ndarray,
+    k: int = 10,
+    n_probes=(1, 2, 4, 8, 16, 32),
+    n_lists: int = 0
+) -> List[Dict]:
+    """
+    Comparer l'index IVF à la recherche exhaustive
+
+    Returns:
+        Une ligne par n_probe : rappel@k, temps par requête (IVF et exhaustif)
+    """
+    from app.embedding_store import EmbeddingMatrix
+
+    store = EmbeddingMatrix.from_float(matrix, 'float32')
+
+    start = time.perf_counter()
+    brute_sims = store.similarities(queries)
+    truth = [set(np.argpartition(-row, k - 1)[:k]) for row in brute_sims]
+    brute_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+    start = time.perf_counter()
+    index = IVFIndex.build(matrix, block_ids, n_lists=n_lists)
+    build_s = time.perf_counter() - start
+
+    rows = []
+    for n_probe in n_probes:
+        start = time.perf_counter()
+        found = [set(index.search(query, store, k, n_probe=n_probe)[0]) for query in queries]
+        ann_ms = (time.perf_counter() - start) * 1000 / len(queries)
+        recall = np.mean([len(f & t) / k for f, t in zip(found, truth)])
+        rows.append({
+            'n_probe': n_probe,
+            f'recall@{k}': round(float(recall), 4),
+            'ann_ms_per_query': round(ann_ms, 3),
+            'brute_ms_per_query': round(brute_ms, 3),
+            'n_lists': index.n_lists,
+            'build_seconds': round(build_s, 2)
+        })
+    return rows
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Rappel de l'index IVF vs recherche exhaustive")
+    parser.add_argument('--synthetic', type=int, default=0,
+                        help="Taille d'un catalogue synthétique (0 = catalogue réel)")
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--backend', default=None, help="Backend d'encodage pour le catalogue réel")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    if args.synthetic:
+        # Catalogue synthétique regroupé en thèmes (proche d'une vraie taxonomie)
+        dim = 384
+        themes = rng.normal(size=(max(10, args.synthetic // 200), dim))
+        matrix = themes[rng.integers(len(themes), size=args.synthetic)] + 0.6 * rng.normal(size=(args.synthetic, dim))
+        block_ids = rng.integers(1, 6, size=args.synthetic)
+        queries = matrix[rng.choice(args.synthetic, args.queries)] + 0.3 * rng.normal(size=(args.queries, dim))
+    else:
+        from app import config
+        from app.semantic_analysis import SemanticAnalyzer
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            analyzer = SemanticAnalyzer(
+                use_result_cache=False,
+                use_micro_batching=False,
+                encoder_backend=args.backend or config.ENCODER_BACKEND,
+                ann_index='none'
+            )
+        matrix = analyzer.competency_embeddings.to_float32()
+        block_ids = analyzer.competency_block_ids
+        queries = matrix[rng.choice(len(matrix), args.queries)] + 0.05 * rng.normal(size=(args.queries, matrix.shape[1]))
+
+    matrix = (matrix / np.linalg.norm(matrix, axis=1, keepdims=True)).astype(np.float32)
+    queries = (queries / np.linalg.norm(queries, axis=1, keepdims=True)).astype(np.float32)
+
+    print(f"📊 Benchmark IVF : {len(matrix)} compétences, {len(queries)} requêtes, k={args.k}")
+    for row in recall_benchmark(matrix, block_ids, queries, k=args.k):
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
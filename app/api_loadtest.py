@@ -0,0 +1,191 @@
+"""
+AISCA - Test de Charge du Service HTTP de Scoring
+Envoie des questionnaires en parallèle (une connexion persistante par client)
+et mesure débit et latences (p50 / p95 / p99).
+
+Usage :
+    python -m app.api_server &
+    python -m app.api_loadtest --concurrency 16 --requests 500
+    python -m app.api_loadtest --batch 32 --requests 50 responses/
+
+Sans fichier de réponses, des variantes d'un questionnaire type sont générées
+(textes tous différents : le cache des résultats du service n'intervient pas).
+"""
+
+import argparse
+import http.client
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+from urllib.parse import urlparse
+
+import numpy as np
+
+# Permettre l'exécution directe (python app/api_loadtest.py)
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app import config
+
+
+Q1_FRAGMENTS = [
+    "Je nettoie et prépare des données avec Pandas et SQL.",
+    "J'ai construit des tableaux de bord Power BI pour la direction commerciale.",
+    "J'entraîne des modèles de classification avec Scikit-learn et XGBoost.",
+    "J'ai segmenté une base clients avec KMeans et une ACP.",
+    "J'analyse des avis clients avec spaCy et des modèles Transformers.",
+    "Je réalise des tests statistiques et des régressions avec Statsmodels.",
+    "J'automatise des rapports hebdomadaires en Python.",
+    "J'ai déployé un modèle de prévision des ventes en production."
+]
+
+
+def synthetic_responses(index: int) -> Dict:
+    """Questionnaire type dont le texte Q1 varie avec index"""
+    rng = np.random.default_rng(index)
+    fragments = rng.choice(Q1_FRAGMENTS, size=4, replace=False)
+    return {
+        'q1_parcours': f"Profil {index}. " + ' '.join(fragments),
+        'q2_domaines': ["Data Analysis & Visualization", "Machine Learning Supervisé"],
+        'q3_niveaux': {"Data Analysis & Visualization": int(rng.integers(1, 6)), "Machine Learning Supervisé": 3},
+        'q4_outils': ["Python (Pandas, NumPy)", "SQL", "Scikit-learn"],
+        'q5_experiences': {}
+    }
+
+
+def load_responses(inputs: List[str]) -> List[Dict]:
+    from app.batch_scorer import iter_response_files
+
+    responses_list = []
+    for path in iter_response_files(inputs):
+        with open(path, 'r', encoding='utf-8') as f:
+            responses_list.append(json.load(f)['responses'])
+    return responses_list
+
+
+def wait_until_ready(url: str, timeout: float = 300.0) -> Dict:
+    """Attendre que /readyz réponde 200"""
+    parsed = urlparse(url)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=5)
+            conn.request('GET', '/readyz')
+            response = conn.getresponse()
+            body = json.loads(response.read())
+            conn.close()
+            if response.status == 200:
+                return body
+        except OSError:
+            pass
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"❌ Service non prêt après {timeout:.0f} s")
+        time.sleep(0.5)
+
+
+def run_load_test(
+    url: str,
+    payloads: List[Dict],
+    requests: int,
+    concurrency: int,
+    batch: int = 0
+) -> Dict:
+    """
+    Envoyer les requêtes et mesurer les latences
+
+    Args:
+        url: Adresse du service (http://hôte:port)
+        payloads: Questionnaires envoyés (réutilisés en boucle)
+        requests: Nombre total de requêtes
+        concurrency: Clients simultanés
+        batch: Questionnaires par requête /score:batch (0 : /score unitaire)
+
+    Returns:
+        Débit, latences (ms) et nombre de réponses par code HTTP
+    """
+    parsed = urlparse(url)
+    local = threading.local()
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+
+    def body_for(i: int) -> bytes:
+        if batch:
+            items = [payloads[(i * batch + j) % len(payloads)] for j in range(batch)]
+        else:
+            items = payloads[i % len(payloads)]
+        return json.dumps({'responses': items}).encode('utf-8')
+
+    def send(i: int):
+        body = body_for(i)
+        start = time.perf_counter()
+        try:
+            conn = getattr(local, 'conn', None)
+            if conn is None:
+                conn = local.conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=120)
+            conn.request('POST', '/score:batch' if batch else '/score', body, {'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            local.conn = None
+            status = 'erreur réseau'
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == 200:
+                latencies.append(elapsed)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(send, range(requests)))
+    duration = time.perf_counter() - start
+
+    ok = len(latencies)
+    report = {
+        'requests': requests,
+        'concurrency': concurrency,
+        'batch': batch,
+        'duration_s': round(duration, 2),
+        'requests_per_s': round(ok / duration, 1),
+        'profiles_per_s': round(ok * max(batch, 1) / duration, 1),
+        'statuses': {str(status): count for status, count in sorted(statuses.items(), key=str)}
+    }
+    if ok:
+        report['latency_ms'] = {
+            'p50': round(float(np.percentile(latencies, 50)), 1),
+            'p95': round(float(np.percentile(latencies, 95)), 1),
+            'p99': round(float(np.percentile(latencies, 99)), 1),
+            'max': round(max(latencies), 1)
+        }
+    return report
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Test de charge du service HTTP de scoring")
+    parser.add_argument('inputs', nargs='*', help="Fichiers / répertoires de réponses (défaut : questionnaires générés)")
+    parser.add_argument('--url', default=f"http://{config.API_HOST}:{config.API_PORT}")
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--batch', type=int, default=0, help="Questionnaires par requête /score:batch (0 : /score)")
+    args = parser.parse_args(argv)
+
+    payloads = load_responses(args.inputs) if args.inputs else []
+    if not payloads:
+        payloads = [synthetic_responses(i) for i in range(args.requests * max(args.batch, 1))]
+
+    readiness = wait_until_ready(args.url)
+    print(f"✅ Service prêt ({readiness.get('model')}) : {args.requests} requête(s), {args.concurrency} client(s)")
+
+    report = run_load_test(args.url, payloads, args.requests, args.concurrency, args.batch)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+    after = wait_until_ready(args.url)
+    print(f"📊 Taille moyenne des regroupements côté serveur : {after.get('mean_batch_size')}")
+
+
+if __name__ == "__main__":
+    main()
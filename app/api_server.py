@@ -0,0 +1,399 @@
+"""
+AISCA - Service HTTP de Scoring
+Expose le chemin de scoring sans état (analyze_many) aux autres systèmes internes
+(LMS, outils RH). Les réponses JSON ont le format de get_results_summary().
+
+Routes :
+    POST /score        {"responses": {...}}          → {"results": {...}}
+    POST /score:batch  {"responses": [{...}, ...]}   → {"results": [{...}, ...]}
+    GET  /healthz      processus vivant (200 tant que le chargement n'a pas échoué)
+    GET  /readyz       200 une fois le modèle chargé et préchauffé, 503 sinon
+
+Les requêtes /score concurrentes sont regroupées (micro-batching) en un seul appel
+à analyze_many. Le nombre de requêtes en cours est borné (app/admission.py) : les
+suivantes attendent leur tour dans une file FIFO bornée ; file pleine, réponse 503
+immédiate avec Retry-After (pas de file d'attente qui s'allonge sans fin).
+Chaque requête a un délai maximal (AISCA_API_REQUEST_TIMEOUT_S) : au-delà, le travail
+non commencé est abandonné et la réponse est 504.
+
+Usage :
+    python -m app.api_server --port 8600
+    python -m app.prefork http --workers 4 --port 8600    (workers pre-forkés)
+Test de charge : python -m app.api_loadtest --concurrency 16 --requests 500
+"""
+
+import argparse
+import json
+import math
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# Permettre l'exécution directe (python app/api_server.py)
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app import config
+from app.admission import AdmissionController, AdmissionTicket, Overloaded
+from app.cancellation import AnalysisCancelled, CancellationToken, DeadlineExceeded
+from app.encoding_service import EncodingService
+
+
+# Types attendus de chaque champ du questionnaire
+RESPONSE_FIELDS = {
+    'q1_parcours': str,
+    'q2_domaines': list,
+    'q3_niveaux': dict,
+    'q4_outils': list,
+    'q5_experiences': dict
+}
+
+
+class ServiceUnavailable(Exception):
+    """Service pas encore prêt ou saturé (réponse 503)"""
+
+    def __init__(self, message: str, retry_after: float = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def validate_responses(responses) -> Dict:
+    """
+    Vérifier la structure d'un questionnaire reçu
+
+    Raises:
+        ValueError: Champ manquant, de mauvais type ou questionnaire vide
+    """
+    if not isinstance(responses, dict):
+        raise ValueError("'responses' doit être un objet JSON")
+    if not any(field in responses for field in RESPONSE_FIELDS):
+        raise ValueError(f"aucun champ du questionnaire ({', '.join(RESPONSE_FIELDS)})")
+    for field, expected in RESPONSE_FIELDS.items():
+        if field in responses and not isinstance(responses[field], expected):
+            raise ValueError(f"'{field}' doit être de type {expected.__name__}")
+    if not all(isinstance(level, int) for level in responses.get('q3_niveaux', {}).values()):
+        raise ValueError("'q3_niveaux' : niveaux entiers attendus")
+    if not all(isinstance(text, str) for text in responses.get('q5_experiences', {}).values()):
+        raise ValueError("'q5_experiences' : textes attendus")
+    return responses
+
+
+class ScoreBatcher(EncodingService):
+    """
+    Regroupe les questionnaires des requêtes /score concurrentes en un appel analyze_many
+    (même file et même découpage des résultats que le service d'encodage)
+
+    Chaque élément est un couple (questionnaire, jeton de sa requête) ; son résultat
+    est le résumé de l'analyse, ou l'exception propre à cette requête (à relancer
+    par l'appelant) : une requête en échec ne fait pas échouer ses voisines.
+    """
+
+    thread_name = 'aisca-score-batcher'
+
+    def _process(self, items: List[Tuple[Dict, CancellationToken]]) -> List:
+        outcomes = [None] * len(items)
+        live = []
+        for i, (_, token) in enumerate(items):
+            # Échéance dépassée pendant le regroupement : inutile de l'analyser
+            try:
+                token.check()
+                live.append(i)
+            except AnalysisCancelled as e:
+                outcomes[i] = e
+        if not live:
+            return outcomes
+
+        try:
+            for i, results in zip(live, self.encode_fn([items[i][0] for i in live])):
+                outcomes[i] = results
+        except Exception:
+            # Un questionnaire fait échouer tout le regroupement : chaque requête est reprise seule
+            for i in live:
+                responses, token = items[i]
+                try:
+                    outcomes[i] = self.encode_fn([responses], cancel_token=token)[0]
+                except Exception as e:
+                    outcomes[i] = e
+        return outcomes
+
+
+class ScoringService:
+    """
+    Analyseur chargé en arrière-plan, préchauffé, puis servi avec concurrence bornée
+    """
+
+    def __init__(
+        self,
+        analyzer=None,
+        analyzer_kwargs: Dict = None,
+        max_concurrency: int = config.API_MAX_CONCURRENCY,
+        max_queue: int = config.API_MAX_QUEUE,
+        max_batch_items: int = config.API_MAX_BATCH_ITEMS,
+        micro_batch_size: int = config.API_MICRO_BATCH_SIZE,
+        micro_batch_wait_ms: float = config.API_MICRO_BATCH_WAIT_MS,
+        request_timeout_s: float = config.API_REQUEST_TIMEOUT_S
+    ):
+        """
+        Args:
+            analyzer: SemanticAnalyzer déjà chargé (ex : hérité du parent en pre-fork)
+            analyzer_kwargs: Arguments de SemanticAnalyzer si analyzer est None
+            max_concurrency: Requêtes de scoring traitées simultanément
+            max_queue: Requêtes en attente au maximum (au-delà : 503)
+            max_batch_items: Questionnaires maximum par requête /score:batch
+            micro_batch_size: Questionnaires /score regroupés au maximum en un appel
+            micro_batch_wait_ms: Attente maximale pour compléter un regroupement
+            request_timeout_s: Délai maximal d'une requête (0 : aucun)
+        """
+        self.analyzer = analyzer
+        self.analyzer_kwargs = analyzer_kwargs or {}
+        self.max_concurrency = max_concurrency
+        self.admission = AdmissionController(max_active=max_concurrency, max_queue=max_queue)
+        self.max_batch_items = max_batch_items
+        self.micro_batch_size = micro_batch_size
+        self.micro_batch_wait_ms = micro_batch_wait_ms
+        self.request_timeout_s = request_timeout_s
+
+        self.ready = threading.Event()
+        self.state = 'loading'
+        self.error = None
+        self.started_at = time.time()
+        self.warmup_ms = None
+        self.batcher = None
+
+        self._lock = threading.Lock()
+
+        # Statistiques
+        self.scored = 0
+        self.timed_out = 0
+
+    def start(self) -> 'ScoringService':
+        """Charger et préchauffer l'analyseur en arrière-plan (le serveur répond déjà aux sondes)"""
+        threading.Thread(target=self._load, name='aisca-api-loader', daemon=True).start()
+        return self
+
+    def _load(self):
+        try:
+            if self.analyzer is None:
+                from app.semantic_analysis import SemanticAnalyzer
+                self.analyzer = SemanticAnalyzer(**self.analyzer_kwargs)
+
+            # Préchauffage fait par l'analyseur (voir SemanticAnalyzer._warmup)
+            self.state = 'warming'
+            self.analyzer.wait_until_ready()
+            self.warmup_ms = self.analyzer.warmup_ms
+
+            self.batcher = ScoreBatcher(
+                self._analyze,
+                max_batch_size=self.micro_batch_size,
+                max_wait_ms=self.micro_batch_wait_ms
+            )
+            self.state = 'ready'
+            self.ready.set()
+            print(f"✅ Service de scoring prêt ({self.analyzer.model_id}, préchauffage {self.warmup_ms:.0f} ms)")
+        except Exception as e:
+            self.state = 'failed'
+            self.error = f"{type(e).__name__}: {e}"
+            print(f"❌ Chargement du service de scoring impossible : {self.error}")
+
+    def _analyze(self, responses_list: List[Dict], cancel_token: CancellationToken = None) -> List[Dict]:
+        with self.analyzer._quiet_logs():
+            return self.analyzer.analyze_many(responses_list, cancel_token=cancel_token)
+
+    def _acquire(self, token: CancellationToken) -> AdmissionTicket:
+        """Attendre un créneau (l'attente compte dans le délai de la requête)"""
+        if not self.ready.is_set():
+            raise ServiceUnavailable(f"service non prêt ({self.state})")
+        try:
+            return self.admission.admit(token, poll_interval=0.05)
+        except Overloaded as e:
+            raise ServiceUnavailable(f"service saturé : {e}", retry_after=e.retry_after or 1) from e
+        except DeadlineExceeded:
+            self._release(None, 0, timed_out=True)
+            raise
+
+    def _release(self, ticket: AdmissionTicket, scored: int, timed_out: bool = False):
+        if ticket is not None:
+            ticket.release()
+        with self._lock:
+            self.scored += scored
+            self.timed_out += timed_out
+
+    def score(self, responses: Dict) -> Dict:
+        """
+        Scorer un questionnaire (regroupé avec les requêtes concurrentes)
+        
+        Raises:
+            DeadlineExceeded: Délai dépassé (la demande est retirée de la file si
+                              son regroupement n'a pas encore commencé)
+        """
+        validate_responses(responses)
+        token = CancellationToken(self.request_timeout_s)
+        ticket = self._acquire(token)
+        scored = 0
+        try:
+            results = token.wait(self.batcher.submit([(responses, token)]))[0]
+            if isinstance(results, Exception):
+                raise results
+            scored = 1
+            return results
+        finally:
+            self._release(ticket, scored, timed_out=token.expired and not scored)
+
+    def score_batch(self, responses_list: List[Dict]) -> List[Dict]:
+        """Scorer un lot de questionnaires (déjà un batch complet : appel direct)"""
+        if not isinstance(responses_list, list):
+            raise ValueError("'responses' doit être une liste de questionnaires")
+        if len(responses_list) > self.max_batch_items:
+            raise OverflowError(f"au plus {self.max_batch_items} questionnaires par requête")
+        for i, responses in enumerate(responses_list):
+            try:
+                validate_responses(responses)
+            except ValueError as e:
+                raise ValueError(f"questionnaire {i} : {e}") from e
+        if not responses_list:
+            return []
+
+        token = CancellationToken(self.request_timeout_s)
+        ticket = self._acquire(token)
+        scored = 0
+        try:
+            results = self._analyze(responses_list, cancel_token=token)
+            scored = len(results)
+            return results
+        finally:
+            self._release(ticket, scored, timed_out=token.expired and not scored)
+
+    def health(self) -> Dict:
+        return {
+            'status': 'failed' if self.state == 'failed' else 'ok',
+            'state': self.state,
+            'error': self.error,
+            'uptime_s': round(time.time() - self.started_at, 1)
+        }
+
+    def readiness(self) -> Dict:
+        info = {
+            'ready': self.ready.is_set(),
+            'state': self.state,
+            'warmup_ms': round(self.warmup_ms, 1) if self.warmup_ms is not None else None,
+            'in_flight': self.admission.active,
+            'queued': self.admission.queued,
+            'max_concurrency': self.max_concurrency,
+            'scored': self.scored,
+            'rejected': self.admission.shed,
+            'timed_out': self.timed_out,
+            'admission': self.admission.stats()
+        }
+        if self.ready.is_set():
+            info['model'] = self.analyzer.model_id
+            info['catalog'] = self.analyzer.catalog_version
+            info['mean_batch_size'] = round(self.batcher.mean_batch_size, 2)
+            info['encoder'] = self.analyzer.resources.stats()
+        return info
+
+
+class _ScoringHandler(BaseHTTPRequestHandler):
+    server_version = 'AISCA'
+    # Connexions persistantes (keep-alive) : Content-Length toujours renseigné
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        # Pas de journal par requête (bruit sous charge)
+        pass
+
+    def _send_json(self, status: int, body, headers: Dict = None):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self):
+        length = self.headers.get('Content-Length')
+        if length is None:
+            raise LookupError("Content-Length requis")
+        length = int(length)
+        if length > config.API_MAX_BODY_MB * 1024 * 1024:
+            raise OverflowError(f"corps de requête limité à {config.API_MAX_BODY_MB} Mo")
+        body = json.loads(self.rfile.read(length).decode('utf-8'))
+        if not isinstance(body, dict) or 'responses' not in body:
+            raise ValueError("champ 'responses' manquant")
+        return body['responses']
+
+    def do_GET(self):
+        service = self.server.service
+        if self.path == '/healthz':
+            health = service.health()
+            self._send_json(200 if health['status'] == 'ok' else 500, health)
+        elif self.path == '/readyz':
+            readiness = service.readiness()
+            self._send_json(200 if readiness['ready'] else 503, readiness)
+        else:
+            self._send_json(404, {'error': f"route inconnue : {self.path}"})
+
+    def do_POST(self):
+        service = self.server.service
+        if self.path not in ('/score', '/score:batch'):
+            self._send_json(404, {'error': f"route inconnue : {self.path}"})
+            return
+        try:
+            responses = self._read_json()
+            if self.path == '/score':
+                results = service.score(responses)
+            else:
+                results = service.score_batch(responses)
+        except LookupError as e:
+            self.close_connection = True
+            self._send_json(411, {'error': str(e)})
+        except OverflowError as e:
+            # Corps éventuellement non lu : la connexion ne peut pas être réutilisée
+            self.close_connection = True
+            self._send_json(413, {'error': str(e)})
+        except ValueError as e:
+            # JSON invalide (JSONDecodeError) ou questionnaire mal formé
+            self._send_json(400, {'error': str(e)})
+        except ServiceUnavailable as e:
+            self._send_json(503, {'error': str(e)}, headers={'Retry-After': str(max(1, math.ceil(e.retry_after)))})
+        except DeadlineExceeded as e:
+            self._send_json(504, {'error': str(e)})
+        except Exception as e:
+            self._send_json(500, {'error': f"{type(e).__name__}: {e}"})
+        else:
+            self._send_json(200, {'results': results})
+
+
+class ScoringHTTPServer(ThreadingHTTPServer):
+    """Serveur HTTP multi-thread (un thread par connexion) autour d'un ScoringService"""
+
+    def __init__(self, address, service: ScoringService = None):
+        self.service = service
+        super().__init__(address, _ScoringHandler)
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Service HTTP de scoring AISCA")
+    parser.add_argument('--host', default=config.API_HOST)
+    parser.add_argument('--port', type=int, default=config.API_PORT)
+    parser.add_argument('--backend', default=None, help="Backend d'encodage (défaut : AISCA_ENCODER_BACKEND)")
+    args = parser.parse_args(argv)
+
+    service = ScoringService(analyzer_kwargs={'encoder_backend': args.backend or config.ENCODER_BACKEND})
+    server = ScoringHTTPServer((args.host, args.port), service)
+    service.start()
+    print(f"🚀 Service de scoring à l'écoute sur http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print("👋 Service de scoring arrêté")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+"""
+AISCA - Scoring par Lot en Ligne de Commande
+Analyse tous les fichiers responses/responses_*.json produits par le questionnaire
+en répartissant le travail sur un pool de processus (un modèle SBERT par worker).
+
+Usage :
+    python -m app.batch_scorer responses/ --output responses/batch_results.jsonl
+    python -m app.batch_scorer "archives/2025/*.json" --workers 8
+
+Les résultats sont écrits dans un unique fichier JSONL (une ligne par fichier source).
+Un fichier de checkpoint liste les fichiers déjà traités : relancer la même
+commande reprend là où le traitement s'était arrêté. Si un worker s'arrête
+(crash, mémoire), le pool est recréé et les fichiers perdus sont repris un par un.
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, Iterator, List, Set
+
+# Permettre l'exécution directe (python app/batch_scorer.py)
+sys.path.append(str(Path(__file__).parent.parent))
+
+
+# Analyseur propre à chaque processus worker (chargé une seule fois)
+_worker_analyzer = None
+
+
+def iter_response_files(inputs: List[str]) -> Iterator[str]:
+    """
+    Parcourir paresseusement les fichiers de réponses
+
+    Args:
+        inputs: Répertoires (responses_*.json) ou motifs glob
+
+    Yields:
+        Chemins des fichiers, sans doublon
+    """
+    seen = set()
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            paths = sorted(glob.iglob(os.path.join(pattern, 'responses_*.json')))
+        else:
+            paths = glob.iglob(pattern, recursive=True)
+
+        for path in paths:
+            path = os.path.normpath(path)
+            if path not in seen and os.path.isfile(path):
+                seen.add(path)
+                yield path
+
+
+def load_checkpoint(checkpoint_path: str, output_path: str) -> Set[str]:
+    """
+    Lister les fichiers déjà traités
+
+    Le fichier de sortie est aussi relu : une interruption entre l'écriture
+    d'un résultat et celle du checkpoint ne produit donc pas de doublon.
+    """
+    done = set()
+    if os.path.exists(checkpoint_path):
+        with open(checkpoint_path, 'r', encoding='utf-8') as f:
+            done.update(line.strip() for line in f if line.strip())
+
+    if os.path.exists(output_path):
+        with open(output_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    done.add(json.loads(line)['source'])
+                except (ValueError, KeyError):
+                    # Dernière ligne tronquée par une interruption
+                    continue
+
+    return done
+
+
+def _init_worker(threads_per_worker: int, use_result_cache: bool, encoder_backend: str):
+    """Initialiser un worker : limiter les threads puis charger le modèle"""
+    global _worker_analyzer
+
+    from app.inference_resources import InferenceResources
+    from app.semantic_analysis import SemanticAnalyzer
+    with contextlib.redirect_stdout(io.StringIO()):
+        _worker_analyzer = SemanticAnalyzer(
+            use_result_cache=use_result_cache,
+            encoder_backend=encoder_backend,
+            inference_resources=InferenceResources(intra_op_threads=threads_per_worker, max_concurrent=1),
+            warmup='sync'
+        )
+
+
+def _analyze(responses_list: List[Dict], batch_size: int, timings: bool):
+    """
+    Analyser des questionnaires en une passe avec l'analyseur du worker
+
+    Returns:
+        Résultats et durées des étapes de chaque questionnaire (similarités
+        communes au lot, puis blocs / coverage / métiers par questionnaire)
+    """
+    stage_ms = [{} for _ in responses_list]
+
+    def record_event(event):
+        if event.index is None:
+            for stages in stage_ms:
+                stages[f"{event.stage}_batch"] = round(event.duration_ms, 3)
+        else:
+            stage_ms[event.index][event.stage] = round(event.duration_ms, 3)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        results_list = _worker_analyzer.analyze_many(
+            responses_list,
+            batch_size=batch_size,
+            on_event=record_event if timings else None
+        )
+    return results_list, stage_ms
+
+
+def _score_files(paths: List[str], batch_size: int, timings: bool = False) -> List[Dict]:
+    """
+    Analyser un lot de fichiers dans un worker
+
+    Args:
+        paths: Fichiers de réponses
+        batch_size: Taille des batchs d'encodage SBERT
+        timings: Ajouter à chaque enregistrement la durée de chaque étape (timings_ms)
+
+    Returns:
+        Un enregistrement par fichier : résultats ou erreur (un questionnaire
+        malformé ne fait échouer que son propre fichier)
+    """
+    records = []
+    valid = []
+
+    for path in paths:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            valid.append((path, data.get('timestamp'), data['responses']))
+        except Exception as e:
+            records.append({'source': path, 'error': f"{type(e).__name__}: {e}"})
+
+    if valid:
+        responses_list = [responses for _, _, responses in valid]
+        try:
+            outcomes = list(zip(*_analyze(responses_list, batch_size, timings)))
+        except Exception:
+            # Un questionnaire malformé fait échouer tout le lot : chaque fichier est repris seul
+            outcomes = []
+            for responses in responses_list:
+                try:
+                    results_list, stage_ms = _analyze([responses], batch_size, timings)
+                    outcomes.append((results_list[0], stage_ms[0]))
+                except Exception as e:
+                    outcomes.append((e, None))
+
+        for (path, timestamp, _), (results, stages) in zip(valid, outcomes):
+            if isinstance(results, Exception):
+                records.append({'source': path, 'error': f"{type(results).__name__}: {results}"})
+                continue
+            record = {'source': path, 'timestamp': timestamp, 'results': results}
+            if timings:
+                record['timings_ms'] = stages
+            records.append(record)
+
+    return records
+
+
+def _chunks(paths: Iterator[str], size: int) -> Iterator[List[str]]:
+    chunk = []
+    for path in paths:
+        chunk.append(path)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def run_batch(
+    inputs: List[str],
+    output_path: str,
+    checkpoint_path: str = None,
+    workers: int = None,
+    chunk_size: int = 32,
+    batch_size: int = 64,
+    use_result_cache: bool = False,
+    encoder_backend: str = None,
+    timings: bool = False
+) -> Dict:
+    """
+    Scorer tous les fichiers de réponses et écrire les résultats en JSONL
+
+    Args:
+        inputs: Répertoires ou motifs glob des fichiers de réponses
+        output_path: Fichier JSONL de sortie (complété, jamais écrasé)
+        checkpoint_path: Fichier de reprise (par défaut <output>.checkpoint)
+        workers: Nombre de processus (par défaut : nombre de cœurs)
+        chunk_size: Nombre de fichiers envoyés à un worker par tâche
+        batch_size: Taille des batchs d'encodage SBERT
+        use_result_cache: Utiliser le cache des résultats du moteur
+        encoder_backend: Backend d'encodage (défaut : AISCA_ENCODER_BACKEND)
+        timings: Mesurer chaque étape de l'analyse (timings_ms dans chaque enregistrement,
+                 durée moyenne par étape dans les statistiques)
+
+    Returns:
+        Statistiques du traitement
+    """
+    from app import config
+
+    checkpoint_path = checkpoint_path or f"{output_path}.checkpoint"
+    encoder_backend = encoder_backend or config.ENCODER_BACKEND
+    workers = workers or os.cpu_count() or 1
+    threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+
+    done = load_checkpoint(checkpoint_path, output_path)
+    todo = (path for path in iter_response_files(inputs) if path not in done)
+
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    stats = {'scored': 0, 'errors': 0, 'skipped': len(done)}
+    stage_totals = {}
+    start = time.time()
+
+    print(f"🚀 Scoring par lot : {workers} worker(s), {threads_per_worker} thread(s) chacun")
+    if done:
+        print(f"⏩ Reprise : {len(done)} fichier(s) déjà traité(s)")
+
+    def make_pool() -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(threads_per_worker, use_result_cache, encoder_backend)
+        )
+
+    pool = make_pool()
+    try:
+        with open(output_path, 'a', encoding='utf-8') as output, \
+                open(checkpoint_path, 'a', encoding='utf-8') as checkpoint:
+
+            def write_records(records: List[Dict]):
+                for record in records:
+                    output.write(json.dumps(record, ensure_ascii=False) + '\n')
+                output.flush()
+                os.fsync(output.fileno())
+                # Checkpoint APRÈS les résultats : jamais de fichier marqué traité sans résultat
+                for record in records:
+                    checkpoint.write(record['source'] + '\n')
+                    stats['errors' if 'error' in record else 'scored'] += 1
+                    for stage, ms in record.get('timings_ms', {}).items():
+                        stage_totals[stage] = stage_totals.get(stage, 0.0) + ms
+                checkpoint.flush()
+
+            def rescue(paths: List[str]):
+                """
+                Worker arrêté (crash, mémoire) : le pool est recréé et chaque fichier
+                des tâches perdues est repris seul, une tâche à la fois, pour isoler
+                le fichier fautif (enregistré en erreur) sans perdre les autres
+                """
+                nonlocal pool
+                print(f"⚠️ Worker arrêté : pool recréé, {len(paths)} fichier(s) repris un par un")
+                pool.shutdown(wait=False)
+                pool = make_pool()
+                for path in paths:
+                    try:
+                        records = pool.submit(_score_files, [path], batch_size, timings).result()
+                    except BrokenProcessPool as e:
+                        records = [{'source': path, 'error': f"{type(e).__name__}: worker arrêté pendant l'analyse"}]
+                        pool.shutdown(wait=False)
+                        pool = make_pool()
+                    write_records(records)
+
+            def collect(finished):
+                lost = []
+                while finished:
+                    for future in finished:
+                        chunk = in_flight.pop(future)
+                        try:
+                            write_records(future.result())
+                        except BrokenProcessPool:
+                            lost.extend(chunk)
+                    # Pool cassé : toutes les tâches encore en vol sont perdues avec lui
+                    finished = wait(in_flight).done if lost else ()
+                if lost:
+                    rescue(lost)
+
+            # Nombre de tâches en vol borné : les fichiers sont lus au fil de l'eau
+            in_flight = {}
+            for chunk in _chunks(todo, chunk_size):
+                in_flight[pool.submit(_score_files, chunk, batch_size, timings)] = chunk
+                if len(in_flight) >= workers * 2:
+                    collect(wait(in_flight, return_when=FIRST_COMPLETED).done)
+                    print(f"   ✅ {stats['scored']} fichier(s) scoré(s), {stats['errors']} erreur(s)")
+
+            collect(wait(in_flight).done)
+    finally:
+        pool.shutdown()
+
+    stats['elapsed_seconds'] = round(time.time() - start, 2)
+    if timings and stats['scored']:
+        stats['mean_stage_ms'] = {stage: round(total / stats['scored'], 3) for stage, total in stage_totals.items()}
+        print("⏱️ Durée moyenne par étape (ms) : " + ', '.join(
+            f"{stage} {ms}" for stage, ms in stats['mean_stage_ms'].items()
+        ))
+    print(f"✅ Terminé : {stats['scored']} scoré(s), {stats['errors']} erreur(s), "
+          f"{stats['skipped']} ignoré(s) en {stats['elapsed_seconds']} s")
+    print(f"💾 Résultats dans {output_path}")
+
+    return stats
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(
+        description="Scorer par lot les fichiers de réponses du questionnaire AISCA"
+    )
+    parser.add_argument('inputs', nargs='+', help="Répertoires ou motifs glob (ex: responses/)")
+    parser.add_argument('--output', default='responses/batch_results.jsonl', help="Fichier JSONL de sortie")
+    parser.add_argument('--checkpoint', default=None, help="Fichier de reprise (défaut : <output>.checkpoint)")
+    parser.add_argument('--workers', type=int, default=None, help="Nombre de processus (défaut : nb de cœurs)")
+    parser.add_argument('--chunk-size', type=int, default=32, help="Fichiers par tâche envoyée à un worker")
+    parser.add_argument('--batch-size', type=int, default=64, help="Taille des batchs d'encodage SBERT")
+    parser.add_argument('--use-result-cache', action='store_true', help="Réutiliser le cache des résultats")
+    parser.add_argument('--backend', default=None, help="Backend d'encodage (torch, onnx, onnx-int8, hashing)")
+    parser.add_argument('--timings', action='store_true', help="Mesurer la durée de chaque étape de l'analyse")
+    args = parser.parse_args(argv)
+
+    run_batch(
+        args.inputs,
+        args.output,
+        checkpoint_path=args.checkpoint,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        batch_size=args.batch_size,
+        use_result_cache=args.use_result_cache,
+        encoder_backend=args.backend,
+        timings=args.timings
+    )
+
+
+if __name__ == "__main__":
+    main()
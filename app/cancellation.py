@@ -0,0 +1,100 @@
+"""
+AISCA - Annulation Coopérative et Échéances des Analyses
+Quand l'utilisateur quitte la page ou clique sur « Recommencer » pendant l'analyse,
+ou qu'un client HTTP n'attend plus sa réponse, le travail en cours (encodage SBERT,
+appels OpenAI) ne sert plus à rien et consomme CPU et budget d'API.
+
+Un CancellationToken accompagne l'analyse : il peut être annulé depuis un autre
+thread et porte une échéance globale. Le travail vérifie le jeton à des points
+de contrôle (entre deux batchs d'encodage, entre deux blocs, autour des appels
+OpenAI) et s'interrompt avec AnalysisCancelled. Rien n'est interrompu au milieu
+d'un appel au modèle : la latence d'annulation est au plus celle d'un batch.
+"""
+
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+# Intervalle de vérification du jeton pendant l'attente d'un résultat (secondes)
+POLL_INTERVAL = 0.05
+
+
+class AnalysisCancelled(Exception):
+    """Analyse annulée par son appelant"""
+
+
+class DeadlineExceeded(AnalysisCancelled):
+    """Échéance globale de l'analyse dépassée"""
+
+
+class CancellationToken:
+    """
+    Jeton d'annulation partagé entre le demandeur et le travail qu'il a lancé
+    """
+
+    def __init__(self, timeout: float = None):
+        """
+        Args:
+            timeout: Durée maximale du travail en secondes (None ou 0 : pas d'échéance)
+        """
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self.reason = None
+        self._event = threading.Event()
+
+    def cancel(self, reason: str = "analyse annulée"):
+        """Demander l'arrêt (idempotent, depuis n'importe quel thread)"""
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    @property
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def remaining(self) -> float:
+        """Secondes avant l'échéance (None sans échéance, 0 si dépassée)"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def check(self):
+        """
+        Point de contrôle
+
+        Raises:
+            AnalysisCancelled: Le jeton a été annulé
+            DeadlineExceeded: L'échéance est dépassée
+        """
+        if self._event.is_set():
+            raise AnalysisCancelled(self.reason)
+        if self.expired:
+            raise DeadlineExceeded("échéance de l'analyse dépassée")
+
+    def wait(self, future: Future):
+        """
+        Attendre le résultat d'un Future en restant annulable
+
+        Si le jeton est annulé avant que le Future ne soit pris en charge,
+        le Future est annulé lui aussi (le service d'encodage l'ignore).
+        """
+        while True:
+            try:
+                return future.result(timeout=POLL_INTERVAL)
+            except FutureTimeout:
+                pass
+            try:
+                self.check()
+            except AnalysisCancelled:
+                future.cancel()
+                raise
+
+    def __repr__(self) -> str:
+        state = 'annulé' if self.cancelled else 'actif'
+        remaining = self.remaining()
+        if remaining is not None:
+            state += f", {remaining:.1f} s restantes"
+        return f"CancellationToken({state})"
@@ -0,0 +1,170 @@
+"""
+AISCA - Instantané du Catalogue et Rechargement à Chaud
+Tout ce qui dérive de competencies.csv / jobs.csv (DataFrames, index, embeddings,
+projection, index IVF) est regroupé dans un CatalogSnapshot immuable.
+
+Le CatalogWatcher surveille les deux fichiers : à chaque modification, un nouvel
+instantané est construit en arrière-plan puis substitué d'un bloc à l'ancien.
+Les analyses déjà en cours terminent sur l'instantané avec lequel elles ont démarré.
+"""
+
+import hashlib
+import os
+import threading
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.catalog_artifact import compute_block_hash, compute_content_hash, compute_row_hash
+
+
+def compute_catalog_version(*paths) -> str:
+    """
+    Calculer une empreinte du contenu des fichiers du catalogue
+
+    Args:
+        paths: Chemins des fichiers (compétences, métiers)
+
+    Returns:
+        Empreinte SHA-256 tronquée (16 caractères hexadécimaux)
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+class CatalogSnapshot:
+    """
+    Version figée du catalogue et de ses index
+    Les embeddings, la projection et l'index IVF sont attachés par l'analyseur
+    """
+
+    # Attributs exposés tels quels par SemanticAnalyzer
+    FIELDS = (
+        'competencies_df', 'jobs_df', 'catalog_version', 'content_hash', 'block_hash',
+        'competency_texts', 'competency_ids', 'competency_names',
+        'competency_block_ids', 'competency_index', 'block_indices', 'block_names',
+        'row_hashes', 'competency_embeddings', 'projection', 'ann_index'
+    )
+
+    def __init__(self, competencies_path: str, jobs_path: str):
+        """
+        Lire les fichiers et construire les index du catalogue
+
+        Args:
+            competencies_path: Chemin vers competencies.csv
+            jobs_path: Chemin vers jobs.csv
+        """
+        # Empreinte calculée avant la lecture : une modification concurrente
+        # sera vue comme un nouveau changement par le watcher
+        self.catalog_version = compute_catalog_version(competencies_path, jobs_path)
+        self.competencies_df = pd.read_csv(competencies_path)
+        self.jobs_df = pd.read_csv(jobs_path)
+
+        # Combiner nom de compétence + description pour contexte riche
+        self.competency_texts = [
+            f"{row['Competency']} {row['Description']}"
+            for _, row in self.competencies_df.iterrows()
+        ]
+        self.competency_ids = self.competencies_df['CompetencyID'].tolist()
+
+        # Index du catalogue (évite les recherches dans le DataFrame pendant le scoring)
+        self.competency_names = self.competencies_df['Competency'].tolist()
+        self.competency_block_ids = self.competencies_df['BlockID'].to_numpy(dtype=np.int64)
+        self.competency_index = {comp_id: idx for idx, comp_id in enumerate(self.competency_ids)}
+        self.block_indices = {
+            bloc_id: np.flatnonzero(self.competency_block_ids == bloc_id)
+            for bloc_id in range(1, 6)
+        }
+        self.block_names = (
+            self.competencies_df.drop_duplicates('BlockID')
+            .set_index('BlockID')['BlockName']
+            .to_dict()
+        )
+        self.content_hash = compute_content_hash(self.competency_ids, self.competency_texts)
+        self.block_hash = compute_block_hash(self.competency_block_ids)
+        self.row_hashes = [compute_row_hash(text) for text in self.competency_texts]
+
+        self.competency_embeddings = None
+        self.projection = None
+        self.ann_index = None
+
+
+class CatalogWatcher:
+    """
+    Thread de fond qui recharge le catalogue de l'analyseur quand ses fichiers changent
+    """
+
+    def __init__(self, analyzer, interval: float = 5.0):
+        """
+        Args:
+            analyzer: SemanticAnalyzer à maintenir à jour
+            interval: Période de vérification des fichiers (secondes)
+        """
+        self.analyzer = analyzer
+        self.interval = interval
+        self.reloads = 0
+
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_stat = self._stat()
+        self._pending = False
+
+    def _stat(self) -> Tuple:
+        """Date de modification et taille des fichiers (vérification bon marché)"""
+        stats = []
+        for path in (self.analyzer.competencies_path, self.analyzer.jobs_path):
+            try:
+                st = os.stat(path)
+                stats.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                stats.append(None)
+        return tuple(stats)
+
+    def check(self) -> bool:
+        """
+        Vérifier les fichiers et recharger si besoin
+
+        Un changement n'est pris en compte que lorsque les fichiers n'ont plus
+        bougé depuis la vérification précédente (écriture terminée).
+
+        Returns:
+            True si un nouveau catalogue a été installé
+        """
+        stat = self._stat()
+        if stat != self._last_stat:
+            self._last_stat = stat
+            self._pending = True
+            return False
+        if not self._pending:
+            return False
+        self._pending = False
+
+        try:
+            if self.analyzer.reload_catalog():
+                self.reloads += 1
+                return True
+        except Exception as e:
+            # Fichier invalide : l'ancien catalogue reste en service
+            print(f"❌ Rechargement du catalogue impossible : {type(e).__name__}: {e}")
+        return False
+
+    def start(self) -> 'CatalogWatcher':
+        """Démarrer la surveillance (idempotent)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='aisca-catalog-watcher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
@@ -0,0 +1,198 @@
+"""
+AISCA - Artefact des Embeddings du Catalogue
+Les embeddings normalisés des compétences sont sauvegardés sur disque, par modèle :
+
+    data/cache/catalog/<model_id>/
+        embeddings.npy   matrice float32 (N, dim) normalisée
+        manifest.json    empreintes du contenu encodé (global et par ligne), dimensions, date
+        ann_index.npz    index de recherche approchée (si activé)
+        projection_<d>.npz  projection en d dimensions (si activée)
+
+Au démarrage suivant, si l'empreinte des textes du catalogue n'a pas changé,
+la matrice est relue au lieu d'être ré-encodée. Sinon, seules les lignes nouvelles
+ou modifiées (empreinte par ligne inconnue) sont encodées : le reste est repris
+de la matrice sauvegardée, les lignes supprimées disparaissent.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+def compute_content_hash(competency_ids: List, competency_texts: List[str]) -> str:
+    """
+    Empreinte des textes encodés (les métiers n'en font pas partie :
+    modifier jobs.csv ne force pas un ré-encodage)
+    """
+    digest = hashlib.sha256()
+    for comp_id, text in zip(competency_ids, competency_texts):
+        digest.update(f"{comp_id}\t{text}\n".encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def compute_block_hash(competency_block_ids) -> str:
+    """
+    Empreinte du bloc de chaque compétence (hors content_hash : changer une
+    compétence de bloc ne modifie pas son embedding, mais invalide l'index IVF)
+    """
+    block_ids = np.ascontiguousarray(competency_block_ids, dtype=np.int64)
+    return hashlib.sha256(block_ids.tobytes()).hexdigest()[:16]
+
+
+def compute_row_hash(text: str) -> str:
+    """Empreinte d'un texte encodé (une ligne du catalogue)"""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+
+def _tmp_path(path) -> str:
+    """Fichier temporaire propre au processus et au thread (écrivains concurrents)"""
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def save_npz(path, arrays: Dict[str, np.ndarray], manifest: Dict):
+    """Sauvegarder des tableaux avec le manifeste qui les a produits (écriture atomique)"""
+    tmp_path = _tmp_path(path)
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, manifest=np.array(json.dumps(manifest, sort_keys=True)), **arrays)
+    os.replace(tmp_path, path)
+
+
+def load_npz(path, manifest: Dict, ignore_keys=()) -> Optional[Dict[str, np.ndarray]]:
+    """
+    Relire des tableaux sauvegardés par save_npz
+
+    Args:
+        path: Fichier npz
+        manifest: Manifeste attendu
+        ignore_keys: Clés du manifeste non comparées
+
+    Returns:
+        Les tableaux, ou None si le fichier manque ou a été produit avec un autre manifeste
+    """
+    try:
+        with np.load(path) as data:
+            stored = json.loads(str(data['manifest']))
+            expected = dict(manifest)
+            for key in ignore_keys:
+                stored.pop(key, None)
+                expected.pop(key, None)
+            if stored != expected:
+                return None
+            return {name: data[name] for name in data.files if name != 'manifest'}
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+class CatalogArtifact:
+    """
+    Répertoire des fichiers dérivés du catalogue pour un modèle donné
+    """
+
+    def __init__(self, root_dir: str, model_id: str):
+        """
+        Args:
+            root_dir: Répertoire racine (ex: data/cache/catalog)
+            model_id: Identifiant du modèle d'encodage
+        """
+        self.model_id = model_id
+        self.directory = Path(root_dir) / model_id.replace('/', '_')
+        self.embeddings_path = self.directory / 'embeddings.npy'
+        self.manifest_path = self.directory / 'manifest.json'
+        self.index_path = self.directory / 'ann_index.npz'
+
+    def projection_path(self, dim: int) -> Path:
+        return self.directory / f'projection_{dim}.npz'
+
+    def load_manifest(self) -> Optional[dict]:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def load(self, content_hash: str) -> Optional[np.ndarray]:
+        """
+        Relire les embeddings s'ils correspondent au contenu actuel
+
+        Returns:
+            Matrice float32 (N, dim), ou None si absente / périmée
+        """
+        manifest = self.load_manifest()
+        if manifest is None or manifest.get('content_hash') != content_hash:
+            return None
+        try:
+            embeddings = np.load(self.embeddings_path)
+        except (OSError, ValueError):
+            return None
+        if embeddings.shape != (manifest['rows'], manifest['dim']):
+            return None
+        return embeddings
+
+    def load_rows(self, row_hashes: List[str]) -> Tuple[Optional[np.ndarray], np.ndarray]:
+        """
+        Reprendre les lignes déjà encodées d'une version précédente du catalogue
+
+        Args:
+            row_hashes: Empreinte de chaque ligne du catalogue actuel
+
+        Returns:
+            (matrice (N, dim) dont les lignes connues sont remplies, indices des lignes à encoder)
+            ou (None, toutes les lignes) si aucune sauvegarde n'est exploitable
+        """
+        all_rows = np.arange(len(row_hashes))
+        manifest = self.load_manifest()
+        if manifest is None or len(manifest.get('row_hashes', ())) != manifest.get('rows'):
+            return None, all_rows
+        try:
+            # Projection en mémoire : seules les lignes reprises sont lues
+            stored = np.load(self.embeddings_path, mmap_mode='r')
+        except (OSError, ValueError):
+            return None, all_rows
+        if stored.shape != (manifest['rows'], manifest['dim']):
+            return None, all_rows
+
+        stored_rows = {row_hash: row for row, row_hash in enumerate(manifest['row_hashes'])}
+        source = np.array([stored_rows.get(row_hash, -1) for row_hash in row_hashes], dtype=np.int64)
+        found = source >= 0
+
+        embeddings = np.zeros((len(row_hashes), stored.shape[1]), dtype=np.float32)
+        embeddings[found] = stored[source[found]]
+        del stored
+        return embeddings, np.flatnonzero(~found)
+
+    def save(self, embeddings: np.ndarray, content_hash: str, row_hashes: List[str]):
+        """Sauvegarder les embeddings puis le manifeste (écritures atomiques)"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+
+        # Manifeste retiré d'abord : une interruption ne laisse jamais
+        # un manifeste décrire une autre matrice que la sienne
+        try:
+            os.remove(self.manifest_path)
+        except FileNotFoundError:
+            pass
+
+        tmp_path = _tmp_path(self.embeddings_path)
+        with open(tmp_path, 'wb') as f:
+            np.save(f, embeddings)
+        os.replace(tmp_path, self.embeddings_path)
+
+        # Le manifeste en dernier : il ne désigne jamais une matrice incomplète
+        manifest = {
+            'model_id': self.model_id,
+            'content_hash': content_hash,
+            'rows': int(embeddings.shape[0]),
+            'dim': int(embeddings.shape[1]),
+            'created': datetime.now().isoformat(),
+            'row_hashes': list(row_hashes)
+        }
+        tmp_path = _tmp_path(self.manifest_path)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
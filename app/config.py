@@ -0,0 +1,147 @@
+"""
+AISCA - Configuration du Moteur d'Analyse
+Paramètres centralisés, surchargeables via variables d'environnement (.env)
+"""
+
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Lire un booléen depuis l'environnement ('1', 'true', 'yes', 'on')"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _env_int(name: str, default: int) -> int:
+    """Lire un entier depuis l'environnement"""
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    return int(value)
+
+
+# Modèle SBERT multilingue
+SBERT_MODEL_NAME = os.getenv('AISCA_SBERT_MODEL', 'paraphrase-multilingual-MiniLM-L12-v2')
+
+# Répertoire racine des caches du moteur (résultats, embeddings...)
+CACHE_DIR = os.getenv('AISCA_CACHE_DIR', 'data/cache')
+
+# Cache des résultats d'analyse complets
+RESULT_CACHE_ENABLED = _env_bool('AISCA_RESULT_CACHE', True)
+RESULT_CACHE_MAX_ENTRIES = _env_int('AISCA_RESULT_CACHE_MAX_ENTRIES', 256)
+# Fichiers gardés sur disque au maximum (les plus anciens sont supprimés, 0 : illimité)
+RESULT_CACHE_MAX_FILES = _env_int('AISCA_RESULT_CACHE_MAX_FILES', 10000)
+
+# Cache des embeddings de textes utilisateur (Q1, Q5)
+EMBEDDING_CACHE_MAX_MB = _env_int('AISCA_EMBEDDING_CACHE_MAX_MB', 64)
+EMBEDDING_CACHE_DTYPE = os.getenv('AISCA_EMBEDDING_CACHE_DTYPE', 'float32')
+EMBEDDING_CACHE_PERSIST = _env_bool('AISCA_EMBEDDING_CACHE_PERSIST', False)
+EMBEDDING_CACHE_CAPACITY = _env_int('AISCA_EMBEDDING_CACHE_CAPACITY', 50000)
+
+# Micro-batching des encodages concurrents (sessions simultanées)
+MICRO_BATCHING = _env_bool('AISCA_MICRO_BATCHING', True)
+MICRO_BATCH_MAX_SIZE = _env_int('AISCA_MICRO_BATCH_MAX_SIZE', 64)
+MICRO_BATCH_MAX_WAIT_MS = float(os.getenv('AISCA_MICRO_BATCH_MAX_WAIT_MS', '5'))
+
+# Backend d'encodage : 'torch', 'onnx' ou 'onnx-int8' (voir app/encoders.py)
+ENCODER_BACKEND = os.getenv('AISCA_ENCODER_BACKEND', 'torch')
+
+# Précision de stockage de la matrice des compétences : 'float32', 'float16' ou 'int8'
+EMBEDDING_STORAGE = os.getenv('AISCA_EMBEDDING_STORAGE', 'float32')
+
+# Artefact des embeddings du catalogue (relu au démarrage si le catalogue n'a pas changé)
+# Chaîne vide : pas de sauvegarde sur disque
+CATALOG_ARTIFACT_DIR = os.getenv('AISCA_CATALOG_ARTIFACT_DIR', f"{CACHE_DIR}/catalog")
+
+# Index de recherche approchée (IVF) : 'auto' (catalogues >= ANN_MIN_CATALOG_SIZE), 'ivf' ou 'none'
+ANN_INDEX = os.getenv('AISCA_ANN_INDEX', 'auto')
+ANN_MIN_CATALOG_SIZE = _env_int('AISCA_ANN_MIN_CATALOG_SIZE', 20000)
+ANN_N_LISTS = _env_int('AISCA_ANN_N_LISTS', 0)
+ANN_N_PROBE = _env_int('AISCA_ANN_N_PROBE', 8)
+ANN_TOP_K = _env_int('AISCA_ANN_TOP_K', 50)
+
+# Projection des embeddings en dimension réduite (0 = désactivée, sinon 64 à 128)
+PROJECTION_DIM = _env_int('AISCA_PROJECTION_DIM', 0)
+
+# Découpage des textes longs (Q1, Q5) : morceaux d'au plus CHUNK_MAX_WORDS mots
+# (0 = désactivé), agrégés par compétence en 'max' ou 'topk'
+CHUNK_MAX_WORDS = _env_int('AISCA_CHUNK_MAX_WORDS', 80)
+CHUNK_MAX_COUNT = _env_int('AISCA_CHUNK_MAX_COUNT', 32)
+CHUNK_POOLING = os.getenv('AISCA_CHUNK_POOLING', 'max')
+
+# Rechargement à chaud du catalogue quand competencies.csv / jobs.csv changent
+CATALOG_WATCH = _env_bool('AISCA_CATALOG_WATCH', False)
+CATALOG_WATCH_INTERVAL_S = float(os.getenv('AISCA_CATALOG_WATCH_INTERVAL_S', '5'))
+
+# Part maximale de compétences ré-encodées pour garder la projection et les centroïdes IVF
+CATALOG_INCREMENTAL_MAX_RATIO = float(os.getenv('AISCA_CATALOG_INCREMENTAL_MAX_RATIO', '0.2'))
+
+# Segment de catalogue partagé entre les processus de la machine (UI, scorer, API)
+SHARED_CATALOG = _env_bool('AISCA_SHARED_CATALOG', False)
+SHARED_CATALOG_DIR = os.getenv(
+    'AISCA_SHARED_CATALOG_DIR',
+    '/dev/shm' if os.path.isdir('/dev/shm') else f"{CACHE_DIR}/shared"
+)
+
+# Serveur local d'embeddings (app/embedding_server.py) : les analyseurs lui délèguent
+# l'encodage et les similarités au lieu de charger le modèle
+EMBEDDING_SERVER = _env_bool('AISCA_EMBEDDING_SERVER', False)
+EMBEDDING_SERVER_SOCKET = os.getenv('AISCA_EMBEDDING_SERVER_SOCKET', f"{CACHE_DIR}/embedding-server.sock")
+
+# Service HTTP de scoring (app/api_server.py)
+API_HOST = os.getenv('AISCA_API_HOST', '127.0.0.1')
+API_PORT = _env_int('AISCA_API_PORT', 8600)
+API_MAX_CONCURRENCY = _env_int('AISCA_API_MAX_CONCURRENCY', 16)
+# Requêtes en attente d'un créneau au maximum (au-delà : 503 immédiat)
+API_MAX_QUEUE = _env_int('AISCA_API_MAX_QUEUE', 64)
+API_MAX_BATCH_ITEMS = _env_int('AISCA_API_MAX_BATCH_ITEMS', 256)
+API_MAX_BODY_MB = _env_int('AISCA_API_MAX_BODY_MB', 8)
+API_MICRO_BATCH_SIZE = _env_int('AISCA_API_MICRO_BATCH_SIZE', 32)
+API_MICRO_BATCH_WAIT_MS = float(os.getenv('AISCA_API_MICRO_BATCH_WAIT_MS', '10'))
+# Délai maximal d'une requête de scoring (secondes, 0 = aucun) : au-delà, réponse 504
+API_REQUEST_TIMEOUT_S = float(os.getenv('AISCA_API_REQUEST_TIMEOUT_S', '30'))
+
+# Préchauffage du modèle et des chemins de scoring à la construction de l'analyseur :
+# 'background' (thread de fond), 'sync' (avant la fin du constructeur) ou 'none'
+WARMUP = os.getenv('AISCA_WARMUP', 'background')
+
+# Ressources d'inférence de l'encodeur (app/inference_resources.py)
+# Threads intra-op (0 = cœurs / appels simultanés) et inter-op (0 = défaut du runtime),
+# appels simultanés au modèle, taille de batch (0 = mesurée au préchauffage parmi les candidates)
+ENCODER_INTRA_OP_THREADS = _env_int('AISCA_ENCODER_INTRA_OP_THREADS', 0)
+ENCODER_INTER_OP_THREADS = _env_int('AISCA_ENCODER_INTER_OP_THREADS', 1)
+ENCODER_MAX_CONCURRENT = _env_int('AISCA_ENCODER_MAX_CONCURRENT', 2)
+ENCODER_BATCH_SIZE = _env_int('AISCA_ENCODER_BATCH_SIZE', 0)
+ENCODER_BATCH_CANDIDATES = tuple(
+    int(size) for size in os.getenv('AISCA_ENCODER_BATCH_CANDIDATES', '8,16,32,64').split(',')
+)
+# Répliques de l'encodeur dans le processus (1 = un seul encodeur) : chacune a ses
+# cœurs réservés et sert un appel à la fois ; épinglage des threads sur ces cœurs.
+# Backend ONNX uniquement (torch : un module et un nombre de threads par processus,
+# la valeur est ignorée ; plusieurs processus avec app/prefork.py)
+ENCODER_REPLICAS = _env_int('AISCA_ENCODER_REPLICAS', 1)
+ENCODER_PIN_CORES = _env_bool('AISCA_ENCODER_PIN_CORES', True)
+
+# Échéance globale d'une analyse de l'interface, appels OpenAI compris (secondes, 0 = aucune)
+ANALYSIS_DEADLINE_S = float(os.getenv('AISCA_ANALYSIS_DEADLINE_S', '180'))
+
+# Contrôle d'admission des analyses de l'interface (app/admission.py) :
+# analyses simultanées, puis file FIFO bornée (au-delà : demande refusée)
+ADMISSION_MAX_ACTIVE = _env_int('AISCA_ADMISSION_MAX_ACTIVE', 4)
+ADMISSION_MAX_QUEUE = _env_int('AISCA_ADMISSION_MAX_QUEUE', 50)
+
+# Encodage spéculatif des textes libres pendant le questionnaire (app/speculative.py)
+# et attente maximale de ces encodages au lancement de l'analyse (secondes)
+SPECULATIVE_ENCODING = _env_bool('AISCA_SPECULATIVE_ENCODING', True)
+SPECULATIVE_MAX_WAIT_S = float(os.getenv('AISCA_SPECULATIVE_MAX_WAIT_S', '10'))
+
+# Aperçu en direct de Q1 (app/live_preview.py) : délai sans modification avant le calcul,
+# morceaux nouveaux encodés au plus par aperçu (les suivants au prochain aperçu)
+LIVE_PREVIEW = _env_bool('AISCA_LIVE_PREVIEW', True)
+PREVIEW_DEBOUNCE_MS = _env_int('AISCA_PREVIEW_DEBOUNCE_MS', 400)
+PREVIEW_MAX_NEW_CHUNKS = _env_int('AISCA_PREVIEW_MAX_NEW_CHUNKS', 8)
@@ -0,0 +1,387 @@
+"""
+AISCA - Cache des Embeddings de Textes
+Évite de ré-encoder avec SBERT un texte déjà vu (relance d'analyse,
+retour arrière dans le questionnaire, nouvel essai après erreur OpenAI...).
+Clé = identifiant du modèle + empreinte du texte.
+Mémoire bornée (LRU en octets) + persistance optionnelle dans un fichier memmap.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows : pas de verrou inter-processus
+    fcntl = None
+
+
+SUPPORTED_DTYPES = ('float32', 'float16')
+
+# Empreinte SHA-1 de la clé stockée avec chaque vecteur persistant
+KEY_DIGEST_BYTES = 20
+
+
+def make_embedding_key(model_id: str, text: str) -> str:
+    """
+    Construire la clé d'un embedding
+
+    Args:
+        model_id: Identifiant du modèle (un même texte n'a pas le même vecteur d'un modèle à l'autre)
+        text: Texte encodé
+
+    Returns:
+        Empreinte SHA-1 hexadécimale
+    """
+    digest = hashlib.sha1()
+    digest.update(model_id.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(text.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class MemmapEmbeddingStore:
+    """
+    Stockage disque des embeddings dans un fichier memory-mapped
+
+    - <path>.vectors : matrice (capacity, dim) au format dtype
+    - <path>.keys    : empreinte de la clé propriétaire de chaque emplacement
+    - <path>.index   : journal append-only "clé emplacement" (la dernière ligne gagne),
+                       compacté à chaque ouverture
+    - <path>.lock    : verrou partagé par les processus qui utilisent le même chemin
+
+    Les emplacements sont alloués en anneau : une fois la capacité atteinte,
+    les plus anciens vecteurs sont écrasés.
+
+    Plusieurs processus peuvent partager le même chemin (workers préforkés,
+    processus Streamlit) : l'allocation se fait sous verrou de fichier, après
+    relecture des lignes ajoutées au journal par les autres processus. Un
+    emplacement réattribué entre-temps par un autre processus est détecté à la
+    lecture grâce à l'empreinte de clé stockée à côté du vecteur.
+    """
+
+    def __init__(self, path: str, dtype: str = 'float16', capacity: int = 50000):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.capacity = capacity
+        self.dim = None
+        self._vectors = None
+        self._keys = None
+        self._key_to_slot = {}
+        self._slot_to_key = {}
+        self._next_slot = 0
+        self._journal_lines = 0
+        self._journal_offset = 0
+        self._journal_inode = None
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with self._locked():
+            self._load()
+            self._compact()
+
+    @property
+    def _vectors_path(self) -> str:
+        return f"{self.path}.vectors"
+
+    @property
+    def _keys_path(self) -> str:
+        return f"{self.path}.keys"
+
+    @property
+    def _index_path(self) -> str:
+        return f"{self.path}.index"
+
+    @property
+    def _lock_path(self) -> str:
+        return f"{self.path}.lock"
+
+    @contextmanager
+    def _locked(self):
+        """Verrou exclusif inter-processus (sans effet là où fcntl est absent)"""
+        with open(self._lock_path, 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _key_digest(key: str) -> bytes:
+        return hashlib.sha1(key.encode('utf-8')).digest()
+
+    def _open(self, dim: int, mode: str):
+        self.dim = dim
+        self._vectors = np.memmap(
+            self._vectors_path,
+            dtype=self.dtype,
+            mode=mode,
+            shape=(self.capacity, dim)
+        )
+        self._keys = np.memmap(
+            self._keys_path,
+            dtype=np.uint8,
+            mode=mode,
+            shape=(self.capacity, KEY_DIGEST_BYTES)
+        )
+
+    def _reset(self):
+        self._key_to_slot.clear()
+        self._slot_to_key.clear()
+        self._next_slot = 0
+        self._journal_lines = 0
+        self._journal_offset = 0
+        self._journal_inode = None
+
+    def _assign(self, key: str, slot: int):
+        previous_owner = self._slot_to_key.get(slot)
+        if previous_owner is not None:
+            self._key_to_slot.pop(previous_owner, None)
+        previous_slot = self._key_to_slot.get(key)
+        if previous_slot is not None and self._slot_to_key.get(previous_slot) == key:
+            del self._slot_to_key[previous_slot]
+        self._slot_to_key[slot] = key
+        self._key_to_slot[key] = slot
+        self._next_slot = (slot + 1) % self.capacity
+
+    def _replay(self, f):
+        """Appliquer les lignes complètes du journal à partir de la position courante"""
+        while True:
+            line = f.readline()
+            if not line.endswith(b'\n'):
+                # Fin du journal (ou ligne tronquée par un arrêt brutal)
+                break
+            self._journal_offset = f.tell()
+            self._journal_lines += 1
+            parts = line.split()
+            if len(parts) != 2:
+                continue
+            self._assign(parts[0].decode('utf-8'), int(parts[1]))
+
+    def _load(self):
+        """Recharger l'index et mapper les fichiers existants (appelée sous verrou)"""
+        self._reset()
+        paths = (self._vectors_path, self._keys_path, self._index_path)
+        if not all(os.path.exists(path) for path in paths):
+            return
+
+        with open(self._index_path, 'rb') as f:
+            header = f.readline().decode('utf-8').split()
+            if len(header) != 3 or header[0] != '#' or header[2] != self.dtype.name:
+                print("⚠️ Cache d'embeddings disque incompatible, ignoré")
+                return
+            dim = int(header[1])
+            self._journal_offset = f.tell()
+            self._journal_inode = os.fstat(f.fileno()).st_ino
+            self._replay(f)
+
+        expected_sizes = (
+            (self._vectors_path, self.capacity * dim * self.dtype.itemsize),
+            (self._keys_path, self.capacity * KEY_DIGEST_BYTES)
+        )
+        if any(os.path.getsize(path) != size for path, size in expected_sizes):
+            print("⚠️ Taille du cache d'embeddings disque incohérente, ignoré")
+            self._reset()
+            return
+
+        self._open(dim, 'r+')
+
+    def _refresh(self):
+        """Prendre en compte les écritures des autres processus (appelée sous verrou)"""
+        try:
+            stat = os.stat(self._index_path)
+        except FileNotFoundError:
+            stat = None
+        if stat is None or stat.st_ino != self._journal_inode or stat.st_size < self._journal_offset:
+            # Journal créé, compacté ou recréé par un autre processus : relecture complète
+            self._load()
+            return
+        if stat.st_size > self._journal_offset:
+            with open(self._index_path, 'rb') as f:
+                f.seek(self._journal_offset)
+                self._replay(f)
+
+    def _compact(self):
+        """Réécrire le journal avec une ligne par vecteur encore valide (appelée sous verrou)"""
+        if self._vectors is None:
+            return
+        for key, slot in list(self._key_to_slot.items()):
+            if self._keys[slot].tobytes() != self._key_digest(key):
+                del self._key_to_slot[key]
+                self._slot_to_key.pop(slot, None)
+        if self._journal_lines == len(self._key_to_slot):
+            return
+
+        # Ordre d'allocation conservé : la dernière ligne redonne le prochain emplacement
+        next_slot = self._next_slot
+        slots = sorted(self._slot_to_key, key=lambda slot: (slot - next_slot) % self.capacity)
+        tmp_path = f"{self._index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(f"# {self.dim} {self.dtype.name}\n")
+            for slot in slots:
+                f.write(f"{self._slot_to_key[slot]} {slot}\n")
+        os.replace(tmp_path, self._index_path)
+
+        stat = os.stat(self._index_path)
+        self._journal_inode = stat.st_ino
+        self._journal_offset = stat.st_size
+        self._journal_lines = len(slots)
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        slot = self._key_to_slot.get(key)
+        if slot is None:
+            return None
+        digest = self._key_digest(key)
+        if self._keys[slot].tobytes() == digest:
+            vector = np.array(self._vectors[slot], dtype=np.float32)
+            # Relecture de l'empreinte : emplacement réécrit pendant la copie ?
+            if self._keys[slot].tobytes() == digest:
+                return vector
+        # Emplacement réattribué par un autre processus
+        del self._key_to_slot[key]
+        if self._slot_to_key.get(slot) == key:
+            del self._slot_to_key[slot]
+        return None
+
+    def put(self, key: str, vector: np.ndarray):
+        if key in self._key_to_slot:
+            return
+
+        with self._locked():
+            self._refresh()
+            if key in self._key_to_slot:
+                # Déjà écrit par un autre processus
+                return
+
+            if self._vectors is None:
+                self._open(len(vector), 'w+')
+                with open(self._index_path, 'w', encoding='utf-8') as f:
+                    f.write(f"# {self.dim} {self.dtype.name}\n")
+                stat = os.stat(self._index_path)
+                self._journal_inode = stat.st_ino
+                self._journal_offset = stat.st_size
+
+            slot = self._next_slot
+            # Empreinte effacée pendant l'écriture : un lecteur concurrent ignore l'emplacement
+            self._keys[slot] = 0
+            self._vectors[slot] = vector.astype(self.dtype)
+            self._keys[slot] = np.frombuffer(self._key_digest(key), dtype=np.uint8)
+            self._assign(key, slot)
+
+            with open(self._index_path, 'ab') as f:
+                f.write(f"{key} {slot}\n".encode('utf-8'))
+                self._journal_offset = f.tell()
+            self._journal_lines += 1
+
+    def flush(self):
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._keys.flush()
+
+    def __len__(self) -> int:
+        return len(self._key_to_slot)
+
+
+class EmbeddingCache:
+    """
+    Cache LRU d'embeddings borné par un budget mémoire (en octets)
+    Thread-safe : partagé par toutes les sessions qui utilisent l'analyseur
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        dtype: str = 'float32',
+        persist_path: Optional[str] = None,
+        persist_capacity: int = 50000
+    ):
+        """
+        Args:
+            max_bytes: Budget mémoire des vecteurs conservés
+            dtype: Précision de stockage ('float32' ou 'float16')
+            persist_path: Préfixe des fichiers memmap (None = mémoire seule)
+            persist_capacity: Nombre maximum de vecteurs sur disque
+        """
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"❌ dtype non supporté : {dtype} (attendu : {SUPPORTED_DTYPES})")
+
+        self.max_bytes = max_bytes
+        self.dtype = np.dtype(dtype)
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self.disk = None
+        if persist_path:
+            self.disk = MemmapEmbeddingStore(persist_path, dtype=dtype, capacity=persist_capacity)
+
+    def _remember(self, key: str, vector: np.ndarray):
+        """Insérer en mémoire puis évincer jusqu'à respecter le budget"""
+        stored = np.ascontiguousarray(vector, dtype=self.dtype)
+        if key in self._memory:
+            self._memory_bytes -= self._memory[key].nbytes
+        self._memory[key] = stored
+        self._memory.move_to_end(key)
+        self._memory_bytes += stored.nbytes
+
+        while self._memory_bytes > self.max_bytes and len(self._memory) > 1:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.nbytes
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """
+        Récupérer un vecteur (float32) ou None si absent
+        """
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return vector.astype(np.float32)
+
+            if self.disk is not None:
+                vector = self.disk.get(key)
+                if vector is not None:
+                    self._remember(key, vector)
+                    self.hits += 1
+                    return vector
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, vector: np.ndarray):
+        """Enregistrer un vecteur"""
+        with self._lock:
+            self._remember(key, vector)
+            if self.disk is not None:
+                self.disk.put(key, vector)
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Récupérer les vecteurs présents parmi une liste de clés"""
+        found = {}
+        for key in keys:
+            vector = self.get(key)
+            if vector is not None:
+                found[key] = vector
+        return found
+
+    def flush(self):
+        """Forcer l'écriture du fichier memmap sur disque"""
+        with self._lock:
+            if self.disk is not None:
+                self.disk.flush()
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._memory_bytes
+
+    def __len__(self) -> int:
+        return len(self._memory)
@@ -0,0 +1,359 @@
+"""
+AISCA - Serveur Local d'Embeddings (socket Unix)
+Un seul modèle SBERT par machine : le démon possède le modèle et le catalogue,
+les applications (Streamlit, scorer par lot) lui délèguent l'encodage et le calcul
+des similarités. Les clients démarrent sans charger le modèle et restent légers.
+
+Les requêtes concurrentes (une connexion par thread client) passent par le
+service de micro-batching de l'analyseur du démon : elles sont encodées ensemble.
+
+Protocole binaire (entiers little-endian) :
+    trame   : opération / statut (u8) + longueur du contenu (u32) + contenu
+    textes  : nombre (u32) + longueurs en octets (u32 × n) + textes UTF-8 concaténés
+    matrice : lignes (u32) + colonnes (u32) + float32 ligne par ligne
+Opérations :
+    INFO         → JSON (modèle, version du catalogue, paramètres de similarité)
+    ENCODE       textes → matrice des embeddings
+    SIMILARITIES empreinte du catalogue (u8 + ASCII) + textes → matrice (textes, compétences)
+Un statut d'erreur est suivi d'un message UTF-8.
+
+Usage :
+    python -m app.embedding_server --socket data/cache/embedding-server.sock
+Les clients s'y connectent avec AISCA_EMBEDDING_SERVER=1 (voir app/config.py).
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Permettre l'exécution directe (python app/embedding_server.py)
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app import config
+
+
+OP_INFO = 1
+OP_ENCODE = 2
+OP_SIMILARITIES = 3
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+FRAME_HEADER = struct.Struct('<BI')
+MATRIX_HEADER = struct.Struct('<II')
+
+# Taille maximale d'une trame (protège le démon des données invalides)
+MAX_FRAME_BYTES = 256 * 1024 * 1024
+
+# Connexions en attente d'acceptation (une par thread client qui se connecte en même temps)
+LISTEN_BACKLOG = 128
+
+# Connexion refusée (file d'attente pleine, démon qui redémarre) : tentatives et attente
+# initiale, doublée à chaque échec (environ 2 s au total)
+CONNECT_ATTEMPTS = 8
+CONNECT_BACKOFF_S = 0.02
+CONNECT_BACKOFF_MAX_S = 1.0
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    """Lire exactement size octets (ConnectionError si la connexion se ferme)"""
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:])
+        if n == 0:
+            raise ConnectionError("Connexion fermée par le pair")
+        received += n
+    return bytes(buffer)
+
+
+def send_frame(sock: socket.socket, code: int, payload: bytes = b''):
+    sock.sendall(FRAME_HEADER.pack(code, len(payload)) + payload)
+
+
+def recv_frame(sock: socket.socket) -> Tuple[int, bytes]:
+    """
+    Returns:
+        (opération ou statut, contenu)
+    """
+    code, size = FRAME_HEADER.unpack(_recv_exact(sock, FRAME_HEADER.size))
+    if size > MAX_FRAME_BYTES:
+        raise ValueError(f"Trame trop grande : {size} octets")
+    return code, _recv_exact(sock, size)
+
+
+def pack_texts(texts: List[str]) -> bytes:
+    encoded = [text.encode('utf-8') for text in texts]
+    lengths = np.array([len(data) for data in encoded], dtype='<u4')
+    return struct.pack('<I', len(encoded)) + lengths.tobytes() + b''.join(encoded)
+
+
+def unpack_texts(payload: bytes, offset: int = 0) -> List[str]:
+    (count,) = struct.unpack_from('<I', payload, offset)
+    offset += 4
+    lengths = np.frombuffer(payload, dtype='<u4', count=count, offset=offset)
+    offset += 4 * count
+    texts = []
+    for length in lengths.tolist():
+        texts.append(payload[offset:offset + length].decode('utf-8'))
+        offset += length
+    return texts
+
+
+def pack_matrix(matrix: np.ndarray) -> bytes:
+    matrix = np.ascontiguousarray(matrix, dtype='<f4')
+    rows, cols = matrix.shape
+    return MATRIX_HEADER.pack(rows, cols) + matrix.tobytes()
+
+
+def unpack_matrix(payload: bytes) -> np.ndarray:
+    rows, cols = MATRIX_HEADER.unpack_from(payload)
+    return np.frombuffer(payload, dtype='<f4', count=rows * cols, offset=MATRIX_HEADER.size).reshape(rows, cols)
+
+
+class _RequestHandler(socketserver.BaseRequestHandler):
+    """Une connexion cliente : requêtes servies l'une après l'autre jusqu'à fermeture"""
+
+    def handle(self):
+        while True:
+            try:
+                op, payload = recv_frame(self.request)
+            except (ConnectionError, ValueError, OSError):
+                return
+            try:
+                response = self.server.dispatch(op, payload)
+            except Exception as e:
+                send_frame(self.request, STATUS_ERROR, f"{type(e).__name__}: {e}".encode('utf-8'))
+                continue
+            send_frame(self.request, STATUS_OK, response)
+
+
+class EmbeddingServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Démon d'encodage et de similarités au-dessus d'un SemanticAnalyzer
+    """
+
+    daemon_threads = True
+    # File d'attente de listen() : 5 par défaut, trop peu pour un pic de sessions simultanées
+    request_queue_size = LISTEN_BACKLOG
+
+    def __init__(self, analyzer, socket_path: str):
+        """
+        Args:
+            analyzer: SemanticAnalyzer propriétaire du modèle et du catalogue
+                      (micro-batching activé pour regrouper les requêtes concurrentes)
+            socket_path: Chemin du socket Unix (un socket orphelin est remplacé)
+        """
+        self.analyzer = analyzer
+        self.socket_path = socket_path
+        self.requests = 0
+
+        Path(socket_path).parent.mkdir(parents=True, exist_ok=True)
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        super().__init__(socket_path, _RequestHandler)
+
+    def info(self) -> Dict:
+        catalog = self.analyzer.catalog
+        return {
+            'model': self.analyzer.model_id,
+            'catalog': catalog.catalog_version,
+            'content_hash': catalog.content_hash,
+            'competencies': len(catalog.competency_ids),
+            'similarity': self.analyzer._similarity_signature()
+        }
+
+    def dispatch(self, op: int, payload: bytes) -> bytes:
+        self.requests += 1
+        if op == OP_INFO:
+            return json.dumps(self.info()).encode('utf-8')
+
+        if op == OP_ENCODE:
+            texts = unpack_texts(payload)
+            if not texts:
+                return pack_matrix(np.zeros((0, 0), dtype=np.float32))
+            return pack_matrix(self.analyzer._encode_texts(texts))
+
+        if op == OP_SIMILARITIES:
+            hash_len = payload[0]
+            content_hash = payload[1:1 + hash_len].decode('ascii')
+            texts = unpack_texts(payload, 1 + hash_len)
+            with self.analyzer._pinned_catalog():
+                catalog = self.analyzer.catalog
+                if content_hash != catalog.content_hash:
+                    raise ValueError(
+                        f"catalogue du client ({content_hash}) différent de celui du serveur ({catalog.content_hash})"
+                    )
+                if not texts:
+                    return pack_matrix(np.zeros((0, len(catalog.competency_ids)), dtype=np.float32))
+                return pack_matrix(self.analyzer._chunk_similarities(texts))
+
+        raise ValueError(f"Opération inconnue : {op}")
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.socket_path)
+        except OSError:
+            pass
+
+
+class RemoteEncoder:
+    """
+    Client du serveur d'embeddings, utilisable comme encodeur de SemanticAnalyzer
+    Chaque thread garde sa propre connexion : les requêtes des sessions
+    concurrentes arrivent en parallèle au démon, qui les regroupe.
+    """
+
+    backend = 'remote'
+
+    def __init__(self, socket_path: str = config.EMBEDDING_SERVER_SOCKET, timeout: float = 60.0):
+        """
+        Args:
+            socket_path: Chemin du socket Unix du démon
+            timeout: Délai maximal d'une requête (secondes)
+        """
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+        self.server_info = self.refresh_info()
+        self.model_name = self.server_info['model']
+        self.model_id = self.server_info['model']
+
+    def _connection(self) -> socket.socket:
+        # Connexion héritée d'un autre processus (fork) : jamais réutilisée
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        conn = self._connect()
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def _connect(self) -> socket.socket:
+        """Se connecter au démon, en réessayant avec une attente croissante et bornée"""
+        delay = CONNECT_BACKOFF_S
+        for attempt in range(CONNECT_ATTEMPTS):
+            conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            conn.settimeout(self.timeout)
+            try:
+                conn.connect(self.socket_path)
+                return conn
+            except (BlockingIOError, ConnectionRefusedError, FileNotFoundError):
+                # File d'attente du démon pleine, ou socket pas encore (re)créé
+                conn.close()
+                if attempt == CONNECT_ATTEMPTS - 1:
+                    raise
+            except BaseException:
+                conn.close()
+                raise
+            # Attente aléatoire : les clients refusés ensemble ne reviennent pas ensemble
+            time.sleep(delay * random.uniform(0.5, 1.0))
+            delay = min(delay * 2, CONNECT_BACKOFF_MAX_S)
+
+    def _close(self):
+        conn = getattr(self._local, 'conn', None)
+        self._local.conn = None
+        if conn is not None:
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+    def _request(self, op: int, payload: bytes = b'') -> bytes:
+        """
+        Envoyer une requête (une nouvelle tentative si la connexion a été perdue,
+        par exemple au redémarrage du démon ; la connexion elle-même est réessayée
+        avec attente croissante, voir _connect)
+        """
+        for attempt in range(2):
+            try:
+                conn = self._connection()
+                send_frame(conn, op, payload)
+                status, response = recv_frame(conn)
+                break
+            except (ConnectionError, OSError):
+                self._close()
+                if attempt:
+                    raise
+        if status != STATUS_OK:
+            raise RuntimeError(f"❌ Serveur d'embeddings : {response.decode('utf-8', 'replace')}")
+        return response
+
+    def refresh_info(self) -> Dict:
+        """Relire le modèle et la version du catalogue servis par le démon"""
+        self.server_info = json.loads(self._request(OP_INFO).decode('utf-8'))
+        return self.server_info
+
+    def encode(self, texts: List[str], batch_size: int = 32, show_progress_bar: bool = False) -> np.ndarray:
+        """
+        Encoder des textes sur le démon
+
+        Returns:
+            Matrice float32 (len(texts), dim)
+        """
+        if isinstance(texts, str):
+            texts = [texts]
+        return unpack_matrix(self._request(OP_ENCODE, pack_texts(list(texts))))
+
+    def similarities(self, texts: List[str], content_hash: str) -> np.ndarray:
+        """
+        Similarités de textes courts avec le catalogue du démon
+
+        Args:
+            texts: Textes (morceaux) à comparer
+            content_hash: Empreinte du catalogue attendu (erreur si le démon en sert un autre)
+
+        Returns:
+            Matrice float32 (len(texts), nb_compétences) ; -inf = non retrouvée (index IVF)
+        """
+        hash_bytes = content_hash.encode('ascii')
+        payload = bytes([len(hash_bytes)]) + hash_bytes + pack_texts(list(texts))
+        return unpack_matrix(self._request(OP_SIMILARITIES, payload))
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Serveur local d'embeddings AISCA (socket Unix)")
+    parser.add_argument('--socket', default=config.EMBEDDING_SERVER_SOCKET, help="Chemin du socket Unix")
+    parser.add_argument('--backend', default=None, help="Backend d'encodage (défaut : AISCA_ENCODER_BACKEND)")
+    parser.add_argument('--watch-catalog', action='store_true', help="Recharger le catalogue à chaud")
+    args = parser.parse_args(argv)
+
+    from app.semantic_analysis import SemanticAnalyzer
+
+    analyzer = SemanticAnalyzer(
+        use_result_cache=False,
+        use_micro_batching=True,
+        encoder_backend=args.backend or config.ENCODER_BACKEND,
+        watch_catalog=args.watch_catalog,
+        embedding_server=None
+    )
+
+    server = EmbeddingServer(analyzer, args.socket)
+    print(f"🚀 Serveur d'embeddings à l'écoute sur {args.socket} ({analyzer.model_id})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if analyzer.encoding_service is not None:
+            analyzer.encoding_service.stop()
+        print("👋 Serveur d'embeddings arrêté")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+AISCA - Stockage Compact de la Matrice des Compétences
+La matrice des embeddings du catalogue (normalisée) peut être gardée en :
+- 'float32' : référence (4 octets par valeur)
+- 'float16' : demi-précision (2 octets)
+- 'int8'    : entiers signés + une échelle float32 par ligne (~1 octet)
+
+Les similarités sont calculées par blocs de lignes : chaque bloc est déquantifié
+puis multiplié dans la foulée, sans jamais reconstruire la matrice float32 complète.
+
+Rapport de dérive par rapport au float32 :
+    python -m app.embedding_store
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+# Permettre l'exécution directe (python app/embedding_store.py)
+sys.path.append(str(Path(__file__).parent.parent))
+
+
+STORAGE_MODES = ('float32', 'float16', 'int8')
+
+# Lignes déquantifiées à la fois (≈ 6 Mo de float32 temporaires en 384 dimensions)
+CHUNK_ROWS = 4096
+
+
+def quantize_int8(matrix: np.ndarray):
+    """
+    Quantifier chaque ligne en int8 avec sa propre échelle
+
+    Returns:
+        (valeurs int8, échelles float32 par ligne) avec ligne ≈ valeurs * échelle
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    scales = np.abs(matrix).max(axis=1) / 127.0
+    scales = np.where(scales > 0, scales, 1.0).astype(np.float32)
+    values = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8)
+    return values, scales
+
+
+class EmbeddingMatrix:
+    """
+    Matrice (N, dim) stockée en précision réduite
+    """
+
+    def __init__(self, data: np.ndarray, mode: str, scales: np.ndarray = None):
+        if mode not in STORAGE_MODES:
+            raise ValueError(f"❌ Mode de stockage inconnu : {mode} (attendu : {STORAGE_MODES})")
+        self.data = data
+        self.mode = mode
+        self.scales = scales
+
+    @classmethod
+    def from_float(cls, matrix: np.ndarray, mode: str = 'float32') -> 'EmbeddingMatrix':
+        """
+        Construire la matrice compacte à partir de vecteurs float32
+
+        Args:
+            matrix: Embeddings (N, dim)
+            mode: 'float32', 'float16' ou 'int8'
+        """
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        if mode == 'float16':
+            return cls(matrix.astype(np.float16), mode)
+        if mode == 'int8':
+            values, scales = quantize_int8(matrix)
+            return cls(values, mode, scales)
+        return cls(matrix, mode)
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    @property
+    def nbytes(self) -> int:
+        return self.data.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def rows(self, indices) -> np.ndarray:
+        """Lignes déquantifiées en float32"""
+        rows = self.data[indices].astype(np.float32)
+        if self.scales is not None:
+            rows *= self.scales[indices][..., None]
+        return rows
+
+    def to_float32(self) -> np.ndarray:
+        """Matrice complète déquantifiée (à éviter sur les gros catalogues)"""
+        return self.rows(slice(None))
+
+    def similarities(self, queries: np.ndarray) -> np.ndarray:
+        """
+        Produits scalaires requêtes × catalogue (= similarités cosinus si
+        requêtes et lignes sont normalisées)
+
+        Args:
+            queries: Matrice float32 (Q, dim)
+
+        Returns:
+            Matrice float32 (Q, N)
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        if self.mode == 'float32':
+            return queries @ self.data.T
+
+        out = np.empty((len(queries), len(self.data)), dtype=np.float32)
+        queries_t = queries.T
+        for start in range(0, len(self.data), CHUNK_ROWS):
+            stop = start + CHUNK_ROWS
+            block = self.data[start:stop].astype(np.float32) @ queries_t
+            if self.scales is not None:
+                # L'échelle est appliquée après le produit : une multiplication par ligne
+                block *= self.scales[start:stop, None]
+            out[:, start:stop] = block.T
+        return out
+
+
+def top_k_indices(sims: np.ndarray, k: int, query_ids: np.ndarray = None) -> np.ndarray:
+    """
+    Indices (non triés) des k plus fortes similarités de chaque requête
+
+    Args:
+        sims: Similarités (Q, N)
+        k: Taille du top-k
+        query_ids: Ligne du catalogue dont chaque requête est issue (None : requêtes
+                   externes) ; elle est exclue du classement, sinon chaque requête
+                   se retrouve elle-même en tête et l'accord du top-k est surestimé
+
+    Returns:
+        Matrice (Q, k)
+    """
+    if query_ids is not None:
+        sims = sims.copy()
+        sims[np.arange(len(sims)), query_ids] = -np.inf
+    return np.argpartition(-sims, k - 1, axis=1)[:, :k]
+
+
+def storage_drift_report(
+    matrix: np.ndarray,
+    queries: np.ndarray,
+    k: int = 10,
+    query_ids: np.ndarray = None
+) -> Dict[str, Dict]:
+    """
+    Mesurer l'écart de chaque mode de stockage par rapport au float32
+
+    Args:
+        matrix: Embeddings normalisés du catalogue (N, dim)
+        queries: Requêtes normalisées (Q, dim)
+        k: Taille du top-k comparé
+        query_ids: Ligne du catalogue dont chaque requête est issue (exclue des
+                   deux classements ; None : requêtes externes)
+
+    Returns:
+        Par mode : mémoire, erreur max / moyenne des similarités, recouvrement du top-k
+    """
+    reference = EmbeddingMatrix.from_float(matrix, 'float32')
+    ref_sims = reference.similarities(queries)
+    k = min(k, ref_sims.shape[1] - (query_ids is not None))
+    ref_top = top_k_indices(ref_sims, k, query_ids)
+
+    report = {}
+    for mode in STORAGE_MODES:
+        store = EmbeddingMatrix.from_float(matrix, mode)
+        sims = store.similarities(queries)
+        top = top_k_indices(sims, k, query_ids)
+        overlap = [len(set(a) & set(b)) / k for a, b in zip(ref_top, top)]
+        errors = np.abs(sims - ref_sims)
+        report[mode] = {
+            'bytes': store.nbytes,
+            'compression': reference.nbytes / store.nbytes,
+            'max_abs_error': float(errors.max()),
+            'mean_abs_error': float(errors.mean()),
+            f'top{k}_agreement': float(np.mean(overlap))
+        }
+    return report
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Dérive des modes de stockage du catalogue vs float32")
+    parser.add_argument('--backend', default=None, help="Backend d'encodage (défaut : AISCA_ENCODER_BACKEND)")
+    parser.add_argument('--k', type=int, default=10, help="Taille du top-k comparé")
+    args = parser.parse_args(argv)
+
+    from app import config
+    from app.semantic_analysis import SemanticAnalyzer
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        analyzer = SemanticAnalyzer(
+            use_result_cache=False,
+            use_micro_batching=False,
+            encoder_backend=args.backend or config.ENCODER_BACKEND,
+            embedding_storage='float32'
+        )
+
+    # Requêtes : les textes du catalogue eux-mêmes (proches de vraies réponses),
+    # chacun exclu de son propre classement
+    matrix = analyzer.competency_embeddings.to_float32()
+    report = storage_drift_report(matrix, matrix, k=args.k, query_ids=np.arange(len(matrix)))
+
+    print(f"📊 Dérive du stockage sur {len(matrix)} compétences ({analyzer.model_id})")
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
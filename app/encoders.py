@@ -0,0 +1,474 @@
+"""
+AISCA - Backends d'Encodage des Textes
+Tout encodeur respecte le protocole Encoder (model_id + encode) et peut être
+injecté dans SemanticAnalyzer. Backends disponibles :
+- 'torch'     : SentenceTransformer en PyTorch (référence)
+- 'onnx'      : export ONNX exécuté par ONNX Runtime (CPU)
+- 'onnx-int8' : export ONNX + quantification dynamique int8 des poids
+- 'hashing'   : encodeur lexical déterministe, sans fichier de modèle
+                (tests, CI, benchmarks de la logique de scoring)
+
+Le backend se choisit via AISCA_ENCODER_BACKEND (voir app/config.py).
+L'export ONNX est fait une seule fois puis réutilisé depuis le cache disque.
+
+Contrôle de parité (scores par bloc ONNX vs PyTorch) :
+    python -m app.encoders parity --backend onnx-int8 responses/
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Protocol, Sequence
+
+import numpy as np
+
+# Permettre l'exécution directe (python app/encoders.py)
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app import config
+
+
+BACKENDS = ('torch', 'onnx', 'onnx-int8', 'hashing')
+
+
+class Encoder(Protocol):
+    """
+    Interface attendue par SemanticAnalyzer
+
+    model_id identifie de façon unique les vecteurs produits (modèle + backend) :
+    il sert de clé aux caches d'embeddings et de résultats.
+    """
+
+    model_id: str
+
+    def encode(self, texts: List[str], batch_size: int = 32, show_progress_bar: bool = False) -> np.ndarray:
+        ...
+
+
+class SBERTEncoder:
+    """
+    Encodeur de référence : SentenceTransformer en PyTorch
+    """
+
+    backend = 'torch'
+
+    def __init__(self, model_name: str = config.SBERT_MODEL_NAME):
+        from sentence_transformers import SentenceTransformer
+
+        self.model_name = model_name
+        self.model_id = model_name
+        self.model = SentenceTransformer(model_name)
+
+    def encode(self, texts: List[str], batch_size: int = 32, show_progress_bar: bool = False) -> np.ndarray:
+        """
+        Encoder des textes
+
+        Returns:
+            Matrice float32 (len(texts), dim)
+        """
+        return self.model.encode(
+            texts,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=show_progress_bar
+        )
+
+    def prepare_for_fork(self):
+        """Figer les poids et les placer en mémoire partagée avant un fork (voir app/prefork.py)"""
+        self.model.eval()
+        for parameter in self.model.parameters():
+            parameter.requires_grad_(False)
+        self.model.share_memory()
+
+
+def export_onnx(model_name: str, output_dir: str, quantize: bool = False) -> str:
+    """
+    Exporter le transformer d'un modèle SentenceTransformer au format ONNX
+
+    Le pooling (moyenne pondérée par le masque d'attention) et la normalisation
+    éventuelle sont refaits en NumPy par ONNXEncoder ; seule la partie
+    transformer est exportée.
+
+    Args:
+        model_name: Nom ou chemin du modèle SentenceTransformer
+        output_dir: Répertoire de l'export (modèle, tokenizer, métadonnées)
+        quantize: Produire aussi la version int8 (quantification dynamique)
+
+    Returns:
+        Chemin du fichier .onnx à charger
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    print(f"📦 Export ONNX du modèle {model_name}...")
+    os.makedirs(output_dir, exist_ok=True)
+
+    st_model = SentenceTransformer(model_name, device='cpu')
+    transformer = st_model[0].auto_model.eval()
+    tokenizer = st_model.tokenizer
+
+    pooling = None
+    normalize = False
+    for module in st_model:
+        if type(module).__name__ == 'Pooling':
+            # L'API diffère selon la version de sentence-transformers
+            if hasattr(module, 'get_pooling_mode_str'):
+                pooling = module.get_pooling_mode_str()
+            else:
+                pooling = module.pooling_mode
+        if type(module).__name__ == 'Normalize':
+            normalize = True
+    if pooling != 'mean':
+        raise ValueError(f"❌ Pooling non supporté pour l'export ONNX : {pooling} (attendu : mean)")
+
+    class _TransformerOnly(torch.nn.Module):
+        """Sortie unique (last_hidden_state), arguments nommés quelle que soit la version"""
+
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask):
+            return self.model(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+
+    fp32_path = os.path.join(output_dir, 'model.onnx')
+    dummy = tokenizer(["exemple de texte"], return_tensors='pt')
+
+    with torch.no_grad():
+        torch.onnx.export(
+            _TransformerOnly(transformer),
+            (dummy['input_ids'], dummy['attention_mask']),
+            fp32_path,
+            input_names=['input_ids', 'attention_mask'],
+            output_names=['last_hidden_state'],
+            dynamic_axes={
+                'input_ids': {0: 'batch', 1: 'sequence'},
+                'attention_mask': {0: 'batch', 1: 'sequence'},
+                'last_hidden_state': {0: 'batch', 1: 'sequence'}
+            },
+            opset_version=17,
+            dynamo=False
+        )
+
+    tokenizer.save_pretrained(output_dir)
+    with open(os.path.join(output_dir, 'aisca_encoder.json'), 'w', encoding='utf-8') as f:
+        json.dump({
+            'model_name': model_name,
+            'max_seq_length': st_model.max_seq_length,
+            'pooling': pooling,
+            'normalize': normalize,
+            'dimension': st_model.get_sentence_embedding_dimension()
+        }, f, indent=2)
+
+    if not quantize:
+        print(f"✅ Export ONNX terminé : {fp32_path}")
+        return fp32_path
+
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    int8_path = os.path.join(output_dir, 'model.int8.onnx')
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    print(f"✅ Export ONNX int8 terminé : {int8_path}")
+    return int8_path
+
+
+class ONNXEncoder:
+    """
+    Encodeur ONNX Runtime (CPU), optionnellement quantifié en int8
+    Produit les mêmes vecteurs que SBERTEncoder, à la précision numérique près
+    """
+
+    def __init__(
+        self,
+        model_name: str = config.SBERT_MODEL_NAME,
+        export_dir: str = None,
+        quantize: bool = False,
+        intra_op_threads: int = 0,
+        inter_op_threads: int = 0,
+        cores: Sequence[int] = None
+    ):
+        """
+        Args:
+            model_name: Nom du modèle SentenceTransformer exporté
+            export_dir: Répertoire de l'export (créé au premier lancement)
+            quantize: Utiliser les poids quantifiés en int8
+            intra_op_threads: Threads ONNX Runtime par opérateur (0 = automatique)
+            inter_op_threads: Threads ONNX Runtime entre opérateurs (0 = automatique)
+            cores: Cœurs sur lesquels épingler les threads intra-op (réplique du pool,
+                   voir app/inference_resources.py) ; un thread par cœur
+        """
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError(
+                "❌ Backend ONNX indisponible : installez-le avec 'pip install onnxruntime onnx'"
+            ) from e
+        from transformers import AutoTokenizer
+
+        self.backend = 'onnx-int8' if quantize else 'onnx'
+        self.model_name = model_name
+        self.model_id = f"{model_name}@{self.backend}"
+
+        if export_dir is None:
+            safe_model_name = model_name.replace('/', '_')
+            export_dir = f"{config.CACHE_DIR}/onnx/{safe_model_name}"
+
+        model_path = os.path.join(export_dir, 'model.int8.onnx' if quantize else 'model.onnx')
+        if not os.path.exists(model_path):
+            model_path = export_onnx(model_name, export_dir, quantize=quantize)
+
+        with open(os.path.join(export_dir, 'aisca_encoder.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        self.max_seq_length = meta['max_seq_length']
+        self.normalize = meta['normalize']
+
+        self.tokenizer = AutoTokenizer.from_pretrained(export_dir)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if cores:
+            intra_op_threads = len(cores)
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        if cores and len(cores) > 1:
+            # Le thread appelant compte pour un : affinités des autres threads du pool,
+            # processeurs numérotés à partir de 1
+            options.add_session_config_entry(
+                'session.intra_op_thread_affinities',
+                ';'.join(str(core + 1) for core in cores[1:])
+            )
+        if inter_op_threads:
+            options.inter_op_num_threads = inter_op_threads
+        self.session = ort.InferenceSession(
+            model_path,
+            sess_options=options,
+            providers=['CPUExecutionProvider']
+        )
+
+    def encode(self, texts: List[str], batch_size: int = 32, show_progress_bar: bool = False) -> np.ndarray:
+        """
+        Encoder des textes (tokenisation + transformer ONNX + mean pooling)
+
+        Returns:
+            Matrice float32 (len(texts), dim)
+        """
+        if isinstance(texts, str):
+            texts = [texts]
+
+        # Trier par longueur : moins de padding dans chaque batch
+        order = np.argsort([-len(text) for text in texts], kind='stable')
+        outputs = [None] * len(texts)
+
+        for start in range(0, len(texts), batch_size):
+            batch_idx = order[start:start + batch_size]
+            encoded = self.tokenizer(
+                [texts[i] for i in batch_idx],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors='np'
+            )
+            input_ids = encoded['input_ids'].astype(np.int64)
+            attention_mask = encoded['attention_mask'].astype(np.int64)
+
+            hidden = self.session.run(
+                ['last_hidden_state'],
+                {'input_ids': input_ids, 'attention_mask': attention_mask}
+            )[0]
+
+            mask = attention_mask[:, :, None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            if self.normalize:
+                pooled /= np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+
+            for i, vector in zip(batch_idx, pooled):
+                outputs[i] = vector
+
+        return np.stack(outputs).astype(np.float32)
+
+
+@lru_cache(maxsize=200000)
+def _hash_feature(feature: str) -> int:
+    """Empreinte 64 bits stable d'une caractéristique (indépendante de PYTHONHASHSEED)"""
+    return int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class HashingEncoder:
+    """
+    Encodeur lexical déterministe (feature hashing)
+
+    Mots + n-grammes de caractères (3 et 4) hachés dans un vecteur de taille fixe,
+    pondération log(1 + tf), signe aléatoire mais stable, normalisation L2.
+    Aucun téléchargement, résultats identiques d'une machine à l'autre :
+    utilisé par les tests et les benchmarks de la logique de scoring.
+    """
+
+    backend = 'hashing'
+
+    def __init__(self, dimension: int = 384, ngram_sizes=(3, 4)):
+        """
+        Args:
+            dimension: Taille des vecteurs produits
+            ngram_sizes: Tailles des n-grammes de caractères
+        """
+        self.dimension = dimension
+        self.ngram_sizes = tuple(ngram_sizes)
+        self.model_name = 'hashing'
+        self.model_id = f"hashing-{dimension}-{'-'.join(map(str, self.ngram_sizes))}"
+
+    def _features(self, text: str) -> List[str]:
+        """Extraire mots et n-grammes de caractères (minuscules, sans accents)"""
+        text = unicodedata.normalize('NFKD', text.lower())
+        text = ''.join(c for c in text if not unicodedata.combining(c))
+
+        features = []
+        for word in re.findall(r"\w+", text):
+            features.append(word)
+            padded = f"<{word}>"
+            for n in self.ngram_sizes:
+                features.extend(f"#{padded[i:i + n]}" for i in range(len(padded) - n + 1))
+        return features
+
+    def encode(self, texts: List[str], batch_size: int = 32, show_progress_bar: bool = False) -> np.ndarray:
+        """
+        Encoder des textes
+
+        Returns:
+            Matrice float32 (len(texts), dimension), lignes normalisées
+        """
+        if isinstance(texts, str):
+            texts = [texts]
+
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            counts = {}
+            for feature in self._features(text):
+                counts[feature] = counts.get(feature, 0) + 1
+            for feature, count in counts.items():
+                h = _hash_feature(feature)
+                sign = 1.0 if (h >> 63) & 1 else -1.0
+                vectors[row, h % self.dimension] += sign * np.log1p(count)
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+def load_encoder(
+    backend: str = config.ENCODER_BACKEND,
+    model_name: str = config.SBERT_MODEL_NAME,
+    intra_op_threads: int = 0,
+    inter_op_threads: int = 0,
+    cores: Sequence[int] = None
+) -> Encoder:
+    """
+    Instancier l'encodeur correspondant au backend demandé
+
+    Args:
+        backend: 'torch', 'onnx', 'onnx-int8' ou 'hashing'
+        model_name: Nom du modèle SentenceTransformer (ignoré par 'hashing')
+        intra_op_threads: Threads ONNX Runtime par opérateur (0 = automatique ;
+                          backend torch : voir app/inference_resources.py)
+        inter_op_threads: Threads ONNX Runtime entre opérateurs (0 = automatique)
+        cores: Cœurs réservés à l'encodeur (sessions ONNX Runtime uniquement)
+
+    Returns:
+        Encodeur respectant le protocole Encoder
+    """
+    if backend == 'torch':
+        return SBERTEncoder(model_name)
+    if backend in ('onnx', 'onnx-int8'):
+        return ONNXEncoder(
+            model_name,
+            quantize=(backend == 'onnx-int8'),
+            intra_op_threads=intra_op_threads,
+            inter_op_threads=inter_op_threads,
+            cores=cores
+        )
+    if backend == 'hashing':
+        return HashingEncoder()
+    raise ValueError(f"❌ Backend d'encodage inconnu : {backend} (attendu : {BACKENDS})")
+
+
+def check_backend_parity(reference, candidate, responses_list: List[Dict], tolerance: float = 0.02) -> Dict:
+    """
+    Vérifier que deux analyseurs produisent les mêmes scores par bloc
+
+    Args:
+        reference: SemanticAnalyzer de référence (backend torch)
+        candidate: SemanticAnalyzer à valider (ex : onnx-int8)
+        responses_list: Questionnaires utilisés pour la comparaison
+        tolerance: Écart absolu maximal toléré sur chaque score de bloc
+
+    Returns:
+        Rapport : écarts max / moyen, écart du coverage, verdict
+    """
+    reference_results = reference.analyze_many(responses_list)
+    candidate_results = candidate.analyze_many(responses_list)
+
+    block_deltas = []
+    coverage_deltas = []
+    for ref, cand in zip(reference_results, candidate_results):
+        coverage_deltas.append(abs(ref['coverage_score'] - cand['coverage_score']))
+        for bloc_key, bloc in ref['block_scores'].items():
+            block_deltas.append(abs(bloc['score'] - cand['block_scores'][bloc_key]['score']))
+
+    max_delta = max(block_deltas) if block_deltas else 0.0
+    return {
+        'responses': len(responses_list),
+        'max_block_delta': max_delta,
+        'mean_block_delta': float(np.mean(block_deltas)) if block_deltas else 0.0,
+        'max_coverage_delta': max(coverage_deltas) if coverage_deltas else 0.0,
+        'tolerance': tolerance,
+        'passed': max_delta <= tolerance
+    }
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Backends d'encodage AISCA (export ONNX, parité)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help="Exporter le modèle au format ONNX")
+    export_parser.add_argument('--quantize', action='store_true', help="Produire aussi la version int8")
+
+    parity_parser = subparsers.add_parser('parity', help="Comparer les scores d'un backend au backend torch")
+    parity_parser.add_argument('inputs', nargs='*', default=['responses'], help="Fichiers / répertoires de réponses")
+    parity_parser.add_argument('--backend', default='onnx-int8', choices=BACKENDS)
+    parity_parser.add_argument('--tolerance', type=float, default=0.02)
+    args = parser.parse_args(argv)
+
+    if args.command == 'export':
+        safe_model_name = config.SBERT_MODEL_NAME.replace('/', '_')
+        export_onnx(config.SBERT_MODEL_NAME, f"{config.CACHE_DIR}/onnx/{safe_model_name}", quantize=args.quantize)
+        return
+
+    from app.batch_scorer import iter_response_files
+    from app.semantic_analysis import SemanticAnalyzer
+
+    responses_list = []
+    for path in iter_response_files(args.inputs):
+        with open(path, 'r', encoding='utf-8') as f:
+            responses_list.append(json.load(f)['responses'])
+    if not responses_list:
+        print("❌ Aucun fichier de réponses trouvé pour le contrôle de parité")
+        sys.exit(1)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        reference = SemanticAnalyzer(use_result_cache=False, encoder_backend='torch')
+        candidate = SemanticAnalyzer(use_result_cache=False, encoder_backend=args.backend)
+        report = check_backend_parity(reference, candidate, responses_list, tolerance=args.tolerance)
+
+    print(json.dumps(report, indent=2))
+    print("✅ Parité respectée" if report['passed'] else "❌ Écart supérieur à la tolérance")
+    sys.exit(0 if report['passed'] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+AISCA - Service d'Encodage avec Micro-Batching
+Quand plusieurs sessions Streamlit encodent en même temps un ou deux textes courts,
+chaque appel au modèle sous-utilise le CPU et les appels se gênent entre eux.
+Ce service regroupe les demandes concurrentes pendant quelques millisecondes
+(ou jusqu'à une taille de batch maximale), les encode en un seul appel,
+puis renvoie à chaque appelant sa part du résultat via un Future.
+Avec plusieurs répliques de l'encodeur (app/inference_resources.py), plusieurs
+threads de fond servent la même file : un batch par réplique à la fois.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Sequence
+
+import numpy as np
+
+
+class EncodingService:
+    """
+    File d'encodage servie par un ou plusieurs threads de fond
+    """
+
+    thread_name = 'aisca-encoding-service'
+
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], np.ndarray],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+        workers: int = 1
+    ):
+        """
+        Args:
+            encode_fn: Fonction d'encodage d'une liste de textes → matrice (n, dim)
+            max_batch_size: Nombre maximum de textes par appel au modèle
+            max_wait_ms: Attente maximale pour compléter un batch (millisecondes)
+            workers: Threads de fond (batchs encodés simultanément)
+        """
+        self.encode_fn = encode_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self.workers = max(1, workers)
+
+        self._queue = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._stopped = False
+
+        # Statistiques
+        self.batches = 0
+        self.texts = 0
+
+    def start(self):
+        """Démarrer les threads de fond (idempotent)"""
+        with self._lock:
+            if any(thread.is_alive() for thread in self._threads):
+                return
+            self._stopped = False
+            self._threads = [
+                threading.Thread(
+                    target=self._run,
+                    name=self.thread_name if self.workers == 1 else f"{self.thread_name}-{i}",
+                    daemon=True
+                )
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Arrêter les threads après avoir servi les demandes déjà en file"""
+        with self._lock:
+            self._stopped = True
+            threads = self._threads
+        # Une demande d'arrêt par thread
+        for _ in threads:
+            self._queue.put(None)
+        for thread in threads:
+            thread.join(timeout)
+
+    def reset_after_fork(self):
+        """
+        Repartir d'un état vierge dans un processus forké :
+        les threads du parent n'y existent pas et la file peut être dans un état incohérent
+        """
+        self._queue = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._stopped = False
+        self.batches = 0
+        self.texts = 0
+
+    def submit(self, texts: Sequence[str]) -> Future:
+        """
+        Soumettre des textes à encoder
+
+        Returns:
+            Future dont le résultat est la matrice float32 (len(texts), dim)
+        """
+        future = Future()
+        if self._stopped:
+            future.set_exception(RuntimeError("Service d'encodage arrêté"))
+            return future
+        if not self._threads:
+            self.start()
+        self._queue.put((list(texts), future))
+        return future
+
+    def encode(self, texts: Sequence[str], timeout: float = None) -> np.ndarray:
+        """Encoder des textes de manière bloquante (via la file)"""
+        return self.submit(texts).result(timeout)
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.texts / self.batches if self.batches else 0.0
+
+    def _process(self, items: List) -> np.ndarray:
+        """Traiter un batch complet (résultat découpé ensuite entre les appelants)"""
+        return np.asarray(self.encode_fn(items), dtype=np.float32)
+
+    def _collect_batch(self, first) -> list:
+        """Compléter un batch jusqu'à la taille max ou l'expiration du délai"""
+        batch = [first]
+        size = len(first[0])
+        deadline = time.monotonic() + self.max_wait
+
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # Demande d'arrêt : la remettre pour la boucle principale
+                self._queue.put(None)
+                break
+            batch.append(item)
+            size += len(item[0])
+
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                if self._stopped:
+                    return
+                continue
+
+            batch = self._collect_batch(first)
+            # Ignorer les demandes annulées entre-temps par leur appelant
+            batch = [(texts, future) for texts, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            all_texts = [text for texts, _ in batch for text in texts]
+            try:
+                vectors = self._process(all_texts) if all_texts else None
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            with self._lock:
+                self.batches += 1
+                self.texts += len(all_texts)
+
+            offset = 0
+            for texts, future in batch:
+                if vectors is None:
+                    future.set_result(np.zeros((0, 0), dtype=np.float32))
+                    continue
+                future.set_result(vectors[offset:offset + len(texts)])
+                offset += len(texts)
@@ -0,0 +1,491 @@
+"""
+AISCA - Gestion des Ressources d'Inférence de l'Encodeur
+Laissé à lui-même, PyTorch prend autant de threads que de cœurs pour chaque appel :
+plusieurs sessions Streamlit qui encodent en même temps se disputent alors les
+cœurs (sursouscription) et se ralentissent mutuellement.
+
+Le gestionnaire :
+- fixe les threads intra-op et inter-op de PyTorch / ONNX Runtime (voir app/config.py)
+- borne le nombre d'appels simultanés au modèle (sémaphore)
+- choisit la taille de batch d'après le débit mesuré sur l'hôte (au préchauffage)
+- optionnellement, répartit les appels entre plusieurs répliques de l'encodeur
+  (AISCA_ENCODER_REPLICAS), chacune épinglée sur son sous-ensemble de cœurs :
+  une analyse emprunte une réplique libre et la rend après l'encodage.
+  Réservé aux backends dont chaque réplique est indépendante (une session ONNX
+  Runtime par réplique) : avec torch, toutes les répliques partageraient le même
+  module et le nombre de threads du processus (torch.set_num_threads est global),
+  l'épinglage ne portant que sur le thread appelant. Pour torch, un seul encodeur
+  est gardé ; plusieurs processus s'obtiennent avec app/prefork.py
+
+Balayage des réglages sur la machine :
+    python -m app.inference_resources --threads 1 2 4 8 --concurrency 1 2 4 --batch-sizes 8 16 32 64
+    python -m app.inference_resources --replicas 1 2 4 8 --clients 16
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+# Permettre l'exécution directe (python app/inference_resources.py)
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app import config
+
+
+def default_intra_op_threads(max_concurrent: int) -> int:
+    """Cœurs répartis entre les appels simultanés au modèle"""
+    return max(1, (os.cpu_count() or 1) // max(1, max_concurrent))
+
+
+def set_torch_threads(intra_op_threads: int, inter_op_threads: int = 0):
+    """
+    Fixer les threads de PyTorch (sans effet si torch n'est pas chargé)
+
+    Le nombre de threads inter-op ne peut être fixé qu'une fois, avant tout
+    travail parallèle : une seconde tentative est ignorée.
+    """
+    torch = sys.modules.get('torch')
+    if torch is None:
+        return
+    torch.set_num_threads(intra_op_threads)
+    if inter_op_threads:
+        try:
+            torch.set_num_interop_threads(inter_op_threads)
+        except RuntimeError:
+            pass
+
+
+def available_cores() -> List[int]:
+    """Cœurs utilisables par le processus (affinité courante sous Linux)"""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def partition_cores(replicas: int, cores: Sequence[int] = None) -> List[Tuple[int, ...]]:
+    """
+    Répartir les cœurs en sous-ensembles contigus disjoints, un par réplique
+    (plus de répliques que de cœurs : les cœurs sont partagés à tour de rôle)
+    """
+    cores = list(cores) if cores is not None else available_cores()
+    if replicas >= len(cores):
+        return [(cores[i % len(cores)],) for i in range(replicas)]
+    size, extra = divmod(len(cores), replicas)
+    subsets = []
+    start = 0
+    for i in range(replicas):
+        end = start + size + (1 if i < extra else 0)
+        subsets.append(tuple(cores[start:end]))
+        start = end
+    return subsets
+
+
+@contextmanager
+def pinned_thread(cores: Sequence[int] = None):
+    """Restreindre le thread courant à des cœurs le temps du bloc (Linux uniquement)"""
+    if not cores or not hasattr(os, 'sched_setaffinity'):
+        yield
+        return
+    previous = os.sched_getaffinity(0)
+    try:
+        os.sched_setaffinity(0, cores)
+    except OSError:
+        yield
+        return
+    try:
+        yield
+    finally:
+        os.sched_setaffinity(0, previous)
+
+
+class EncoderReplica:
+    """
+    Une réplique de l'encodeur et les cœurs qui lui sont réservés
+    """
+
+    def __init__(self, index: int, encoder, cores: Tuple[int, ...] = None):
+        self.index = index
+        self.encoder = encoder
+        self.cores = cores
+        self.uses = 0
+        self.busy_seconds = 0.0
+
+    def encode(self, texts: List[str], batch_size: int = 32, show_progress_bar: bool = False) -> np.ndarray:
+        start = time.perf_counter()
+        try:
+            with pinned_thread(self.cores):
+                return self.encoder.encode(texts, batch_size=batch_size, show_progress_bar=show_progress_bar)
+        finally:
+            self.uses += 1
+            self.busy_seconds += time.perf_counter() - start
+
+
+class EncoderPool:
+    """
+    Répliques empruntées (checkout) puis rendues (checkin) par les appels au modèle
+    """
+
+    def __init__(self, encoders: List, core_sets: List[Tuple[int, ...]] = None):
+        """
+        Args:
+            encoders: Un encodeur par réplique (le même objet peut être partagé)
+            core_sets: Cœurs de chaque réplique (None : pas d'épinglage)
+        """
+        core_sets = core_sets or [None] * len(encoders)
+        self.replicas = [
+            EncoderReplica(i, encoder, cores)
+            for i, (encoder, cores) in enumerate(zip(encoders, core_sets))
+        ]
+        self.primary = encoders[0]
+
+        self._idle = queue.Queue()
+        for replica in self.replicas:
+            self._idle.put(replica)
+        self._lock = threading.Lock()
+
+        # Statistiques du temps d'attente d'une réplique
+        self.checkouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self._recent_waits = deque(maxlen=1024)
+
+    def checkout(self, timeout: float = None) -> EncoderReplica:
+        """
+        Emprunter une réplique libre (attente si toutes sont occupées)
+
+        Raises:
+            TimeoutError: Aucune réplique libérée dans le délai
+        """
+        start = time.perf_counter()
+        try:
+            replica = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"aucune réplique de l'encodeur libre après {timeout} s") from None
+        waited = time.perf_counter() - start
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+            self._recent_waits.append(waited)
+        return replica
+
+    def checkin(self, replica: EncoderReplica):
+        self._idle.put(replica)
+
+    @contextmanager
+    def replica(self, timeout: float = None):
+        replica = self.checkout(timeout)
+        try:
+            yield replica
+        finally:
+            self.checkin(replica)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            waits = list(self._recent_waits)
+        return {
+            'replicas': len(self.replicas),
+            'idle': self._idle.qsize(),
+            'checkouts': self.checkouts,
+            'mean_wait_ms': round(self.wait_seconds / self.checkouts * 1000, 2) if self.checkouts else 0.0,
+            'p95_wait_ms': round(float(np.percentile(waits, 95)) * 1000, 2) if waits else 0.0,
+            'max_wait_ms': round(self.max_wait_seconds * 1000, 2),
+            'per_replica': [
+                {'cores': list(replica.cores) if replica.cores else None, 'uses': replica.uses,
+                 'busy_s': round(replica.busy_seconds, 2)}
+                for replica in self.replicas
+            ]
+        }
+
+
+class InferenceResources:
+    """
+    Threads, concurrence et taille de batch des appels au modèle d'un processus
+    """
+
+    def __init__(
+        self,
+        intra_op_threads: int = config.ENCODER_INTRA_OP_THREADS,
+        inter_op_threads: int = config.ENCODER_INTER_OP_THREADS,
+        max_concurrent: int = config.ENCODER_MAX_CONCURRENT,
+        batch_size: int = config.ENCODER_BATCH_SIZE,
+        replicas: int = config.ENCODER_REPLICAS
+    ):
+        """
+        Args:
+            intra_op_threads: Threads par opérateur (0 : cœurs / max_concurrent)
+            inter_op_threads: Threads entre opérateurs (0 : défaut du runtime)
+            max_concurrent: Appels simultanés au modèle (les suivants attendent)
+            batch_size: Taille de batch imposée (0 : choisie par calibrate())
+            replicas: Répliques de l'encodeur (> 1 : une par appel simultané,
+                      chacune sur son sous-ensemble de cœurs ; voir build_replicas)
+        """
+        self._requested = (intra_op_threads, max(1, max_concurrent))
+        self.replicas = max(1, replicas)
+        self.max_concurrent = self.replicas if self.replicas > 1 else max(1, max_concurrent)
+        self.replica_cores = partition_cores(self.replicas) if self.replicas > 1 else None
+        self.intra_op_threads = intra_op_threads or default_intra_op_threads(self.max_concurrent)
+        self.inter_op_threads = inter_op_threads
+        self.batch_size = batch_size or None
+        self.calibration = None
+        self.pool = None
+
+        self._slots = threading.BoundedSemaphore(self.max_concurrent)
+        self._lock = threading.Lock()
+
+        # Statistiques
+        self.encodes = 0
+        self.wait_seconds = 0.0
+
+    def configure(self, encoder):
+        """Appliquer les réglages de threads à un encodeur chargé (backend torch)"""
+        if getattr(encoder, 'backend', None) == 'torch':
+            set_torch_threads(self.intra_op_threads, self.inter_op_threads)
+
+    def build_replicas(self, encoder, factory: Callable[[Tuple[int, ...]], object] = None) -> EncoderPool:
+        """
+        Créer le pool de répliques (sans effet avec une seule réplique)
+
+        Args:
+            encoder: Encodeur déjà chargé, utilisé comme première réplique
+            factory: Crée une réplique indépendante pour un sous-ensemble de cœurs
+                     (ex : une session ONNX Runtime par réplique) ; None (backend torch,
+                     encodeur injecté) : répliques impossibles, un seul encodeur est gardé
+
+        Returns:
+            Le pool, ou None si les appels restent servis par un seul encodeur
+        """
+        if self.replicas < 2:
+            return None
+        if factory is None:
+            print(f"⚠️ {self.replicas} répliques demandées, mais l'encodeur "
+                  f"({getattr(encoder, 'backend', type(encoder).__name__)}) ne peut pas être répliqué "
+                  f"dans le processus : un seul encodeur (répliques réservées au backend ONNX)")
+            self._single_encoder()
+            return None
+        encoders = [encoder] + [factory(cores) for cores in self.replica_cores[1:]]
+        self.pool = EncoderPool(encoders, self.replica_cores if config.ENCODER_PIN_CORES else None)
+        return self.pool
+
+    def _single_encoder(self):
+        """Revenir aux réglages sans répliques (threads et concurrence demandés)"""
+        intra_op_threads, max_concurrent = self._requested
+        self.replicas = 1
+        self.replica_cores = None
+        self.max_concurrent = max_concurrent
+        self.intra_op_threads = intra_op_threads or default_intra_op_threads(max_concurrent)
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+
+    @contextmanager
+    def slot(self):
+        """Réserver un des max_concurrent appels simultanés au modèle"""
+        start = time.perf_counter()
+        self._slots.acquire()
+        waited = time.perf_counter() - start
+        with self._lock:
+            self.encodes += 1
+            self.wait_seconds += waited
+        try:
+            yield
+        finally:
+            self._slots.release()
+
+    def encode(self, encoder, texts: List[str], batch_size: int = 32, show_progress_bar: bool = False) -> np.ndarray:
+        """Appel au modèle borné par le sémaphore, avec la taille de batch calibrée si disponible"""
+        if self.pool is not None and encoder is self.pool.primary:
+            with self.pool.replica() as replica:
+                return replica.encode(texts, batch_size=self.batch_size or batch_size, show_progress_bar=show_progress_bar)
+        with self.slot():
+            return encoder.encode(
+                texts,
+                batch_size=self.batch_size or batch_size,
+                show_progress_bar=show_progress_bar
+            )
+
+    @property
+    def mean_wait_ms(self) -> float:
+        return self.wait_seconds / self.encodes * 1000 if self.encodes else 0.0
+
+    def calibrate(self, encoder, texts: Sequence[str], candidates: Sequence[int] = config.ENCODER_BATCH_CANDIDATES) -> Dict[int, float]:
+        """
+        Mesurer le débit (textes/s) de chaque taille de batch et retenir la meilleure
+
+        Args:
+            encoder: Encodeur déjà préchauffé
+            texts: Textes représentatifs (ex : textes du catalogue)
+            candidates: Tailles de batch essayées
+
+        Returns:
+            Débit mesuré par taille de batch
+        """
+        texts = list(texts)
+        throughput = {}
+        with self.slot():
+            for batch_size in candidates:
+                sample = texts[:max(batch_size * 2, 32)]
+                start = time.perf_counter()
+                encoder.encode(sample, batch_size=batch_size, show_progress_bar=False)
+                throughput[batch_size] = len(sample) / max(time.perf_counter() - start, 1e-9)
+
+        self.batch_size = max(throughput, key=throughput.get)
+        self.calibration = throughput
+        return throughput
+
+    def stats(self) -> Dict:
+        stats = {
+            'intra_op_threads': self.intra_op_threads,
+            'inter_op_threads': self.inter_op_threads,
+            'max_concurrent': self.max_concurrent,
+            'batch_size': self.batch_size,
+            'encodes': self.encodes,
+            'mean_wait_ms': round(self.mean_wait_ms, 2)
+        }
+        if self.pool is not None:
+            stats['pool'] = self.pool.stats()
+        return stats
+
+
+def _concurrent_load(resources: InferenceResources, encoder, texts: List[str], clients: int, request_size: int) -> Dict:
+    """Charge de plusieurs sessions : chaque client encode des requêtes de request_size textes"""
+    requests = [texts[i:i + request_size] for i in range(0, len(texts), request_size)]
+    latencies = []
+
+    def send(request):
+        start = time.perf_counter()
+        resources.encode(encoder, request, batch_size=request_size)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(send, requests))
+    duration = time.perf_counter() - start
+
+    return {
+        'texts_per_s': round(len(texts) / duration, 1),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 1),
+        'p95_ms': round(float(np.percentile(latencies, 95)), 1)
+    }
+
+
+def sweep(
+    backend: str,
+    texts: List[str],
+    threads: Sequence[int],
+    concurrency: Sequence[int],
+    batch_sizes: Sequence[int],
+    clients: int = 8,
+    request_size: int = 4,
+    replicas: Sequence[int] = ()
+) -> Dict[str, List[Dict]]:
+    """
+    Balayer threads intra-op × appels simultanés (charge concurrente), puis les tailles de batch
+    et, si demandé, le nombre de répliques de l'encodeur
+
+    Returns:
+        'concurrency' : débit et latences de chaque combinaison sous charge
+        'batch_size' : débit d'un gros lot pour chaque taille de batch (meilleurs threads)
+        'replicas' : débit sous charge et accélération par rapport à la première valeur
+    """
+    from app.encoders import load_encoder
+
+    results = {'concurrency': [], 'batch_size': []}
+    encoders = {}
+
+    def encoder_for(n_threads: int):
+        # ONNX Runtime : threads fixés à la création de la session
+        key = n_threads if backend.startswith('onnx') else None
+        if key not in encoders:
+            with contextlib.redirect_stdout(io.StringIO()):
+                encoders[key] = load_encoder(backend, intra_op_threads=n_threads)
+            encoders[key].encode(texts[:32], batch_size=32)
+        set_torch_threads(n_threads)
+        return encoders[key]
+
+    for n_threads in threads:
+        encoder = encoder_for(n_threads)
+        for max_concurrent in concurrency:
+            resources = InferenceResources(intra_op_threads=n_threads, max_concurrent=max_concurrent)
+            row = {'intra_op_threads': n_threads, 'max_concurrent': max_concurrent}
+            row.update(_concurrent_load(resources, encoder, texts, clients, request_size))
+            results['concurrency'].append(row)
+            print(f"   threads={n_threads:<3} concurrents={max_concurrent:<3} {row['texts_per_s']:>8} textes/s  "
+                  f"p95 {row['p95_ms']} ms")
+
+    best = max(results['concurrency'], key=lambda row: row['texts_per_s'])
+    encoder = encoder_for(best['intra_op_threads'])
+    resources = InferenceResources(intra_op_threads=best['intra_op_threads'], max_concurrent=1)
+    for batch_size, texts_per_s in resources.calibrate(encoder, texts, batch_sizes).items():
+        results['batch_size'].append({'batch_size': batch_size, 'texts_per_s': round(texts_per_s, 1)})
+        print(f"   batch={batch_size:<4} {texts_per_s:>8.1f} textes/s")
+
+    results['recommended'] = {
+        'AISCA_ENCODER_INTRA_OP_THREADS': best['intra_op_threads'],
+        'AISCA_ENCODER_MAX_CONCURRENT': best['max_concurrent'],
+        'AISCA_ENCODER_BATCH_SIZE': resources.batch_size
+    }
+
+    if replicas and backend == 'torch':
+        print("⚠️ Répliques ignorées : réservées au backend ONNX (torch : une réplique par processus)")
+    elif replicas:
+        results['replicas'] = []
+
+        def replica_factory(cores):
+            with contextlib.redirect_stdout(io.StringIO()):
+                replica = load_encoder(backend, cores=cores)
+            replica.encode(texts[:32], batch_size=32)
+            return replica
+
+        for n_replicas in replicas:
+            resources = InferenceResources(max_concurrent=1, replicas=n_replicas)
+            encoder = encoder_for(resources.intra_op_threads)
+            resources.build_replicas(encoder, replica_factory)
+            row = {'replicas': n_replicas, 'intra_op_threads': resources.intra_op_threads}
+            row.update(_concurrent_load(resources, encoder, texts, max(clients, n_replicas), request_size))
+            row['speedup'] = round(row['texts_per_s'] / results['replicas'][0]['texts_per_s'], 2) if results['replicas'] else 1.0
+            results['replicas'].append(row)
+            print(f"   répliques={n_replicas:<3} {row['texts_per_s']:>8} textes/s  p95 {row['p95_ms']} ms  "
+                  f"×{row['speedup']}")
+    return results
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Balayage des réglages d'inférence de l'encodeur")
+    parser.add_argument('--backend', default=None, help="Backend d'encodage (défaut : AISCA_ENCODER_BACKEND)")
+    cpus = os.cpu_count() or 1
+    parser.add_argument('--threads', type=int, nargs='+', default=sorted({1, max(1, cpus // 4), max(1, cpus // 2), cpus}))
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=list(config.ENCODER_BATCH_CANDIDATES))
+    parser.add_argument('--clients', type=int, default=8, help="Sessions simultanées simulées")
+    parser.add_argument('--request-size', type=int, default=4, help="Textes par requête d'une session")
+    parser.add_argument('--texts', type=int, default=256, help="Textes du catalogue encodés par mesure")
+    parser.add_argument('--replicas', type=int, nargs='*', default=[], help="Nombres de répliques de l'encodeur comparés")
+    args = parser.parse_args(argv)
+
+    from app.catalog import CatalogSnapshot
+
+    texts = CatalogSnapshot('data/competencies.csv', 'data/jobs.csv').competency_texts[:args.texts]
+    backend = args.backend or config.ENCODER_BACKEND
+
+    print(f"📊 Balayage sur {cpus} cœur(s), backend {backend}, {len(texts)} textes")
+    results = sweep(
+        backend, texts, args.threads, args.concurrency, args.batch_sizes,
+        args.clients, args.request_size, args.replicas
+    )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
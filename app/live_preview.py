@@ -0,0 +1,114 @@
+"""
+AISCA - Aperçu en Direct de Q1
+Pendant la saisie du parcours (Q1), l'utilisateur voit les compétences détectées
+et des scores de blocs provisoires (SemanticAnalyzer.preview_text).
+
+Chaque nouvelle version du texte relance un délai (debounce) : l'aperçu n'est
+calculé qu'une fois le texte stable pendant debounce_ms, et toujours sur la
+dernière version. Un seul calcul à la fois par session, hors du thread de
+l'interface. Le texte est découpé en morceaux comme pour l'analyse finale :
+les morceaux inchangés sont relus dans le cache d'embeddings, seuls les
+nouveaux passent par le modèle, et l'analyse finale n'a plus à les encoder.
+Les scores de blocs affichés restent provisoires (Q5 n'est pas encore saisi).
+"""
+
+import threading
+import time
+from typing import Callable, Dict
+
+from app import config
+
+
+class LivePreview:
+    """
+    Aperçu Q1 d'une session : la dernière version du texte l'emporte
+    """
+
+    def __init__(self, analyzer_loader: Callable, debounce_ms: float = config.PREVIEW_DEBOUNCE_MS):
+        """
+        Args:
+            analyzer_loader: Renvoie le SemanticAnalyzer partagé
+            debounce_ms: Délai sans nouvelle version avant de calculer l'aperçu
+        """
+        self.analyzer_loader = analyzer_loader
+        self.debounce = debounce_ms / 1000.0
+
+        self._lock = threading.Lock()
+        self._text = None
+        self._responses = None
+        self._analyzer = None
+        self._requested_at = 0.0
+        self._worker = None
+
+        self.result = None
+        self.result_text = None
+        self.error = None
+
+        # Statistiques
+        self.requests = 0
+        self.updates = 0
+
+    @property
+    def pending(self) -> bool:
+        """Un aperçu est en attente ou en cours de calcul"""
+        with self._lock:
+            return self._worker is not None
+
+    def request(self, text: str, responses: Dict = None, analyzer=None):
+        """
+        Demander l'aperçu d'une nouvelle version du texte (sans attendre le résultat)
+
+        Args:
+            text: Texte Q1 saisi
+            responses: Autres réponses déjà données (Q2-Q4), copie que l'appelant
+                       ne modifie plus (lue depuis le thread de l'aperçu)
+            analyzer: SemanticAnalyzer déjà résolu par l'appelant (thread du script
+                      Streamlit) ; défaut : analyzer_loader, appelé dans le thread de l'aperçu
+        """
+        with self._lock:
+            if analyzer is not None:
+                self._analyzer = analyzer
+            if text == self._text:
+                return
+            self._text = text
+            self._responses = responses
+            self._requested_at = time.monotonic()
+            self.requests += 1
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name='aisca-live-preview', daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                text, responses, analyzer = self._text, self._responses, self._analyzer
+                delay = self._requested_at + self.debounce - time.monotonic()
+            if delay > 0:
+                # Nouvelle version arrivée entre-temps : le délai repart d'elle
+                time.sleep(delay)
+                continue
+
+            try:
+                preview = (analyzer or self.analyzer_loader()).preview_text(text, responses)
+            except Exception as e:
+                with self._lock:
+                    self.error = f"{type(e).__name__}: {e}"
+                    self._worker = None
+                return
+
+            with self._lock:
+                self.result, self.result_text, self.error = preview, text, None
+                self.updates += 1
+                # Texte inchangé et tous ses morceaux pris en compte : terminé
+                if self._text == text and not preview['partial']:
+                    self._worker = None
+                    return
+
+    def wait(self, timeout: float = None) -> bool:
+        """Attendre la fin des aperçus en cours (tests, scripts)"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while self.pending:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
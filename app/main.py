@@ -213,14 +213,39 @@ st.markdown("""
 def load_semantic_analyzer():
     """
     Charger le SemanticAnalyzer avec cache Streamlit
-    Le modèle SBERT reste en mémoire entre les reruns
+    Le modèle SBERT reste en mémoire entre les reruns ;
+    le catalogue est rechargé à chaud quand les fichiers CSV changent
     """
+    # Mode pre-fork (python -m app.prefork streamlit) : analyseur hérité du parent
+    from app.prefork import get_preloaded_analyzer
+    preloaded = get_preloaded_analyzer()
+    if preloaded is not None:
+        return preloaded
+    
     from app.semantic_analysis import SemanticAnalyzer
     
-    return SemanticAnalyzer(
+    analyzer = SemanticAnalyzer(
         competencies_path='data/competencies.csv',
-        jobs_path='data/jobs.csv'
+        jobs_path='data/jobs.csv',
+        watch_catalog=True
     )
+    # Première analyse aussi rapide que les suivantes : attendre le préchauffage
+    analyzer.wait_until_ready()
+    return analyzer
+
+
+@st.cache_resource(show_spinner=False)
+def load_admission_controller():
+    """Contrôle d'admission partagé par toutes les sessions du processus"""
+    from app.admission import AdmissionController
+    return AdmissionController()
+
+
+@st.cache_resource(show_spinner=False)
+def load_speculative_executor():
+    """Thread d'encodage spéculatif partagé par toutes les sessions"""
+    from app.speculative import make_executor
+    return make_executor()
 
 
 def init_session_state():
@@ -242,6 +267,16 @@ def init_session_state():
         st.session_state.questionnaire_completed = False
     if 'analysis_results' not in st.session_state:
         st.session_state.analysis_results = None
+    if 'analysis_token' not in st.session_state:
+        st.session_state.analysis_token = None
+
+
+def cancel_running_analysis(reason: str = "analyse abandonnée"):
+    """Arrêter l'analyse en cours de la session (SBERT et OpenAI) au prochain point de contrôle"""
+    token = st.session_state.get('analysis_token')
+    if token is not None:
+        token.cancel(reason)
+        st.session_state.analysis_token = None
 
 
 def sidebar_navigation():
@@ -378,6 +413,22 @@ def questionnaire_page():
     if not st.session_state.questionnaire_completed:
         import sys
         import importlib
+        from app import config
+        
+        # Textes libres encodés pendant que l'utilisateur répond aux questions suivantes
+        if config.SPECULATIVE_ENCODING and 'speculative_encoder' not in st.session_state:
+            from app.speculative import SpeculativeEncoder
+            st.session_state.speculative_encoder = SpeculativeEncoder(
+                load_semantic_analyzer,
+                load_speculative_executor()
+            )
+        if config.LIVE_PREVIEW and 'q1_preview' not in st.session_state:
+            from app.live_preview import LivePreview
+            st.session_state.q1_preview = LivePreview(load_semantic_analyzer)
+        # Aperçu activé : analyseur résolu ici, sur le thread du script (st.cache_resource),
+        # puis confié au thread de l'aperçu
+        if st.session_state.get('q1_live_preview'):
+            st.session_state.q1_preview_analyzer = load_semantic_analyzer()
         
         if 'app.questionnaire' in sys.modules:
             importlib.reload(sys.modules['app.questionnaire'])
@@ -431,6 +482,16 @@ def analysis_page():
     progress_bar = st.progress(0)
     status_text = st.empty()
     
+    # Jeton de l'analyse : annulé si l'utilisateur quitte la page ou recommence,
+    # et échéance globale (SBERT + OpenAI)
+    from app import config
+    from app.admission import Overloaded
+    from app.cancellation import AnalysisCancelled, CancellationToken
+    cancel_running_analysis("analyse relancée")
+    token = CancellationToken(config.ANALYSIS_DEADLINE_S)
+    st.session_state.analysis_token = token
+    ticket = None
+    
     try:
         # IMPORTS POUR MASQUER LES PRINTS
         import sys
@@ -442,36 +503,70 @@ def analysis_page():
         # UTILISER LE CACHE STREAMLIT
         analyzer = load_semantic_analyzer()
         
+        # Forte affluence : au plus ADMISSION_MAX_ACTIVE analyses à la fois,
+        # les suivantes attendent leur tour (position et attente estimée affichées)
+        def show_queue(ticket):
+            eta = ticket.eta_s
+            wait_text = f" (attente estimée : ~{eta:.0f} s)" if eta is not None else ""
+            status_text.text(f"⏳ Forte affluence : position {ticket.position} dans la file{wait_text}")
+        
+        ticket = load_admission_controller().admit(token, on_wait=show_queue)
+        
+        # Encodages spéculatifs encore en cours : les attendre plutôt que les refaire
+        speculative = st.session_state.get('speculative_encoder')
+        if speculative is not None:
+            speculative.wait()
+        
         status_text.text("🧠 Analyse sémantique des textes libres...")
-        progress_bar.progress(30)
+        progress_bar.progress(15)
         
         # CAPTURER LES PRINTS DE L'ANALYSE
         old_stdout = sys.stdout
         sys.stdout = io.StringIO()
         
+        # Analyse par étapes : progression réelle et scores des blocs affichés dès qu'ils sont prêts
+        from app import analysis_events
+        partial_scores = st.empty()
+        bloc_scores = {}
+        
         try:
-            analyzer.analyze_user_responses(st.session_state.responses)
-            
-            status_text.text("📊 Calcul des scores par bloc...")
-            progress_bar.progress(50)
+            for event in analyzer.iter_analysis(st.session_state.responses, cancel_token=token):
+                progress_bar.progress(15 + int(event.progress * 50))
+                
+                if event.kind == analysis_events.SIMILARITY:
+                    status_text.text("📊 Calcul des scores par bloc...")
+                elif event.kind == analysis_events.BLOCK:
+                    bloc_id = event.data['bloc_id']
+                    bloc_scores[bloc_id] = event.data['result']['score']
+                    with partial_scores.container():
+                        columns = st.columns(5)
+                        for column, (done_id, score) in zip(columns, sorted(bloc_scores.items())):
+                            column.metric(analyzer.block_to_domain[done_id], f"{score:.0%}")
+                elif event.kind == analysis_events.COVERAGE:
+                    status_text.text("💼 Recommandation des métiers...")
             
             results = analyzer.get_results_summary()
         finally:
             sys.stdout = old_stdout
         
+        partial_scores.empty()
+        
         status_text.text("🤖 Génération du plan de progression avec OpenAI...")
         progress_bar.progress(70)
         
         from app import openai_helper
-        progression_plan = openai_helper.generate_progression_plan(results)
+        progression_plan = openai_helper.generate_progression_plan(results, cancel_token=token)
         results['progression_plan'] = progression_plan
         
         status_text.text("📝 Génération de la bio professionnelle avec OpenAI...")
         progress_bar.progress(85)
         
-        professional_bio = openai_helper.generate_professional_bio(results)
+        professional_bio = openai_helper.generate_professional_bio(results, cancel_token=token)
         results['professional_bio'] = professional_bio
         
+        # Créneau rendu dès la fin du calcul (pas pendant l'affichage)
+        ticket.release()
+        
         status_text.text("✅ Analyse terminée !")
         progress_bar.progress(100)
         
@@ -517,6 +612,20 @@ def analysis_page():
                 st.session_state.page = 'results'
                 st.rerun()
     
+    except Overloaded as e:
+        retry_text = f" dans ~{e.retry_after:.0f} s" if e.retry_after else " dans quelques instants"
+        st.warning(f"🚦 Trop d'analyses en attente : réessayez{retry_text}.")
+        
+        if st.button("🔄 Réessayer"):
+            st.rerun()
+    
+    except AnalysisCancelled as e:
+        st.warning(f"⏹️ Analyse interrompue : {e}")
+        
+        if st.button("🔙 Retour au questionnaire"):
+            st.session_state.page = 'questionnaire'
+            st.rerun()
+    
     except Exception as e:
         st.error(f"❌ Erreur lors de l'analyse : {str(e)}")
         st.exception(e)
@@ -524,6 +633,13 @@ def analysis_page():
         if st.button("🔙 Retour au questionnaire"):
             st.session_state.page = 'questionnaire'
             st.rerun()
+    
+    finally:
+        # Script interrompu par Streamlit (navigation, « Recommencer ») ou analyse
+        # terminée : le travail encore rattaché au jeton s'arrête
+        token.cancel("page quittée")
+        if ticket is not None:
+            ticket.release()
 
 
 def results_page():
@@ -548,6 +664,10 @@ def main():
     init_session_state()
     sidebar_navigation()
     
+    # Page d'analyse quittée : le travail d'une analyse encore en cours est abandonné
+    if st.session_state.page != 'analysis':
+        cancel_running_analysis()
+    
     if st.session_state.page == 'welcome':
         welcome_page()
     elif st.session_state.page == 'questionnaire':
@@ -5,13 +5,15 @@ VERSION OpenAI v1.0+ - SANS FALLBACK
 Respect strict des consignes : Cache + 1 appel/plan + 1 appel/bio
 """
 
-from openai import OpenAI  # ✅ NOUVELLE SYNTAXE
+from openai import APITimeoutError, OpenAI  # ✅ NOUVELLE SYNTAXE
 import json
 import os
 from datetime import datetime
-from typing import Dict
+from typing import Dict, List
 from dotenv import load_dotenv
 
+from app.cancellation import AnalysisCancelled, CancellationToken, DeadlineExceeded
+
 # Charger la clé API depuis .env
 load_dotenv()
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
@@ -84,7 +86,58 @@ def generate_cache_key(request_type: str, profile_data: Dict) -> str:
         return f"{request_type}_default"
 
 
-def generate_progression_plan(analysis_results: Dict) -> str:
+def _chat_completion(messages: List[Dict], max_tokens: int, cancel_token: CancellationToken = None) -> str:
+    """
+    Appel chat.completions (un seul appel par génération)
+    
+    Avec un jeton d'annulation, la réponse est lue en streaming : le jeton est
+    vérifié à chaque fragment reçu et la connexion fermée dès l'abandon, ce qui
+    arrête la génération côté OpenAI. L'échéance du jeton borne aussi l'appel.
+    
+    Raises:
+        AnalysisCancelled: Jeton annulé ou échéance dépassée
+    """
+    if cancel_token is None:
+        response = client.chat.completions.create(
+            model=OPENAI_MODEL,
+            messages=messages,
+            temperature=0.7,
+            max_tokens=max_tokens
+        )
+        return response.choices[0].message.content
+    
+    cancel_token.check()
+    api = client
+    if cancel_token.remaining() is not None:
+        # Une nouvelle tentative du client dépasserait l'échéance
+        api = client.with_options(timeout=cancel_token.remaining(), max_retries=0)
+    parts = []
+    try:
+        stream = api.chat.completions.create(
+            model=OPENAI_MODEL,
+            messages=messages,
+            temperature=0.7,
+            max_tokens=max_tokens,
+            stream=True
+        )
+        try:
+            for chunk in stream:
+                cancel_token.check()
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+        finally:
+            stream.close()
+    except AnalysisCancelled:
+        raise
+    except Exception as e:
+        # Délai dépassé côté client OpenAI : c'est l'échéance du jeton
+        if cancel_token.expired or (isinstance(e, APITimeoutError) and cancel_token.deadline is not None):
+            raise DeadlineExceeded("échéance de l'analyse dépassée") from e
+        raise
+    return ''.join(parts)
+
+
+def generate_progression_plan(analysis_results: Dict, cancel_token: CancellationToken = None) -> str:
     """
     Générer un plan de progression personnalisé avec CACHE
     UN SEUL APPEL API par profil unique
@@ -92,6 +145,7 @@ def generate_progression_plan(analysis_results: Dict) -> str:
     
     Args:
         analysis_results: Résultats de l'analyse SBERT
+        cancel_token: Jeton d'annulation (rien n'est mis en cache si l'appel est abandonné)
         
     Returns:
         Plan de progression (str)
@@ -158,18 +212,15 @@ def generate_progression_plan(analysis_results: Dict) -> str:
     prompt += "Réponds en français, style professionnel."
     
     # ✅ APPEL API OPENAI (NOUVELLE SYNTAXE)
-    response = client.chat.completions.create(
-        model=OPENAI_MODEL,
-        messages=[
+    plan = _chat_completion(
+        [
             {"role": "system", "content": "Tu es un expert en formation Data Science et IA."},
             {"role": "user", "content": prompt}
         ],
-        temperature=0.7,
-        max_tokens=1000
+        max_tokens=1000,
+        cancel_token=cancel_token
     )
     
-    plan = response.choices[0].message.content
-    
     # Sauvegarder dans le cache
     cache[cache_key] = {
         'query': prompt,
@@ -188,7 +239,7 @@ def generate_progression_plan(analysis_results: Dict) -> str:
     return plan
 
 
-def generate_professional_bio(analysis_results: Dict) -> str:
+def generate_professional_bio(analysis_results: Dict, cancel_token: CancellationToken = None) -> str:
     """
     Générer une bio professionnelle style Executive Summary avec CACHE
     UN SEUL APPEL API par profil unique
@@ -196,6 +247,7 @@ def generate_professional_bio(analysis_results: Dict) -> str:
     
     Args:
         analysis_results: Résultats de l'analyse SBERT
+        cancel_token: Jeton d'annulation (rien n'est mis en cache si l'appel est abandonné)
         
     Returns:
         Bio professionnelle (str)
@@ -268,18 +320,15 @@ def generate_professional_bio(analysis_results: Dict) -> str:
     prompt += "Réponds en français, sans titre, 2 paragraphes bien structurés."
     
     # ✅ APPEL API OPENAI (CORRECTION ICI)
-    response = client.chat.completions.create(
-        model=OPENAI_MODEL,
-        messages=[
+    bio = _chat_completion(
+        [
             {"role": "system", "content": "Tu es un expert en rédaction de profils professionnels."},
             {"role": "user", "content": prompt}  # ✅ SANS GUILLEMETS sur prompt
         ],
-        temperature=0.7,
-        max_tokens=500
+        max_tokens=500,
+        cancel_token=cancel_token
     )
     
-    bio = response.choices[0].message.content
-    
     # Sauvegarder dans le cache
     cache[cache_key] = {
         'query': prompt,
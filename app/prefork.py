@@ -0,0 +1,346 @@
+"""
+AISCA - Lanceur Pre-fork (modèle et catalogue partagés entre workers)
+Le processus parent charge une seule fois le modèle SBERT et le catalogue
+(embeddings, index), fige ces objets puis forke N workers. Les pages mémoire
+sont partagées en copie-sur-écriture : N workers ne coûtent pas N fois le modèle.
+
+Préparation avant le fork :
+- poids du modèle sans gradient et placés en mémoire partagée (PyTorch)
+- PyTorch limité à un thread dans le parent : un pool OpenMP démarré avant le
+  fork n'existe plus dans les workers et bloque leur premier encodage parallèle.
+  Threads, préchauffage et calibrage du batch sont alors faits dans chaque worker
+- tableaux du catalogue contigus et en lecture seule (aucune écriture ne casse le partage)
+- gc.freeze() : le ramasse-miettes ne touche plus les objets du parent
+
+Usage :
+    python -m app.prefork streamlit --workers 3 --base-port 8501
+    python -m app.prefork http --workers 4 --port 8600    (service de scoring, port partagé)
+
+La mémoire de chaque worker (RSS, PSS, partagée, privée) est lue dans
+/proc/<pid>/smaps_rollup et affichée périodiquement (--report-interval).
+"""
+
+import argparse
+import gc
+import os
+import signal
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+
+# Permettre l'exécution directe (python app/prefork.py)
+sys.path.append(str(Path(__file__).parent.parent))
+
+
+# Analyseur chargé par le parent, hérité par chaque worker
+_preloaded_analyzer = None
+
+# Réglages appliqués dans chaque worker après le fork (voir _init_worker)
+_worker_settings = {}
+
+# Champs de smaps_rollup rapportés (en Ko)
+MEMORY_FIELDS = ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty')
+
+
+def get_preloaded_analyzer():
+    """Analyseur hérité du processus parent (None hors du mode pre-fork)"""
+    return _preloaded_analyzer
+
+
+def _seal_catalog(catalog):
+    """Passer les tableaux du catalogue en lecture seule"""
+    arrays = [catalog.competency_block_ids, *catalog.block_indices.values()]
+    if catalog.competency_embeddings is not None:
+        arrays += [catalog.competency_embeddings.data, catalog.competency_embeddings.scales]
+    if catalog.ann_index is not None:
+        arrays += [
+            catalog.ann_index.centroids,
+            catalog.ann_index.list_ids,
+            catalog.ann_index.list_offsets,
+            catalog.ann_index.block_ids
+        ]
+    if catalog.projection is not None:
+        arrays.append(catalog.projection.components)
+    for array in arrays:
+        if isinstance(array, np.ndarray):
+            array.setflags(write=False)
+
+
+def preload(**analyzer_kwargs):
+    """
+    Charger l'analyseur dans le parent et le préparer au partage
+
+    Args:
+        analyzer_kwargs: Arguments de SemanticAnalyzer
+
+    Returns:
+        L'analyseur préchargé
+    """
+    global _preloaded_analyzer
+
+    from app import config
+    from app.inference_resources import InferenceResources
+    from app.semantic_analysis import SemanticAnalyzer
+
+    # Le watcher du catalogue est démarré dans chaque worker (ses threads ne survivent pas au fork)
+    analyzer_kwargs.setdefault('watch_catalog', False)
+    # Préchauffé avant le fork : les workers héritent d'un modèle déjà initialisé (sauf torch)
+    warmup = analyzer_kwargs.pop('warmup', 'sync')
+
+    encoder = analyzer_kwargs.get('encoder')
+    if encoder is not None:
+        backend = getattr(encoder, 'backend', None)
+    else:
+        backend = analyzer_kwargs.get('encoder_backend', config.ENCODER_BACKEND)
+
+    resources = analyzer_kwargs.get('inference_resources')
+    requested_threads = resources.intra_op_threads if resources is not None else config.ENCODER_INTRA_OP_THREADS
+    _worker_settings.clear()
+    _worker_settings['intra_op_threads'] = requested_threads
+    if backend == 'torch':
+        # Encodages du parent (catalogue) sur un seul thread : aucun pool OpenMP avant le fork ;
+        # le préchauffage, qui mesure le débit avec les threads définitifs, passe dans les workers
+        if resources is None:
+            resources = analyzer_kwargs['inference_resources'] = InferenceResources()
+        resources.intra_op_threads = 1
+        _worker_settings['warmup'] = warmup
+        warmup = 'none'
+    analyzer = SemanticAnalyzer(warmup=warmup, **analyzer_kwargs)
+
+    prepare = getattr(analyzer.model, 'prepare_for_fork', None)
+    if prepare is not None:
+        prepare()
+    _seal_catalog(analyzer.catalog)
+
+    # Objets du parent déplacés hors des générations suivies par le GC
+    gc.collect()
+    gc.freeze()
+
+    _preloaded_analyzer = analyzer
+    return analyzer
+
+
+def _init_worker(worker_index: int, workers: int, watch_catalog: bool):
+    """Remettre en état, dans le worker, ce qui ne survit pas au fork"""
+    analyzer = _preloaded_analyzer
+    if analyzer.encoding_service is not None:
+        analyzer.encoding_service.reset_after_fork()
+    if watch_catalog:
+        from app import config
+        from app.catalog import CatalogWatcher
+        analyzer.catalog_watcher = CatalogWatcher(analyzer, interval=config.CATALOG_WATCH_INTERVAL_S).start()
+
+    # Cœurs répartis entre les workers (et entre les appels simultanés de chacun)
+    from app.inference_resources import default_intra_op_threads
+    resources = analyzer.resources
+    resources.intra_op_threads = (
+        _worker_settings.get('intra_op_threads')
+        or default_intra_op_threads(workers * resources.max_concurrent)
+    )
+    resources.configure(analyzer.model)
+
+    # Préchauffage différé (backend torch), avec les threads du worker
+    warmup = _worker_settings.get('warmup', 'none')
+    if warmup != 'none':
+        analyzer.ready.clear()
+        if warmup == 'sync':
+            analyzer._warmup()
+        else:
+            threading.Thread(target=analyzer._warmup, name='aisca-warmup', daemon=True).start()
+
+
+def memory_usage(pid: int) -> Dict[str, int]:
+    """
+    Mémoire d'un processus en Ko (Linux)
+
+    Le PSS répartit chaque page partagée entre les processus qui la partagent :
+    la somme des PSS est la mémoire réellement consommée par le groupe.
+    """
+    usage = {}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup', 'r') as f:
+            for line in f:
+                name, _, value = line.partition(':')
+                if name in MEMORY_FIELDS:
+                    usage[name] = int(value.split()[0])
+    except OSError:
+        # Noyau sans smaps_rollup : RSS seul
+        with open(f'/proc/{pid}/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    usage['Rss'] = int(line.split()[1])
+    return usage
+
+
+def memory_report(pids: Dict[str, int]) -> str:
+    """
+    Tableau mémoire (Mo) des processus
+
+    Args:
+        pids: Nom affiché → pid
+    """
+    lines = [f"{'processus':<12}{'RSS':>10}{'PSS':>10}{'partagé':>10}{'privé':>10}"]
+    totals = {'Rss': 0, 'Pss': 0}
+    for name, pid in pids.items():
+        try:
+            usage = memory_usage(pid)
+        except OSError:
+            continue
+        shared = usage.get('Shared_Clean', 0) + usage.get('Shared_Dirty', 0)
+        private = usage.get('Private_Clean', 0) + usage.get('Private_Dirty', 0)
+        totals['Rss'] += usage.get('Rss', 0)
+        totals['Pss'] += usage.get('Pss', 0)
+        lines.append(
+            f"{name:<12}{usage.get('Rss', 0) / 1024:>10.1f}{usage.get('Pss', 0) / 1024:>10.1f}"
+            f"{shared / 1024:>10.1f}{private / 1024:>10.1f}"
+        )
+    lines.append(f"{'total':<12}{totals['Rss'] / 1024:>10.1f}{totals['Pss'] / 1024:>10.1f}")
+    return '\n'.join(lines)
+
+
+def launch(
+    target: Callable[[int], None],
+    workers: int,
+    watch_catalog: bool = False,
+    report_interval: float = 0,
+    respawn: bool = True
+) -> Dict[int, int]:
+    """
+    Forker les workers et les superviser jusqu'à leur fin
+
+    Args:
+        target: Fonction exécutée par chaque worker (reçoit son numéro)
+        workers: Nombre de workers
+        watch_catalog: Démarrer le rechargement à chaud du catalogue dans chaque worker
+        report_interval: Période d'affichage de la mémoire (secondes, 0 = jamais)
+        respawn: Relancer un worker terminé anormalement
+
+    Returns:
+        Code de sortie de chaque worker (numéro → code)
+    """
+    if _preloaded_analyzer is None:
+        raise RuntimeError("❌ Aucun analyseur préchargé : appeler preload() avant launch()")
+
+    children = {}
+    exit_codes = {}
+    stopping = False
+
+    def spawn(index: int):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                signal.signal(signal.SIGINT, signal.SIG_DFL)
+                _init_worker(index, workers, watch_catalog)
+                target(index)
+            except SystemExit as e:
+                code = e.code if isinstance(e.code, int) else 1
+            except BaseException as e:
+                print(f"❌ Worker {index} : {type(e).__name__}: {e}", file=sys.stderr)
+                code = 1
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(code)
+        children[pid] = index
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    previous_handlers = {sig: signal.signal(sig, stop) for sig in (signal.SIGTERM, signal.SIGINT)}
+    try:
+        for index in range(workers):
+            spawn(index)
+        print(f"🚀 {workers} worker(s) forké(s) depuis le processus {os.getpid()}")
+
+        next_report = time.monotonic() + report_interval
+        while children:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                if report_interval and time.monotonic() >= next_report:
+                    names = {'parent': os.getpid()}
+                    names.update({f'worker {index}': child for child, index in children.items()})
+                    print(memory_report(names))
+                    next_report = time.monotonic() + report_interval
+                time.sleep(0.2)
+                continue
+
+            index = children.pop(pid)
+            code = os.waitstatus_to_exitcode(status)
+            exit_codes[index] = code
+            if code != 0 and respawn and not stopping:
+                print(f"⚠️ Worker {index} terminé (code {code}) : relance")
+                spawn(index)
+    finally:
+        for sig, handler in previous_handlers.items():
+            signal.signal(sig, handler)
+
+    return exit_codes
+
+
+def _streamlit_worker(base_port: int) -> Callable[[int], None]:
+    """Worker Streamlit : un serveur par port (base_port + numéro)"""
+    def run(index: int):
+        from streamlit.web import cli as streamlit_cli
+
+        main_script = str(Path(__file__).parent / 'main.py')
+        sys.argv = [
+            'streamlit', 'run', main_script,
+            '--server.port', str(base_port + index),
+            '--server.headless', 'true'
+        ]
+        streamlit_cli.main()
+    return run
+
+
+def _http_worker(host: str, port: int) -> Callable[[int], None]:
+    """
+    Worker HTTP (app/api_server.py) : le socket d'écoute est ouvert par le parent,
+    tous les workers acceptent les connexions sur le même port
+    """
+    from app.api_server import ScoringHTTPServer, ScoringService
+
+    server = ScoringHTTPServer((host, port))
+
+    def run(index: int):
+        server.service = ScoringService(analyzer=get_preloaded_analyzer()).start()
+        server.serve_forever()
+    return run
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Lancer des workers AISCA partageant modèle et catalogue")
+    parser.add_argument('mode', choices=['streamlit', 'http'], help="Type de worker")
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--base-port', type=int, default=8501, help="Streamlit : port du premier worker")
+    parser.add_argument('--host', default=None, help="HTTP : adresse d'écoute (défaut : AISCA_API_HOST)")
+    parser.add_argument('--port', type=int, default=None, help="HTTP : port partagé (défaut : AISCA_API_PORT)")
+    parser.add_argument('--report-interval', type=float, default=60, help="Secondes entre deux rapports mémoire (0 = jamais)")
+    parser.add_argument('--watch-catalog', action='store_true', help="Recharger le catalogue à chaud dans chaque worker")
+    args = parser.parse_args(argv)
+
+    preload()
+    if args.mode == 'http':
+        from app import config
+        target = _http_worker(args.host or config.API_HOST, args.port or config.API_PORT)
+    else:
+        target = _streamlit_worker(args.base_port)
+    launch(target, args.workers, watch_catalog=args.watch_catalog, report_interval=args.report_interval)
+
+
+if __name__ == "__main__":
+    # Exécuter dans le module importable app.prefork (et non __main__) :
+    # l'analyseur préchargé y est retrouvé par get_preloaded_analyzer()
+    from app import prefork
+    prefork.main()
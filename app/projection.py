@@ -0,0 +1,184 @@
+"""
+AISCA - Projection des Embeddings en Dimension Réduite
+Les vecteurs MiniLM (384 dimensions) sont projetés sur les d directions
+principales du catalogue (d = 64 à 128). Catalogue et textes utilisateur passent
+par la même projection : mémoire et coût des similarités baissent d'un facteur 384/d.
+
+La projection n'est pas centrée et les vecteurs ne sont pas renormalisés :
+le produit scalaire projeté approche directement la similarité cosinus d'origine,
+les seuils du scoring (0.3) gardent donc leur sens.
+
+Benchmark (accord du top-k, écarts des scores de blocs) :
+    python -m app.projection --dims 64 96 128
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+# Permettre l'exécution directe (python app/projection.py)
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.catalog_artifact import load_npz, save_npz
+from app.embedding_store import top_k_indices
+
+
+class Projection:
+    """
+    Projection linéaire (dim → out_dim) apprise sur le catalogue
+    """
+
+    def __init__(self, components: np.ndarray):
+        """
+        Args:
+            components: Matrice (dim, out_dim) des directions principales
+        """
+        self.components = np.ascontiguousarray(components, dtype=np.float32)
+
+    @property
+    def input_dim(self) -> int:
+        return self.components.shape[0]
+
+    @property
+    def output_dim(self) -> int:
+        return self.components.shape[1]
+
+    @classmethod
+    def fit(cls, matrix: np.ndarray, out_dim: int) -> 'Projection':
+        """
+        Apprendre les out_dim directions qui conservent le mieux les produits scalaires
+
+        Args:
+            matrix: Embeddings normalisés du catalogue (N, dim)
+            out_dim: Dimension cible (strictement inférieure à dim)
+        """
+        matrix = np.asarray(matrix, dtype=np.float32)
+        if not 0 < out_dim < matrix.shape[1]:
+            raise ValueError(f"❌ Dimension de projection invalide : {out_dim} (entrée : {matrix.shape[1]})")
+
+        # Décomposition de la matrice de Gram (dim × dim) : indépendante de N
+        gram = matrix.T.astype(np.float64) @ matrix
+        _, eigenvectors = np.linalg.eigh(gram)
+        return cls(eigenvectors[:, ::-1][:, :out_dim])
+
+    def explained_ratio(self, matrix: np.ndarray) -> float:
+        """Part de l'énergie du catalogue conservée par la projection"""
+        matrix = np.asarray(matrix, dtype=np.float32)
+        return float(np.square(matrix @ self.components).sum() / np.square(matrix).sum())
+
+    def transform(self, vectors: np.ndarray) -> np.ndarray:
+        """Projeter des vecteurs (n, dim) → (n, out_dim)"""
+        return np.atleast_2d(np.asarray(vectors, dtype=np.float32)) @ self.components
+
+    def save(self, path: str, manifest: Dict):
+        save_npz(path, {'components': self.components}, manifest)
+
+    @classmethod
+    def load(cls, path: str, manifest: Dict, ignore_keys=()):
+        """
+        Returns:
+            La projection, ou None si elle a été apprise sur un autre catalogue
+        """
+        data = load_npz(path, manifest, ignore_keys)
+        return cls(data['components']) if data is not None else None
+
+
+def _block_scores(similarities: np.ndarray, block_ids: np.ndarray, k: int = 5) -> np.ndarray:
+    """Moyenne des k meilleures similarités de chaque bloc, pour chaque requête (Q, blocs)"""
+    scores = []
+    for bloc_id in np.unique(block_ids):
+        block_sims = similarities[:, block_ids == bloc_id]
+        kk = min(k, block_sims.shape[1])
+        scores.append(np.partition(block_sims, block_sims.shape[1] - kk, axis=1)[:, -kk:].mean(axis=1))
+    return np.stack(scores, axis=1)
+
+
+def projection_report(
+    matrix: np.ndarray,
+    block_ids: np.ndarray,
+    queries: np.ndarray,
+    dims=(64, 96, 128),
+    k: int = 10,
+    query_ids: np.ndarray = None
+) -> Dict[str, Dict]:
+    """
+    Comparer chaque dimension de projection à la dimension complète
+
+    Args:
+        matrix: Embeddings normalisés du catalogue (N, dim)
+        block_ids: BlockID de chaque compétence
+        queries: Requêtes normalisées (Q, dim)
+        dims: Dimensions cibles évaluées
+        k: Taille du top-k comparé
+        query_ids: Ligne du catalogue dont chaque requête est issue (exclue des
+                   deux classements ; None : requêtes externes)
+
+    Returns:
+        Par dimension : mémoire relative, énergie conservée, accord du top-k,
+        écarts des similarités et des scores de blocs (moyenne des 5 meilleures)
+    """
+    ref_sims = queries @ matrix.T
+    k = min(k, ref_sims.shape[1] - (query_ids is not None))
+    ref_top = top_k_indices(ref_sims, k, query_ids)
+    ref_blocks = _block_scores(ref_sims, block_ids)
+
+    report = {}
+    for dim in dims:
+        if dim >= matrix.shape[1]:
+            continue
+        projection = Projection.fit(matrix, dim)
+        sims = projection.transform(queries) @ projection.transform(matrix).T
+        top = top_k_indices(sims, k, query_ids)
+        overlap = [len(set(a) & set(b)) / k for a, b in zip(ref_top, top)]
+        block_errors = np.abs(_block_scores(sims, block_ids) - ref_blocks)
+        report[str(dim)] = {
+            'memory_ratio': dim / matrix.shape[1],
+            'explained_ratio': projection.explained_ratio(matrix),
+            f'top{k}_agreement': float(np.mean(overlap)),
+            'max_abs_similarity_error': float(np.abs(sims - ref_sims).max()),
+            'mean_abs_block_score_error': float(block_errors.mean()),
+            'max_abs_block_score_error': float(block_errors.max())
+        }
+    return report
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Qualité de la projection en dimension réduite")
+    parser.add_argument('--backend', default=None, help="Backend d'encodage (défaut : AISCA_ENCODER_BACKEND)")
+    parser.add_argument('--dims', type=int, nargs='+', default=[64, 96, 128])
+    parser.add_argument('--k', type=int, default=10, help="Taille du top-k comparé")
+    args = parser.parse_args(argv)
+
+    from app import config
+    from app.semantic_analysis import SemanticAnalyzer
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        analyzer = SemanticAnalyzer(
+            use_result_cache=False,
+            use_micro_batching=False,
+            encoder_backend=args.backend or config.ENCODER_BACKEND,
+            embedding_storage='float32',
+            ann_index='none',
+            projection_dim=0
+        )
+
+    # Requêtes : les textes du catalogue eux-mêmes (proches de vraies réponses),
+    # chacun exclu de son propre classement
+    matrix = analyzer.competency_embeddings.to_float32()
+    report = projection_report(
+        matrix, analyzer.competency_block_ids, matrix,
+        dims=args.dims, k=args.k, query_ids=np.arange(len(matrix))
+    )
+
+    print(f"📊 Projection sur {len(matrix)} compétences ({analyzer.model_id}, {matrix.shape[1]} dimensions)")
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
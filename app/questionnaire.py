@@ -5,6 +5,7 @@ Projet Master Expert en Ingénierie de Données
 """
 
 import streamlit as st
+import copy
 import json
 from datetime import datetime
 
@@ -211,6 +212,44 @@ def init_session_state():
         st.session_state.questionnaire_completed = False
 
 
+def speculate(field, texts):
+    """
+    Encoder en arrière-plan un texte libre validé (voir app/speculative.py) :
+    l'analyse finale trouvera ses embeddings déjà en cache
+    """
+    speculative = st.session_state.get('speculative_encoder')
+    if speculative is not None:
+        # Copie figée des textes : l'exécuteur ne lit rien de l'état de session
+        speculative.submit(field, tuple(str(text) for text in texts))
+
+
+@st.fragment(run_every=0.5)
+def live_preview_panel():
+    """Aperçu provisoire de Q1, rafraîchi sans relancer toute la page"""
+    preview = st.session_state.get('q1_preview')
+    if preview is None:
+        return
+    if preview.error:
+        st.caption(f"⚠️ Aperçu indisponible : {preview.error}")
+        return
+    result = preview.result
+    if result is None:
+        st.caption("⏳ Calcul de l'aperçu...")
+        return
+    
+    status = "⏳ mise à jour..." if preview.pending else f"{result['elapsed_ms']:.0f} ms"
+    st.caption(f"👁️ Aperçu provisoire ({status}) — les questions suivantes affineront ces scores")
+    
+    columns = st.columns(5)
+    for column, (bloc_id, bloc) in zip(columns, sorted(result['block_scores'].items())):
+        column.metric(bloc['name'], f"{bloc['score']:.0%}")
+    
+    if result['top_competencies']:
+        st.markdown("**Compétences détectées :** " + " · ".join(
+            competency['competency_name'] for competency in result['top_competencies']
+        ))
+
+
 def display_progress():
     """Afficher la progression"""
     progress = (st.session_state.current_question - 1) / 5
@@ -249,6 +288,25 @@ et j'ai des bases solides en statistiques (tests d'hypothèses, régression)..."
     
     st.session_state.responses['q1_parcours'] = parcours
     
+    # Texte validé (sortie du champ) : encodage spéculatif pendant les questions suivantes
+    speculate('q1', [parcours])
+    
+    # Aperçu en direct : compétences détectées et scores provisoires, mis à jour
+    # à chaque validation du texte (Ctrl+Entrée ou sortie du champ)
+    preview = st.session_state.get('q1_preview')
+    if preview is not None and st.toggle("👁️ Aperçu en direct de mes compétences", key='q1_live_preview'):
+        if parcours.strip():
+            # Copie des réponses et analyseur résolu sur le thread du script :
+            # le thread de l'aperçu ne touche ni à l'état de session ni à st.cache_resource
+            preview.request(
+                parcours,
+                copy.deepcopy(st.session_state.responses),
+                st.session_state.get('q1_preview_analyzer')
+            )
+            live_preview_panel()
+        else:
+            st.caption("✍️ Commencez à décrire votre parcours (Ctrl+Entrée pour actualiser l'aperçu)")
+    
     st.markdown('</div>', unsafe_allow_html=True)
 
 
@@ -481,6 +539,8 @@ def question_5():
                     ✅ {word_count} mots
                 </div>
             """, unsafe_allow_html=True)
+            # Texte retenu pour l'analyse : encodé en arrière-plan
+            speculate(f'q5:{domain}', [experience_text])
         
         st.markdown("<br>", unsafe_allow_html=True)
     
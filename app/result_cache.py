@@ -0,0 +1,207 @@
+"""
+AISCA - Cache des Résultats d'Analyse
+Cache adressé par contenu : mêmes réponses + même catalogue + même modèle
+=> même résultat, sans ré-encoder ni recalculer les scores.
+Deux niveaux : mémoire (LRU) puis disque (un fichier JSON par clé).
+Le disque est borné : au-delà de max_files fichiers, les plus anciennement
+utilisés (date de modification) sont supprimés.
+"""
+
+import copy
+import hashlib
+import json
+import os
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+def _normalize_value(value):
+    """
+    Normaliser récursivement une valeur de réponse pour le hachage
+
+    - Textes : normalisation Unicode NFC (accents composés / décomposés)
+    - Listes : triées (l'ordre de sélection n'influence pas les scores)
+    - Dictionnaires : clés normalisées (triées par json.dumps)
+    """
+    if isinstance(value, str):
+        return unicodedata.normalize('NFC', value)
+    if isinstance(value, dict):
+        return {
+            _normalize_value(str(key)): _normalize_value(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple, set)):
+        items = [_normalize_value(item) for item in value]
+        return sorted(items, key=lambda item: json.dumps(item, sort_keys=True, ensure_ascii=False))
+    return value
+
+
+def make_result_key(responses: Dict, signature: Dict) -> str:
+    """
+    Calculer la clé canonique d'une analyse
+
+    Args:
+        responses: Réponses du questionnaire
+        signature: Versions qui influencent le résultat (modèle, catalogue, moteur...)
+
+    Returns:
+        Empreinte SHA-256 hexadécimale
+    """
+    payload = {
+        'responses': _normalize_value(responses),
+        'signature': _normalize_value(signature)
+    }
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """
+    Cache LRU en mémoire adossé à un stockage disque
+    Les entrées sont des résumés de résultats sérialisables en JSON
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = 'data/cache/results',
+        max_entries: int = 256,
+        persist: bool = True,
+        max_files: int = 10000
+    ):
+        """
+        Args:
+            cache_dir: Répertoire des fichiers JSON du cache disque
+            max_entries: Nombre maximum d'entrées gardées en mémoire
+            persist: Activer le niveau disque
+            max_files: Nombre maximum de fichiers gardés sur disque (0 : illimité)
+        """
+        self.cache_dir = cache_dir
+        self.max_entries = max(1, max_entries)
+        self.persist = persist
+        self.max_files = max(0, max_files)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evicted_files = 0
+
+        # Fichiers sur disque (estimation, recalculée à chaque éviction)
+        self._disk_files = 0
+        if self.persist:
+            self.prune()
+
+    def _path_for(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _remember(self, key: str, results: Dict):
+        """Insérer en mémoire en évinçant l'entrée la moins récemment utilisée"""
+        self._memory[key] = results
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Récupérer un résultat (copie indépendante) ou None si absent
+        """
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(self._memory[key])
+
+        results = None
+        if self.persist and os.path.exists(self._path_for(key)):
+            try:
+                with open(self._path_for(key), 'r', encoding='utf-8') as f:
+                    results = json.load(f)
+                # Fichier relu : il redevient le plus récent pour l'éviction
+                os.utime(self._path_for(key))
+            except Exception as e:
+                print(f"⚠️ Erreur lecture cache résultats : {e}")
+                results = None
+
+        with self._lock:
+            if results is None:
+                self.misses += 1
+                return None
+            self._remember(key, results)
+            self.hits += 1
+            return copy.deepcopy(results)
+
+    def put(self, key: str, results: Dict):
+        """
+        Enregistrer un résultat (doit être sérialisable en JSON)
+        """
+        results = copy.deepcopy(results)
+        with self._lock:
+            self._remember(key, results)
+
+        if not self.persist:
+            return
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{self._path_for(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(results, f, ensure_ascii=False)
+            # Remplacement atomique : jamais de fichier à moitié écrit
+            os.replace(tmp_path, self._path_for(key))
+        except Exception as e:
+            print(f"⚠️ Erreur sauvegarde cache résultats : {e}")
+            return
+
+        with self._lock:
+            self._disk_files += 1
+            over_limit = self.max_files and self._disk_files > self.max_files
+        if over_limit:
+            self.prune()
+
+    def prune(self) -> int:
+        """
+        Ramener le cache disque sous max_files en supprimant les fichiers les plus anciens
+
+        Returns:
+            Nombre de fichiers supprimés
+        """
+        if not os.path.isdir(self.cache_dir):
+            return 0
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith('.json'):
+                continue
+            try:
+                entries.append((entry.stat().st_mtime, entry.path))
+            except FileNotFoundError:
+                continue
+
+        removed = 0
+        if self.max_files and len(entries) > self.max_files:
+            entries.sort()
+            # Marge de 10 % : pas d'éviction à chaque nouvelle écriture
+            keep = self.max_files - self.max_files // 10
+            for _, path in entries[:len(entries) - keep]:
+                try:
+                    os.remove(path)
+                    removed += 1
+                except FileNotFoundError:
+                    continue
+
+        with self._lock:
+            self._disk_files = len(entries) - removed
+            self.evicted_files += removed
+        return removed
+
+    def clear(self):
+        """Vider la mémoire et le disque"""
+        with self._lock:
+            self._memory.clear()
+        if self.persist and os.path.isdir(self.cache_dir):
+            for filename in os.listdir(self.cache_dir):
+                if filename.endswith('.json'):
+                    os.remove(os.path.join(self.cache_dir, filename))
+
+    def __len__(self) -> int:
+        return len(self._memory)
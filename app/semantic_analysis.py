@@ -5,14 +5,60 @@ VERSION FIXÉE : Score des outils calculé par bloc pertinent
 Utilise SBERT pour analyse sémantique des compétences
 """
 
-import pandas as pd
 import numpy as np
-from sentence_transformers import SentenceTransformer, util
 import json
-from typing import Dict, List, Tuple
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Tuple
+import sys
+from pathlib import Path
 import warnings
 warnings.filterwarnings('ignore')
 
+# Permettre l'exécution directe (python app/semantic_analysis.py)
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app import config
+from app.result_cache import ResultCache, make_result_key
+from app.embedding_cache import EmbeddingCache, make_embedding_key
+from app.encoding_service import EncodingService
+from app.encoders import Encoder, load_encoder
+from app.embedding_store import EmbeddingMatrix
+from app.catalog_artifact import CatalogArtifact
+from app.catalog import CatalogSnapshot, CatalogWatcher, compute_catalog_version
+from app.ann_index import IVFIndex
+from app.projection import Projection
+from app.text_chunking import pool_chunk_similarities, split_into_chunks
+from app.shared_catalog import SharedCatalogSegment, compute_segment_key
+from app.embedding_server import RemoteEncoder
+from app.inference_resources import InferenceResources
+from app import analysis_events
+from app.analysis_events import AnalysisEvent
+from app.cancellation import CancellationToken
+
+# Version de la logique de scoring : à incrémenter quand les formules changent
+# (invalide automatiquement le cache des résultats)
+ENGINE_VERSION = '2.2'
+
+# Questionnaire de préchauffage : parcourt similarités, scores des blocs et matching métiers
+WARMUP_RESPONSES = {
+    'q1_parcours': (
+        "Analyste de données depuis deux ans : nettoyage avec Pandas, tableaux de bord Plotly, "
+        "modèles de classification avec Scikit-learn et premiers projets de NLP."
+    ),
+    'q2_domaines': ["Data Analysis & Visualization", "Machine Learning Supervisé"],
+    'q3_niveaux': {"Data Analysis & Visualization": 3, "Machine Learning Supervisé": 2},
+    'q4_outils': ["Python (Pandas, NumPy)", "Plotly", "Scikit-learn"],
+    'q5_experiences': {
+        "Data Analysis & Visualization": (
+            "Tableaux de bord Plotly pour le suivi des ventes, nettoyage automatisé avec Pandas, "
+            "requêtes SQL sur l'entrepôt de données et rapports hebdomadaires pour la direction."
+        )
+    }
+}
+
 def convert_numpy_types(obj):
     """
     Convertir récursivement les types NumPy en types Python natifs
@@ -33,30 +79,172 @@ def convert_numpy_types(obj):
     else:
         return obj
 
+
+def _pin_catalog(method):
+    """
+    Exécuter une méthode publique sur un instantané du catalogue figé
+    (un rechargement pendant l'analyse ne la concerne pas)
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._pinned_catalog():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+class _StageClock:
+    """Horodatage des étapes et progression pondérée (voir app/analysis_events.py)"""
+    
+    def __init__(self):
+        self.start = self.last = time.perf_counter()
+        self.done_weight = 0
+    
+    def event(self, kind: str, data: Dict = None, index: int = None) -> AnalysisEvent:
+        now = time.perf_counter()
+        if kind == analysis_events.DONE:
+            self.done_weight = analysis_events.TOTAL_WEIGHT
+        else:
+            self.done_weight += analysis_events.STAGE_WEIGHTS.get(kind, 0)
+        event = AnalysisEvent(
+            kind,
+            data,
+            progress=min(1.0, self.done_weight / analysis_events.TOTAL_WEIGHT),
+            duration_ms=(now - self.last) * 1000,
+            elapsed_ms=(now - self.start) * 1000,
+            index=index
+        )
+        self.last = now
+        return event
+    
+    def replay(self, results: Dict) -> Iterator[AnalysisEvent]:
+        """Événements des étapes d'un résultat déjà calculé (cache)"""
+        self.done_weight += analysis_events.STAGE_WEIGHTS[analysis_events.SIMILARITY]
+        for bloc_id in range(1, 6):
+            yield self.event(analysis_events.BLOCK, {'bloc_id': bloc_id, 'result': results['block_scores'][f'bloc{bloc_id}']})
+        yield self.event(analysis_events.COVERAGE, {'coverage_score': results['coverage_score']})
+        yield self.event(analysis_events.JOBS, {'recommended_jobs': results['recommended_jobs']})
+        yield self.event(analysis_events.DONE, results)
+
+
 class SemanticAnalyzer:
     """
     Classe principale pour l'analyse sémantique des compétences
     Implémente SBERT pour le matching sémantique
     """
     
-    def __init__(self, competencies_path='data/competencies.csv', jobs_path='data/jobs.csv'):
+    def __init__(
+        self,
+        competencies_path='data/competencies.csv',
+        jobs_path='data/jobs.csv',
+        use_result_cache=config.RESULT_CACHE_ENABLED,
+        use_micro_batching=config.MICRO_BATCHING,
+        encoder_backend=config.ENCODER_BACKEND,
+        encoder: Encoder = None,
+        embedding_storage=config.EMBEDDING_STORAGE,
+        artifact_dir=config.CATALOG_ARTIFACT_DIR,
+        ann_index=config.ANN_INDEX,
+        projection_dim=config.PROJECTION_DIM,
+        watch_catalog=config.CATALOG_WATCH,
+        shared_catalog_dir=config.SHARED_CATALOG_DIR if config.SHARED_CATALOG else None,
+        embedding_server=config.EMBEDDING_SERVER_SOCKET if config.EMBEDDING_SERVER else None,
+        warmup=config.WARMUP,
+        inference_resources: InferenceResources = None
+    ):
         """
         Initialiser l'analyseur sémantique
         
         Args:
             competencies_path: Chemin vers competencies.csv
             jobs_path: Chemin vers jobs.csv
+            use_result_cache: Réutiliser les résultats d'analyses identiques
+            use_micro_batching: Regrouper les encodages des sessions concurrentes
+            encoder_backend: Backend du modèle ('torch', 'onnx', 'onnx-int8', 'hashing')
+            encoder: Encodeur déjà construit (prioritaire sur encoder_backend)
+            embedding_storage: Précision de la matrice des compétences ('float32', 'float16', 'int8')
+            artifact_dir: Répertoire des embeddings du catalogue sauvegardés (None : désactivé)
+            ann_index: Index de recherche approchée ('auto', 'ivf', 'none')
+            projection_dim: Dimension de la projection des embeddings (0 : désactivée)
+            watch_catalog: Recharger le catalogue à chaud quand ses fichiers changent
+            shared_catalog_dir: Répertoire des segments de catalogue partagés entre processus (None : désactivé)
+            embedding_server: Socket du serveur d'embeddings auquel déléguer encodage et similarités
+                              (None : modèle et catalogue chargés dans ce processus)
+            warmup: Préchauffage du modèle ('background', 'sync' ou 'none') ; self.ready
+                    est levé une fois terminé
+            inference_resources: Threads, appels simultanés et taille de batch du modèle
+                                 (défaut : réglages de app/config.py)
         """
         print("🔄 Initialisation du moteur d'analyse sémantique...")
         
-        # Charger le modèle SBERT multilingue
-        print("📥 Chargement du modèle SBERT...")
-        self.model = SentenceTransformer('paraphrase-multilingual-MiniLM-L12-v2')
+        # État propre à chaque thread (mode silencieux des logs)
+        self._local = threading.local()
+        
+        # Charger le modèle SBERT multilingue (ou se connecter au serveur d'embeddings)
+        self.model_name = config.SBERT_MODEL_NAME
+        self.resources = inference_resources or InferenceResources()
+        self.embedding_server = None
+        replica_factory = None
+        if encoder is None and embedding_server:
+            print(f"🔌 Connexion au serveur d'embeddings {embedding_server}...")
+            encoder = self.embedding_server = RemoteEncoder(embedding_server)
+        elif encoder is None:
+            print(f"📥 Chargement du modèle SBERT (backend {encoder_backend})...")
+            replica_cores = self.resources.replica_cores if config.ENCODER_PIN_CORES else None
+            encoder = load_encoder(
+                encoder_backend,
+                self.model_name,
+                intra_op_threads=self.resources.intra_op_threads,
+                inter_op_threads=self.resources.inter_op_threads,
+                cores=replica_cores[0] if replica_cores else None
+            )
+            replica_factory = self._make_replica_factory(encoder_backend)
+        if self.embedding_server is None and self.resources.build_replicas(encoder, replica_factory):
+            print(f"🧩 {self.resources.replicas} répliques de l'encodeur "
+                  f"({len(self.resources.replica_cores[0])} cœur(s) chacune)")
+        self.resources.configure(encoder)
+        self.model = encoder
+        self.model_id = encoder.model_id
+        self.embedding_storage = embedding_storage
+        self.ann_mode = ann_index
+        self.projection_dim = projection_dim
+        self.shared_catalog_dir = shared_catalog_dir
+        
+        # Embeddings du catalogue sauvegardés pour ce modèle
+        self.catalog_artifact = CatalogArtifact(artifact_dir, self.model_id) if artifact_dir else None
+        
+        # Fichiers du catalogue (relus à chaque rechargement)
+        self.competencies_path = competencies_path
+        self.jobs_path = jobs_path
+        
+        # Cache des résultats complets (mémoire LRU + disque)
+        self.result_cache = None
+        if use_result_cache:
+            self.result_cache = ResultCache(
+                cache_dir=f"{config.CACHE_DIR}/results",
+                max_entries=config.RESULT_CACHE_MAX_ENTRIES,
+                max_files=config.RESULT_CACHE_MAX_FILES
+            )
         
-        # Charger les données
-        print("📂 Chargement des compétences et métiers...")
-        self.competencies_df = pd.read_csv(competencies_path)
-        self.jobs_df = pd.read_csv(jobs_path)
+        # Cache des embeddings de textes (partagé par toutes les sessions)
+        persist_path = None
+        if config.EMBEDDING_CACHE_PERSIST:
+            safe_model_id = self.model_id.replace('/', '_')
+            persist_path = f"{config.CACHE_DIR}/embeddings/{safe_model_id}"
+        self.embedding_cache = EmbeddingCache(
+            max_bytes=config.EMBEDDING_CACHE_MAX_MB * 1024 * 1024,
+            dtype=config.EMBEDDING_CACHE_DTYPE,
+            persist_path=persist_path,
+            persist_capacity=config.EMBEDDING_CACHE_CAPACITY
+        )
+        
+        # Service de micro-batching : un seul thread appelle le modèle
+        # (en mode client, c'est le serveur d'embeddings qui regroupe les requêtes)
+        self.encoding_service = None
+        if use_micro_batching and self.embedding_server is None:
+            self.encoding_service = EncodingService(
+                lambda texts: self._encode_batch(texts, batch_size=config.MICRO_BATCH_MAX_SIZE),
+                max_batch_size=config.MICRO_BATCH_MAX_SIZE,
+                max_wait_ms=config.MICRO_BATCH_MAX_WAIT_MS,
+                workers=self.resources.replicas
+            )
         
         # Mapping domaines → BlockID
         self.domain_to_block = {
@@ -113,9 +301,13 @@ class SemanticAnalyzer:
             "R / RStudio": [5]
         }
         
-        # Créer les embeddings des compétences (une seule fois)
-        print("🧠 Création des embeddings des compétences...")
-        self._create_competency_embeddings()
+        # Construire le catalogue et les embeddings des compétences
+        self._catalog = self._build_catalog()
+        
+        # Rechargement à chaud du catalogue (zéro interruption)
+        self.catalog_watcher = None
+        if watch_catalog:
+            self.catalog_watcher = CatalogWatcher(self, interval=config.CATALOG_WATCH_INTERVAL_S).start()
         
         # Variables pour stocker les résultats
         self.user_responses = None
@@ -124,34 +316,664 @@ class SemanticAnalyzer:
         self.coverage_score = 0.0
         self.recommended_jobs = []
         
+        # Préchauffage : le premier utilisateur ne paie pas l'initialisation paresseuse du modèle
+        self.ready = threading.Event()
+        self.warmup_ms = None
+        if warmup == 'sync':
+            self._warmup()
+        elif warmup == 'background':
+            threading.Thread(target=self._warmup, name='aisca-warmup', daemon=True).start()
+        else:
+            self.ready.set()
+        
         print("✅ Initialisation terminée !\n")
     
     
-    def _create_competency_embeddings(self):
+    def _make_replica_factory(self, encoder_backend: str) -> Callable:
+        """
+        Fabrique des répliques de l'encodeur (voir InferenceResources.build_replicas)
+        
+        Args:
+            encoder_backend: Backend du modèle chargé
+            
+        Returns:
+            Une session ONNX Runtime (et son pool de threads) par réplique, épinglée
+            sur ses cœurs si ENCODER_PIN_CORES ; None pour torch (module et threads
+            partagés par le processus : pas de répliques)
+        """
+        if encoder_backend == 'torch':
+            return None
+        return lambda cores: load_encoder(
+            encoder_backend,
+            self.model_name,
+            intra_op_threads=self.resources.intra_op_threads,
+            inter_op_threads=self.resources.inter_op_threads,
+            cores=cores if config.ENCODER_PIN_CORES else None
+        )
+    
+    
+    def _warmup(self):
+        """
+        Préchauffer le modèle et les chemins de scoring, puis lever self.ready
+        Le premier encodage est bien plus lent que les suivants (noyaux initialisés
+        paresseusement, tokenizer, croissance de l'allocateur) : des textes de
+        longueurs et de tailles de batch variées y passent avant tout utilisateur.
+        En mode client, le modèle est déjà chaud dans le serveur d'embeddings :
+        un texte court suffit à ouvrir la connexion.
+        """
+        start = time.perf_counter()
+        try:
+            with self._quiet_logs(), self._pinned_catalog():
+                texts = self.competency_texts
+                long_text = ' '.join(texts[:12])
+                batches = [[texts[0]], [long_text], texts[:16], [long_text] * 4]
+                if self.embedding_server is not None:
+                    batches = batches[:1]
+                for batch in batches:
+                    self._encode_batch(batch, batch_size=len(batch))
+                
+                # Taille de batch choisie d'après le débit mesuré sur cet hôte
+                if self.resources.batch_size is None and self.embedding_server is None:
+                    throughput = self.resources.calibrate(self.model, texts)
+                    print(f"📏 Taille de batch retenue : {self.resources.batch_size} "
+                          f"({throughput[self.resources.batch_size]:.0f} textes/s)")
+                
+                # Similarités (découpage, projection, index), scores des blocs, métiers
+                similarities = self._text_similarities(self._scoring_texts(WARMUP_RESPONSES))
+                self._compute_results(WARMUP_RESPONSES, similarities)
+        except Exception as e:
+            print(f"⚠️ Préchauffage incomplet : {type(e).__name__}: {e}")
+        finally:
+            self.warmup_ms = (time.perf_counter() - start) * 1000
+            self.ready.set()
+        print(f"🔥 Moteur préchauffé en {self.warmup_ms:.0f} ms")
+    
+    
+    def wait_until_ready(self, timeout: float = None) -> bool:
         """
-        ÉTAPE 3 : Créer les embeddings pour toutes les compétences
+        Attendre la fin du préchauffage
+        
+        Returns:
+            True si l'analyseur est prêt (False : délai dépassé)
+        """
+        return self.ready.wait(timeout)
+    
+    
+    def _build_catalog(self) -> CatalogSnapshot:
+        """
+        ÉTAPE 3 : Charger le catalogue et créer les embeddings de toutes les compétences
         Combine le nom court + description pour un meilleur matching
+        
+        Returns:
+            Instantané complet du catalogue (index, embeddings, projection, index IVF)
         """
-        self.competency_texts = []
-        self.competency_ids = []
+        print("📂 Chargement des compétences et métiers...")
+        catalog = CatalogSnapshot(self.competencies_path, self.jobs_path)
+        content_hash = catalog.content_hash
+        
+        # Mode client : embeddings et index restent dans le serveur d'embeddings
+        if self.embedding_server is not None:
+            served_hash = self.embedding_server.refresh_info()['content_hash']
+            if served_hash != content_hash:
+                print(f"⚠️ Le serveur d'embeddings sert un autre catalogue ({served_hash}) : "
+                      f"analyses refusées jusqu'à son rechargement")
+            return catalog
+        
+        # Segment déjà publié par un autre processus pour cette version du catalogue ?
+        if self.shared_catalog_dir and self._attach_shared_catalog(catalog):
+            return catalog
         
-        for _, row in self.competencies_df.iterrows():
-            # Combiner nom de compétence + description pour contexte riche
-            text = f"{row['Competency']} {row['Description']}"
-            self.competency_texts.append(text)
-            self.competency_ids.append(row['CompetencyID'])
+        print("🧠 Création des embeddings des compétences...")
+        
+        # Embeddings déjà calculés pour ce catalogue et ce modèle ?
+        embeddings = None
+        missing = np.arange(len(catalog.competency_texts))
+        up_to_date = False
+        if self.catalog_artifact is not None:
+            embeddings = self.catalog_artifact.load(content_hash)
+            if embeddings is not None:
+                missing = missing[:0]
+                up_to_date = True
+                print(f"♻️ Embeddings du catalogue relus depuis {self.catalog_artifact.directory}")
+            else:
+                # Catalogue modifié : reprendre les lignes inchangées
+                embeddings, missing = self.catalog_artifact.load_rows(catalog.row_hashes)
+                if embeddings is not None:
+                    print(f"♻️ {len(embeddings) - len(missing)} embedding(s) repris, "
+                          f"{len(missing)} compétence(s) nouvelle(s) ou modifiée(s) à encoder")
+        
+        if len(missing):
+            # Encoder les compétences manquantes en une seule fois (efficace)
+            # puis normaliser une fois pour toutes : similarité cosinus = produit scalaire
+            encoded = self._normalize(self.resources.encode(
+                self.model,
+                [catalog.competency_texts[idx] for idx in missing],
+                show_progress_bar=True
+            ))
+            if embeddings is None:
+                embeddings = encoded
+            else:
+                embeddings[missing] = encoded
+        
+        if not up_to_date and self.catalog_artifact is not None:
+            self.catalog_artifact.save(embeddings, content_hash, catalog.row_hashes)
+        
+        # Petite modification : projection et centroïdes IVF précédents conservés
+        incremental = not up_to_date and len(missing) <= config.CATALOG_INCREMENTAL_MAX_RATIO * len(embeddings)
+        
+        # Projection en dimension réduite (catalogue ici, textes utilisateur à l'analyse)
+        catalog.projection = self._load_projection(embeddings, content_hash, incremental)
+        if catalog.projection is not None:
+            embeddings = catalog.projection.transform(embeddings)
+        
+        # Stocker dans la précision demandée (float32 / float16 / int8)
+        catalog.competency_embeddings = EmbeddingMatrix.from_float(
+            embeddings,
+            mode=self.embedding_storage
+        )
+        
+        print(f"✅ {len(catalog.competency_embeddings)} embeddings de compétences créés "
+              f"({self.embedding_storage}, {catalog.competency_embeddings.nbytes / 1024:.0f} Ko)")
+        
+        catalog.ann_index = self._load_ann_index(embeddings, catalog, incremental)
+        
+        if self.shared_catalog_dir:
+            self._publish_shared_catalog(catalog)
+        
+        return catalog
+    
+    
+    def _shared_catalog_key(self, catalog: CatalogSnapshot) -> str:
+        return compute_segment_key(
+            self.model_id,
+            catalog.content_hash,
+            catalog.competency_block_ids,
+            self.embedding_storage,
+            self.projection_dim or None
+        )
+    
+    
+    def _attach_shared_catalog(self, catalog: CatalogSnapshot) -> bool:
+        """
+        Utiliser la matrice et les lignes des blocs d'un segment partagé (sans copie)
         
-        # Encoder toutes les compétences en une seule fois (efficace)
-        self.competency_embeddings = self.model.encode(
-            self.competency_texts,
-            convert_to_tensor=True,
-            show_progress_bar=True
+        Returns:
+            True si le segment de cette version existe et correspond au catalogue
+        """
+        segment = SharedCatalogSegment.attach(
+            self.shared_catalog_dir, self.model_id, self._shared_catalog_key(catalog)
         )
+        if segment is None or segment.competency_ids != [str(comp_id) for comp_id in catalog.competency_ids]:
+            return False
+        
+        projection = None
+        if self.projection_dim:
+            if self.catalog_artifact is None:
+                return False
+            projection = Projection.load(
+                str(self.catalog_artifact.projection_path(self.projection_dim)),
+                self._projection_manifest(catalog.content_hash)
+            )
+            if projection is None:
+                return False
+        
+        catalog.competency_embeddings = segment.matrix
+        catalog.block_indices = segment.block_indices
+        catalog.projection = projection
+        if self._ann_enabled(len(segment.matrix)):
+            catalog.ann_index = self._load_ann_index(segment.matrix.to_float32(), catalog)
+        
+        print(f"🔗 Catalogue partagé attaché sans copie : {segment.path} "
+              f"({segment.matrix.nbytes / 1024:.0f} Ko)")
+        return True
+    
+    
+    def _publish_shared_catalog(self, catalog: CatalogSnapshot):
+        """Publier le catalogue pour les autres processus, puis utiliser soi-même le segment"""
+        key = self._shared_catalog_key(catalog)
+        try:
+            SharedCatalogSegment.publish(
+                self.shared_catalog_dir,
+                self.model_id,
+                key,
+                catalog.competency_embeddings,
+                catalog.block_indices,
+                [str(comp_id) for comp_id in catalog.competency_ids]
+            )
+        except OSError as e:
+            print(f"⚠️ Publication du catalogue partagé impossible : {e}")
+            return
+        
+        segment = SharedCatalogSegment.attach(self.shared_catalog_dir, self.model_id, key)
+        if segment is not None:
+            catalog.competency_embeddings = segment.matrix
+            catalog.block_indices = segment.block_indices
+            print(f"📤 Catalogue publié pour les autres processus : {segment.path}")
+    
+    
+    @property
+    def catalog(self) -> CatalogSnapshot:
+        """Instantané du catalogue : celui figé pour l'analyse en cours, sinon le plus récent"""
+        pinned = getattr(self._local, 'catalog', None)
+        return pinned if pinned is not None else self._catalog
+    
+    
+    def __getattr__(self, name):
+        # competencies_df, competency_embeddings, block_indices... : lus sur l'instantané
+        if name in CatalogSnapshot.FIELDS:
+            return getattr(self.catalog, name)
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+    
+    
+    @contextmanager
+    def _pinned_catalog(self, catalog: CatalogSnapshot = None):
+        """
+        Figer l'instantané du catalogue pour le thread courant
+        
+        Args:
+            catalog: Instantané imposé (analyse par étapes reprise entre deux événements) ;
+                     sinon celui déjà figé, ou le plus récent
+        """
+        previous = getattr(self._local, 'catalog', None)
+        if catalog is None:
+            if previous is not None:
+                yield
+                return
+            catalog = self._catalog
+        self._local.catalog = catalog
+        try:
+            yield
+        finally:
+            self._local.catalog = previous
+    
+    
+    def reload_catalog(self) -> bool:
+        """
+        Reconstruire le catalogue puis le substituer d'un bloc à l'actuel
+        Les analyses en cours terminent sur l'ancien instantané
+        
+        Returns:
+            True si le contenu du catalogue a changé
+        """
+        if compute_catalog_version(self.competencies_path, self.jobs_path) == self._catalog.catalog_version:
+            return False
+        
+        print("🔄 Catalogue modifié : reconstruction en arrière-plan...")
+        catalog = self._build_catalog()
+        self._catalog = catalog
+        print(f"✅ Nouveau catalogue en service ({catalog.catalog_version})")
+        return True
+    
+    
+    def _projection_manifest(self, content_hash: str) -> Dict:
+        return {'content_hash': content_hash, 'dim': self.projection_dim}
+    
+    
+    def _load_projection(self, embeddings: np.ndarray, content_hash: str, incremental: bool = False):
+        """
+        Charger (ou apprendre puis sauvegarder) la projection du catalogue
+        
+        Args:
+            embeddings: Embeddings normalisés du catalogue
+            content_hash: Empreinte du contenu encodé
+            incremental: Réutiliser la projection d'une version proche du catalogue
+        
+        Returns:
+            La projection, ou None si les vecteurs gardent leur dimension complète
+        """
+        if not self.projection_dim or self.projection_dim >= embeddings.shape[1]:
+            return None
+        
+        manifest = self._projection_manifest(content_hash)
+        path = None
+        if self.catalog_artifact is not None:
+            path = str(self.catalog_artifact.projection_path(self.projection_dim))
+            projection = Projection.load(path, manifest)
+            if projection is None and incremental:
+                projection = Projection.load(path, manifest, ignore_keys=('content_hash',))
+            if projection is not None:
+                if incremental:
+                    projection.save(path, manifest)
+                return projection
+        
+        projection = Projection.fit(embeddings, self.projection_dim)
+        if path is not None:
+            projection.save(path, manifest)
+        print(f"📉 Projection {projection.input_dim} → {projection.output_dim} dimensions "
+              f"({projection.explained_ratio(embeddings):.1%} de l'énergie conservée)")
+        return projection
+    
+    
+    def _ann_enabled(self, n_rows: int) -> bool:
+        """Recherche approchée active pour un catalogue de cette taille ?"""
+        if self.ann_mode == 'none':
+            return False
+        return self.ann_mode == 'ivf' or n_rows >= config.ANN_MIN_CATALOG_SIZE
+    
+    
+    def _load_ann_index(self, embeddings: np.ndarray, catalog: CatalogSnapshot, incremental: bool = False):
+        """
+        Charger (ou construire puis sauvegarder) l'index IVF du catalogue
+        Après une petite modification du catalogue (incremental), les centroïdes
+        précédents sont gardés : seules les affectations aux listes sont recalculées
         
-        print(f"✅ {len(self.competency_embeddings)} embeddings de compétences créés")
+        Returns:
+            L'index, ou None si la recherche reste exhaustive
+        """
+        if not self._ann_enabled(len(embeddings)):
+            return None
+        
+        # Les listes portent le bloc de chaque compétence : un changement de bloc invalide l'index
+        manifest = {
+            'content_hash': catalog.content_hash,
+            'block_hash': catalog.block_hash,
+            'n_lists': config.ANN_N_LISTS,
+            'projection': catalog.projection.output_dim if catalog.projection is not None else None
+        }
+        index_path = self.catalog_artifact.index_path if self.catalog_artifact is not None else None
+        
+        if index_path is not None:
+            index = IVFIndex.load(str(index_path), manifest, n_probe=config.ANN_N_PROBE)
+            if index is not None:
+                print(f"♻️ Index IVF relu ({index.n_lists} listes)")
+                return index
+        
+        previous = None
+        if index_path is not None and incremental:
+            # Seuls les centroïdes sont repris : listes et blocs sont recalculés ci-dessous
+            previous = IVFIndex.load(str(index_path), manifest, ignore_keys=('content_hash', 'block_hash'))
+        
+        if previous is not None:
+            print("🗂️ Mise à jour de l'index IVF du catalogue...")
+            index = IVFIndex.from_centroids(
+                previous.centroids,
+                embeddings,
+                catalog.competency_block_ids,
+                n_probe=config.ANN_N_PROBE
+            )
+        else:
+            print("🗂️ Construction de l'index IVF du catalogue...")
+            index = IVFIndex.build(
+                embeddings,
+                catalog.competency_block_ids,
+                n_lists=config.ANN_N_LISTS,
+                n_probe=config.ANN_N_PROBE
+            )
+        if index_path is not None:
+            index.save(str(index_path), manifest)
+        print(f"✅ Index IVF prêt ({index.n_lists} listes, n_probe={index.n_probe})")
+        return index
+    
+    
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        """Normaliser des vecteurs (L2) ligne par ligne en float32"""
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+    
     
+    def _log(self, message: str = ''):
+        """Afficher un message de progression (sauf en mode silencieux)"""
+        if not getattr(self._local, 'quiet', False):
+            print(message)
     
-    def analyze_user_responses(self, responses: Dict):
+    
+    @contextmanager
+    def _quiet_logs(self):
+        """Désactiver les messages de progression pour le thread courant"""
+        previous = getattr(self._local, 'quiet', False)
+        self._local.quiet = True
+        try:
+            yield
+        finally:
+            self._local.quiet = previous
+    
+    
+    @contextmanager
+    def _cancellation(self, token: CancellationToken = None):
+        """Installer le jeton d'annulation du thread courant (vérifié par _checkpoint)"""
+        previous = getattr(self._local, 'cancel_token', None)
+        self._local.cancel_token = token if token is not None else previous
+        try:
+            yield
+        finally:
+            self._local.cancel_token = previous
+    
+    
+    def _checkpoint(self):
+        """Point de contrôle : AnalysisCancelled si l'analyse en cours a été abandonnée"""
+        token = getattr(self._local, 'cancel_token', None)
+        if token is not None:
+            token.check()
+    
+    
+    def _encode_texts(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """
+        Encoder des textes en passant par le cache d'embeddings
+        Seuls les textes jamais vus sont envoyés au modèle, triés par longueur
+        pour limiter le padding dans chaque batch. Avec un jeton d'annulation,
+        le jeton est vérifié entre deux batchs (les batchs finis restent en cache)
+        
+        Args:
+            texts: Textes à encoder
+            batch_size: Taille des batchs envoyés au modèle
+            
+        Returns:
+            Matrice float32 (len(texts), dim)
+        """
+        keys = [make_embedding_key(self.model_id, text) for text in texts]
+        found = self.embedding_cache.get_many(keys)
+        
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        
+        if missing:
+            missing_keys = sorted(missing, key=lambda key: len(missing[key]), reverse=True)
+            missing_texts = [missing[key] for key in missing_keys]
+            
+            token = getattr(self._local, 'cancel_token', None)
+            
+            # Petites demandes : regroupées avec celles des autres sessions
+            # Gros lots (analyze_many) : déjà un batch complet, encodés directement
+            service = self.encoding_service
+            if service is not None and len(missing_texts) < service.max_batch_size:
+                future = service.submit(missing_texts)
+                parts = [(missing_keys, future.result() if token is None else token.wait(future))]
+            else:
+                step = len(missing_texts) if token is None else (self.resources.batch_size or batch_size)
+                parts = (
+                    (missing_keys[start:start + step], self._encode_batch(missing_texts[start:start + step], batch_size=batch_size))
+                    for start in range(0, len(missing_texts), step)
+                )
+            for part_keys, new_vectors in parts:
+                for key, vector in zip(part_keys, new_vectors):
+                    vector = np.asarray(vector, dtype=np.float32)
+                    self.embedding_cache.put(key, vector)
+                    found[key] = vector
+                self._checkpoint()
+        
+        return np.stack([found[key] for key in keys])
+    
+    
+    def _encode_batch(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """Appel direct au modèle (sans cache), borné par les ressources d'inférence"""
+        if self.embedding_server is not None:
+            # Le serveur d'embeddings regroupe lui-même les requêtes concurrentes
+            return self.model.encode(texts, batch_size=batch_size)
+        return self.resources.encode(self.model, texts, batch_size=batch_size)
+    
+    
+    def _text_similarities(self, texts: List[str], batch_size: int = 32) -> Dict[str, np.ndarray]:
+        """
+        Calculer les similarités cosinus de plusieurs textes avec TOUT le catalogue
+        Les textes longs sont découpés en morceaux : tous les morceaux de tous
+        les textes sont encodés ensemble, puis agrégés par compétence
+        
+        Args:
+            texts: Textes utilisateur (doublons et textes vides ignorés)
+            batch_size: Taille des batchs d'encodage
+            
+        Returns:
+            Dictionnaire texte → vecteur de similarités (une valeur par compétence)
+        """
+        unique_texts = list(dict.fromkeys(t for t in texts if t and t.strip()))
+        if not unique_texts:
+            return {}
+        
+        chunks_by_text = {
+            text: split_into_chunks(text, config.CHUNK_MAX_WORDS, config.CHUNK_MAX_COUNT)
+            for text in unique_texts
+        }
+        all_chunks = list(dict.fromkeys(chunk for chunks in chunks_by_text.values() for chunk in chunks))
+        chunk_rows = {chunk: row for row, chunk in enumerate(all_chunks)}
+        
+        chunk_similarities = self._chunk_similarities(all_chunks, batch_size=batch_size)
+        
+        return {
+            text: pool_chunk_similarities(
+                chunk_similarities[[chunk_rows[chunk] for chunk in chunks]],
+                mode=config.CHUNK_POOLING
+            )
+            for text, chunks in chunks_by_text.items()
+        }
+    
+    
+    def _chunk_similarities(self, chunks: List[str], batch_size: int = 32) -> np.ndarray:
+        """
+        Similarités de textes courts avec le catalogue, en une seule
+        multiplication matricielle (ou via l'index IVF si activé)
+        
+        Returns:
+            Matrice float32 (len(chunks), nb_compétences)
+        """
+        if self.embedding_server is not None:
+            self._checkpoint()
+            return self.embedding_server.similarities(chunks, self.content_hash)
+        
+        query_embeddings = self._normalize(self._encode_texts(chunks, batch_size=batch_size))
+        if self.projection is not None:
+            query_embeddings = self.projection.transform(query_embeddings)
+        
+        if self.ann_index is None:
+            return self.competency_embeddings.similarities(query_embeddings)
+        
+        # Gros catalogue : seules les ANN_TOP_K meilleures compétences de chaque
+        # bloc sont re-scorées exactement, les autres valent -inf (non retrouvées)
+        similarities = np.full(
+            (len(chunks), len(self.competency_embeddings)), -np.inf, dtype=np.float32
+        )
+        for row, query in enumerate(query_embeddings):
+            ids, sims = self.ann_index.search_per_block(
+                query, self.competency_embeddings, k=config.ANN_TOP_K
+            )
+            similarities[row, ids] = sims
+        return similarities
+    
+    
+    @_pin_catalog
+    def prefetch(self, texts: List[str]) -> int:
+        """
+        Encoder à l'avance des textes libres (encodage spéculatif, voir app/speculative.py)
+        Les morceaux sont encodés comme lors de l'analyse : leurs embeddings restent
+        dans le cache et l'analyse de ces textes n'a plus à appeler le modèle
+        
+        Returns:
+            Nombre de textes traités
+        """
+        return len(self._text_similarities(texts))
+    
+    
+    @_pin_catalog
+    def preview_text(
+        self,
+        text: str,
+        responses: Dict = None,
+        max_new_chunks: int = config.PREVIEW_MAX_NEW_CHUNKS,
+        k: int = 5
+    ) -> Dict:
+        """
+        Aperçu provisoire d'un texte Q1 en cours de saisie (voir app/live_preview.py)
+        Le texte est découpé exactement comme à l'analyse finale (split_into_chunks) :
+        seuls les morceaux nouveaux ou modifiés passent par le modèle, et l'analyse
+        finale relit dans le cache d'embeddings tous les morceaux déjà encodés ici.
+        Un aperçu complet (partial False) a donc les mêmes similarités Q1 que
+        l'analyse finale ; les scores de blocs restent provisoires (Q5 pas encore
+        saisi). Au plus max_new_chunks morceaux nouveaux par aperçu (latence bornée) :
+        les suivants sont pris en compte aux aperçus suivants.
+        
+        Args:
+            text: Texte Q1 tel que saisi
+            responses: Autres réponses déjà données (Q2-Q4), pour des scores plus justes
+            max_new_chunks: Morceaux encodés au plus par appel
+            k: Nombre de compétences les plus proches renvoyées
+            
+        Returns:
+            {'top_competencies', 'block_scores' (bloc_id → {'name', 'score'}),
+             'chunks', 'encoded', 'partial', 'elapsed_ms'}
+        """
+        start = time.perf_counter()
+        responses = responses or {}
+        chunks = []
+        if text and text.strip():
+            chunks = split_into_chunks(text, config.CHUNK_MAX_WORDS, config.CHUNK_MAX_COUNT)
+        
+        new_chunks = []
+        if self.embedding_server is None:
+            keys = [make_embedding_key(self.model_id, chunk) for chunk in dict.fromkeys(chunks)]
+            cached = self.embedding_cache.get_many(keys)
+            new_chunks = [chunk for key, chunk in zip(keys, dict.fromkeys(chunks)) if key not in cached]
+            deferred = set(new_chunks[max_new_chunks:])
+            chunks = [chunk for chunk in chunks if chunk not in deferred]
+        
+        preview = {
+            'top_competencies': [],
+            'block_scores': {},
+            'chunks': len(chunks),
+            'encoded': min(len(new_chunks), max_new_chunks),
+            'partial': len(new_chunks) > max_new_chunks
+        }
+        if chunks:
+            with self._quiet_logs():
+                # Même agrégation que _text_similarities (morceaux en double compris)
+                similarities = self._analyze_text_sbert(text, pool_chunk_similarities(
+                    self._chunk_similarities(chunks),
+                    mode=config.CHUNK_POOLING
+                ))
+                preview['top_competencies'] = self._top_competencies(similarities, k)
+                for bloc_id in range(1, 6):
+                    bloc_result = self._calculate_bloc_score(
+                        bloc_id,
+                        similarities,
+                        responses.get('q2_domaines', []),
+                        responses.get('q3_niveaux', {}),
+                        responses.get('q4_outils', []),
+                        {},
+                        text
+                    )
+                    preview['block_scores'][bloc_id] = {
+                        'name': self.block_names.get(bloc_id, f"Bloc {bloc_id}"),
+                        'score': float(bloc_result['score'])
+                    }
+        
+        preview['elapsed_ms'] = (time.perf_counter() - start) * 1000
+        return preview
+    
+    
+    @staticmethod
+    def _scoring_texts(responses: Dict) -> List[str]:
+        """Textes d'une réponse qui passent par SBERT (Q1 + Q5 d'au moins 20 mots)"""
+        texts = [responses.get('q1_parcours', '')]
+        for experience_text in responses.get('q5_experiences', {}).values():
+            if len(experience_text.split()) >= 20:
+                texts.append(experience_text)
+        return texts
+    
+    
+    @_pin_catalog
+    def analyze_user_responses(self, responses: Dict, cancel_token: CancellationToken = None):
         """
         Analyser les réponses du questionnaire utilisateur
         NOUVELLE VERSION POUR 5 QUESTIONS ADAPTATIVES
@@ -165,12 +987,199 @@ class SemanticAnalyzer:
                     'q4_outils': List[str],
                     'q5_experiences': Dict[str, str]
                 }
+            cancel_token: Jeton d'annulation et échéance (AnalysisCancelled si abandonnée)
+        """
+        for _ in self.iter_analysis(responses, cancel_token):
+            pass
+    
+    
+    def iter_analysis(self, responses: Dict, cancel_token: CancellationToken = None) -> Iterator[AnalysisEvent]:
         """
-        print("\n🔍 ANALYSE DES RÉPONSES UTILISATEUR")
-        print("=" * 60)
+        Analyser les réponses étape par étape (variante progressive d'analyze_user_responses)
+        Un événement est produit à la fin de chaque étape : similarités, chaque bloc,
+        coverage, métiers (voir app/analysis_events.py). Toute l'analyse utilise le même
+        instantané du catalogue, même si un rechargement survient entre deux événements.
+        À la fin, l'état de l'analyseur est celui d'analyze_user_responses.
+        Une analyse annulée s'arrête au point de contrôle suivant sans modifier l'analyseur.
         
-        self.user_responses = responses
+        Args:
+            responses: Dictionnaire des réponses (même format qu'analyze_user_responses)
+            cancel_token: Jeton d'annulation et échéance, vérifié entre deux batchs
+                          d'encodage et entre deux étapes
+            
+        Yields:
+            AnalysisEvent (le dernier, DONE, porte les résultats complets)
+            
+        Raises:
+            AnalysisCancelled: Jeton annulé ou échéance dépassée (DeadlineExceeded)
+        """
+        catalog = self.catalog
+        clock = _StageClock()
         
+        with self._pinned_catalog(catalog):
+            self._log("\n🔍 ANALYSE DES RÉPONSES UTILISATEUR")
+            self._log("=" * 60)
+            
+            self.user_responses = responses
+            texts = self._scoring_texts(responses)
+            
+            # Réponses déjà analysées avec le même catalogue et le même modèle ?
+            cache_key = None
+            cached = None
+            if self.result_cache is not None:
+                cache_key = make_result_key(responses, self._scoring_signature())
+                cached = self.result_cache.get(cache_key)
+        
+        yield clock.event(analysis_events.STARTED, {'texts': sum(1 for t in texts if t and t.strip())})
+        
+        if cached is not None:
+            self._restore_results(cached)
+            self._log("✅ Résultats trouvés dans le cache ! (aucun recalcul)")
+            self._log("=" * 60)
+            yield clock.event(analysis_events.CACHED)
+            # Étapes rejouées depuis le cache : l'affichage progressif reste le même
+            yield from clock.replay(cached)
+            return
+        
+        with self._pinned_catalog(catalog), self._cancellation(cancel_token):
+            self._checkpoint()
+            text_similarities = self._text_similarities(texts)
+            q1_similarities = text_similarities.get(responses.get('q1_parcours', ''))
+            top_competencies = self._top_competencies(q1_similarities) if q1_similarities is not None else []
+        yield clock.event(analysis_events.SIMILARITY, {'top_competencies': top_competencies})
+        
+        stages = self._compute_stages(responses, text_similarities)
+        while True:
+            with self._pinned_catalog(catalog), self._cancellation(cancel_token):
+                kind, data = next(stages)
+            if kind == analysis_events.DONE:
+                results = data
+                break
+            yield clock.event(kind, data)
+        
+        self._restore_results(results)
+        if cache_key is not None:
+            self.result_cache.put(cache_key, convert_numpy_types(results))
+        
+        self._log("\n✅ Analyse terminée !")
+        self._log("=" * 60)
+        yield clock.event(analysis_events.DONE, results)
+    
+    
+    @_pin_catalog
+    def analyze_many(
+        self,
+        responses_list: List[Dict],
+        batch_size: int = 64,
+        on_event: Callable[[AnalysisEvent], None] = None,
+        cancel_token: CancellationToken = None
+    ) -> List[Dict]:
+        """
+        Analyser un lot de questionnaires en une seule passe
+        Tous les textes (Q1, Q5) sont dédoublonnés puis encodés par batchs,
+        et les similarités calculées en une seule multiplication matricielle.
+        L'état de l'analyseur (block_scores...) n'est pas modifié.
+        
+        Args:
+            responses_list: Liste de dictionnaires de réponses
+            batch_size: Taille des batchs d'encodage SBERT
+            on_event: Appelée à la fin de chaque étape (similarités du lot, puis
+                      blocs / coverage / métiers de chaque questionnaire, avec son index)
+            cancel_token: Jeton d'annulation et échéance du lot (les résultats déjà
+                          calculés restent en cache)
+            
+        Returns:
+            Liste des résumés de résultats (même format que get_results_summary),
+            dans l'ordre des réponses
+            
+        Raises:
+            AnalysisCancelled: Jeton annulé ou échéance dépassée (DeadlineExceeded)
+        """
+        with self._cancellation(cancel_token):
+            return self._analyze_many(responses_list, batch_size, on_event)
+    
+    
+    def _analyze_many(
+        self,
+        responses_list: List[Dict],
+        batch_size: int,
+        on_event: Callable[[AnalysisEvent], None]
+    ) -> List[Dict]:
+        clock = _StageClock()
+        self._log(f"\n🔍 ANALYSE PAR LOT : {len(responses_list)} questionnaire(s)")
+        
+        signature = self._scoring_signature()
+        results_list = [None] * len(responses_list)
+        cache_keys = [None] * len(responses_list)
+        pending = []
+        
+        for i, responses in enumerate(responses_list):
+            if self.result_cache is not None:
+                cache_keys[i] = make_result_key(responses, signature)
+                cached = self.result_cache.get(cache_keys[i])
+                if cached is not None:
+                    results_list[i] = cached
+                    if on_event is not None:
+                        on_event(clock.event(analysis_events.CACHED, index=i))
+                    continue
+            pending.append(i)
+        
+        self._log(f"   • {len(responses_list) - len(pending)} résultat(s) déjà en cache")
+        
+        if pending:
+            all_texts = []
+            for i in pending:
+                all_texts.extend(self._scoring_texts(responses_list[i]))
+            
+            text_similarities = self._text_similarities(all_texts, batch_size=batch_size)
+            self._log(f"   • {len(text_similarities)} texte(s) distinct(s) encodé(s)")
+            if on_event is not None:
+                on_event(clock.event(analysis_events.SIMILARITY, {'texts': len(text_similarities)}))
+            
+            with self._quiet_logs():
+                for i in pending:
+                    if on_event is None:
+                        results = self._compute_results(responses_list[i], text_similarities)
+                    else:
+                        for kind, data in self._compute_stages(responses_list[i], text_similarities):
+                            if kind == analysis_events.DONE:
+                                results = data
+                            else:
+                                on_event(clock.event(kind, data, index=i))
+                    results = convert_numpy_types(results)
+                    if cache_keys[i] is not None:
+                        self.result_cache.put(cache_keys[i], results)
+                    results_list[i] = results
+        
+        self._log("✅ Analyse par lot terminée !")
+        
+        return results_list
+    
+    
+    def _compute_results(self, responses: Dict, text_similarities: Dict[str, np.ndarray]) -> Dict:
+        """
+        Calculer tous les scores d'un questionnaire (sans modifier l'analyseur)
+        
+        Args:
+            responses: Dictionnaire des réponses
+            text_similarities: Similarités déjà calculées pour les textes Q1 / Q5
+            
+        Returns:
+            Résumé des résultats (format de get_results_summary)
+        """
+        for kind, data in self._compute_stages(responses, text_similarities):
+            if kind == analysis_events.DONE:
+                return data
+    
+    
+    def _compute_stages(self, responses: Dict, text_similarities: Dict[str, np.ndarray]) -> Iterator[Tuple[str, Dict]]:
+        """
+        Calculer les scores d'un questionnaire étape par étape
+        
+        Yields:
+            (BLOCK, {'bloc_id', 'result'}) pour chaque bloc, (COVERAGE, ...), (JOBS, ...),
+            puis (DONE, résumé des résultats)
+        """
         # Extraire les données des 5 questions
         q1_parcours = responses.get('q1_parcours', '')
         q2_domaines = responses.get('q2_domaines', [])
@@ -178,92 +1187,209 @@ class SemanticAnalyzer:
         q4_outils = responses.get('q4_outils', [])
         q5_experiences = responses.get('q5_experiences', {})
         
-        print(f"\n📝 Q1 - Parcours : {len(q1_parcours)} caractères")
-        print(f"📊 Q2 - Domaines sélectionnés : {len(q2_domaines)}")
-        print(f"📈 Q3 - Niveaux évalués : {len(q3_niveaux)}")
-        print(f"🔧 Q4 - Outils maîtrisés : {len(q4_outils)}")
-        print(f"💼 Q5 - Expériences par domaine : {len(q5_experiences)} domaine(s)")
+        self._log(f"\n📝 Q1 - Parcours : {len(q1_parcours)} caractères")
+        self._log(f"📊 Q2 - Domaines sélectionnés : {len(q2_domaines)}")
+        self._log(f"📈 Q3 - Niveaux évalués : {len(q3_niveaux)}")
+        self._log(f"🔧 Q4 - Outils maîtrisés : {len(q4_outils)}")
+        self._log(f"💼 Q5 - Expériences par domaine : {len(q5_experiences)} domaine(s)")
         
         # Afficher détails Q5
         for domain, exp_text in q5_experiences.items():
             word_count = len(exp_text.split())
-            print(f"    • {domain} : {word_count} mots")
+            self._log(f"    • {domain} : {word_count} mots")
         
         # Analyser le texte libre avec SBERT (Q1)
-        print(f"\n{'='*60}")
-        print("🧠 ANALYSE SÉMANTIQUE DU TEXTE LIBRE (Q1)")
-        print(f"{'='*60}")
+        self._log(f"\n{'='*60}")
+        self._log("🧠 ANALYSE SÉMANTIQUE DU TEXTE LIBRE (Q1)")
+        self._log(f"{'='*60}")
+        
+        all_similarities = self._analyze_text_sbert(q1_parcours, text_similarities.get(q1_parcours))
         
-        all_similarities = self._analyze_text_sbert(q1_parcours)
+        # Qualité sémantique de chaque texte Q5 pour chaque bloc (top 5)
+        experience_quality = {}
+        for source_domain, experience_text in q5_experiences.items():
+            if experience_text in text_similarities:
+                experience_quality[source_domain] = self._block_topk_means(
+                    text_similarities[experience_text], k=5
+                )
         
         # Calculer les scores par bloc
+        block_scores = {}
+        detected_competencies = {}
         for bloc_id in range(1, 6):
-            print(f"\n📊 Calcul du score Bloc {bloc_id}...")
-            self._calculate_bloc_score(
+            self._checkpoint()
+            self._log(f"\n📊 Calcul du score Bloc {bloc_id}...")
+            bloc_result = self._calculate_bloc_score(
                 bloc_id, 
                 all_similarities,
                 q2_domaines,
                 q3_niveaux,
                 q4_outils,
                 q5_experiences,
-                q1_parcours  # ✅ NOUVEAU : Passer le texte Q1 pour détecter outils
+                q1_parcours,  # ✅ NOUVEAU : Passer le texte Q1 pour détecter outils
+                experience_quality
             )
+            block_scores[f'bloc{bloc_id}'] = bloc_result
+            detected_competencies[f'bloc{bloc_id}'] = bloc_result['detected_competencies']
+            yield analysis_events.BLOCK, {'bloc_id': bloc_id, 'result': bloc_result}
         
         # Calculer le coverage score global
-        self._calculate_global_coverage_score()
+        self._checkpoint()
+        coverage_score = self._calculate_global_coverage_score(block_scores)
+        yield analysis_events.COVERAGE, {'coverage_score': coverage_score}
         
         # Recommander les métiers
-        self._recommend_jobs()
+        self._checkpoint()
+        recommended_jobs = self._recommend_jobs(block_scores, detected_competencies)
+        yield analysis_events.JOBS, {'recommended_jobs': recommended_jobs}
+        
+        yield analysis_events.DONE, {
+            'coverage_score': coverage_score,
+            'block_scores': block_scores,
+            'detected_competencies': detected_competencies,
+            'recommended_jobs': recommended_jobs
+        }
+    
+    
+    def _scoring_signature(self) -> Dict:
+        """
+        Décrire tout ce qui influence le résultat d'une analyse
+        (hors réponses) : sert de clé au cache des résultats
+        """
+        if self.embedding_server is not None:
+            similarity = self.embedding_server.server_info['similarity']
+        else:
+            similarity = self._similarity_signature()
+        return {
+            'engine': ENGINE_VERSION,
+            'model': self.model_id,
+            'catalog': self.catalog_version,
+            **similarity,
+            'chunking': f"{config.CHUNK_MAX_WORDS}-{config.CHUNK_MAX_COUNT}-{config.CHUNK_POOLING}"
+        }
+    
+    
+    def _similarity_signature(self) -> Dict:
+        """Paramètres du calcul des similarités (repris tels quels par les clients du serveur d'embeddings)"""
+        return {
+            'embedding_cache_dtype': self.embedding_cache.dtype.name,
+            'embedding_storage': self.embedding_storage,
+            'ann_index': (
+                f"ivf-{self.ann_index.n_lists}-{self.ann_index.n_probe}-{config.ANN_TOP_K}"
+                if self.ann_index is not None else 'exact'
+            ),
+            'projection': self.projection.output_dim if self.projection is not None else None
+        }
+    
+    
+    def _restore_results(self, results: Dict):
+        """
+        Recharger l'état de l'analyseur depuis un résumé de résultats
         
-        print("\n✅ Analyse terminée !")
-        print("=" * 60)
+        Args:
+            results: Dictionnaire produit par get_results_summary()
+        """
+        self.coverage_score = results['coverage_score']
+        self.block_scores = results['block_scores']
+        self.detected_competencies = results['detected_competencies']
+        self.recommended_jobs = results['recommended_jobs']
     
     
-    def _analyze_text_sbert(self, user_text: str) -> List[Dict]:
+    def _analyze_text_sbert(self, user_text: str, similarities: np.ndarray = None) -> np.ndarray:
         """
         Analyser le texte libre avec SBERT
         Compare le texte aux 430 compétences
         
         Args:
             user_text: Texte libre du parcours utilisateur (Q1)
+            similarities: Similarités déjà calculées (sinon le texte est encodé)
             
         Returns:
-            Liste des similarités pour chaque compétence
+            Vecteur des similarités pour chaque compétence (vide si texte vide)
         """
         if not user_text or len(user_text.strip()) == 0:
-            print("⚠️ Texte libre vide, scores SBERT = 0")
-            return []
+            self._log("⚠️ Texte libre vide, scores SBERT = 0")
+            return np.zeros(0, dtype=np.float32)
         
-        # Encoder le texte utilisateur
-        user_embedding = self.model.encode(user_text, convert_to_tensor=True)
+        # Similarités cosinus avec TOUTES les compétences (un seul produit matriciel)
+        if similarities is None:
+            similarities = self._text_similarities([user_text])[user_text]
         
-        # Calculer similarités avec TOUTES les 430 compétences
-        all_similarities = []
+        # Filtrer les compétences avec similarité > 0.3
+        nb_detected = int(np.count_nonzero(similarities > 0.3))
         
-        for idx, comp_id in enumerate(self.competency_ids):
-            comp_embedding = self.competency_embeddings[idx]
-            
-            # Similarité cosinus
-            similarity = util.cos_sim(user_embedding, comp_embedding).item()
-            
-            # Récupérer les infos de la compétence
-            comp_row = self.competencies_df[
-                self.competencies_df['CompetencyID'] == comp_id
-            ].iloc[0]
-            
-            all_similarities.append({
-                'competency_id': comp_id,
-                'competency_name': comp_row['Competency'],
-                'block_id': comp_row['BlockID'],
-                'similarity': similarity
-            })
+        self._log(f"✅ {nb_detected} compétences détectées (seuil > 0.3)")
         
-        # Filtrer les compétences avec similarité > 0.3
-        detected = [s for s in all_similarities if s['similarity'] > 0.3]
+        return similarities
+    
+    
+    def _top_competencies(self, similarities: np.ndarray, k: int = 5) -> List[Dict]:
+        """Compétences les plus proches d'un texte, tous blocs confondus"""
+        finite = np.flatnonzero(np.isfinite(similarities))
+        k = min(k, len(finite))
+        if k == 0:
+            return []
+        top = finite[np.argpartition(-similarities[finite], k - 1)[:k]]
+        top = top[np.argsort(-similarities[top])]
+        return [
+            {
+                'competency_id': self.competency_ids[idx],
+                'competency_name': self.competency_names[idx],
+                'block_id': int(self.competency_block_ids[idx]),
+                'similarity': float(similarities[idx])
+            }
+            for idx in top
+        ]
+    
+    
+    def _block_topk_means(self, similarities: np.ndarray, k: int, threshold: float = None) -> Dict[int, float]:
+        """
+        Moyenne des k meilleures similarités de chaque bloc
         
-        print(f"✅ {len(detected)} compétences détectées (seuil > 0.3)")
+        Args:
+            similarities: Vecteur de similarités (une valeur par compétence)
+            k: Nombre de meilleures compétences retenues par bloc
+            threshold: Seuil minimal (les similarités <= seuil sont ignorées)
+            
+        Returns:
+            Dictionnaire BlockID → moyenne (0.0 si aucune compétence retenue)
+        """
+        means = {}
+        for bloc_id, indices in self.block_indices.items():
+            block_sims = similarities[indices] if len(similarities) else similarities
+            if threshold is not None:
+                block_sims = block_sims[block_sims > threshold]
+            else:
+                # Compétences non retrouvées par l'index IVF (-inf) ignorées
+                block_sims = block_sims[np.isfinite(block_sims)]
+            if len(block_sims) == 0:
+                means[bloc_id] = 0.0
+                continue
+            kk = min(k, len(block_sims))
+            top_sims = np.partition(block_sims, len(block_sims) - kk)[-kk:]
+            means[bloc_id] = float(np.mean(top_sims))
+        return means
+    
+    
+    def _detected_competencies_for_block(self, similarities: np.ndarray, bloc_id: int) -> List[Dict]:
+        """
+        Compétences d'un bloc détectées dans le texte Q1 (similarité > 0.3)
+        """
+        if len(similarities) == 0:
+            return []
         
-        return all_similarities
+        indices = self.block_indices[bloc_id]
+        detected = indices[similarities[indices] > 0.3]
+        
+        return [
+            {
+                'competency_id': self.competency_ids[idx],
+                'competency_name': self.competency_names[idx],
+                'block_id': int(self.competency_block_ids[idx]),
+                'similarity': float(similarities[idx])
+            }
+            for idx in detected
+        ]
     
     
     def _calculate_tools_score_for_block(
@@ -353,40 +1479,38 @@ class SemanticAnalyzer:
     def _calculate_bloc_score(
         self, 
         bloc_id: int,
-        all_similarities: List[Dict],
+        all_similarities: np.ndarray,
         q2_domaines: List[str],
         q3_niveaux: Dict[str, int],
         q4_outils: List[str],
         q5_experiences: Dict[str, str],
-        q1_parcours: str  # ✅ NOUVEAU
-    ):
+        q1_parcours: str,  # ✅ NOUVEAU
+        experience_quality: Dict[str, Dict[int, float]] = None
+    ) -> Dict:
         """
         Calculer le score d'un bloc spécifique
         
         Args:
             bloc_id: ID du bloc (1-5)
-            all_similarities: Toutes les similarités SBERT
+            all_similarities: Toutes les similarités SBERT du texte Q1
             q2_domaines: Domaines cochés en Q2
             q3_niveaux: Niveaux déclarés en Q3
             q4_outils: Outils sélectionnés en Q4
             q5_experiences: Expériences par domaine en Q5 (DICT)
             q1_parcours: Texte libre Q1 (pour détecter outils)
+            experience_quality: Qualité sémantique (top 5) de chaque texte Q5 par bloc
+            
+        Returns:
+            Détail des scores du bloc
         """
-        bloc_name = self.competencies_df[
-            self.competencies_df['BlockID'] == bloc_id
-        ]['BlockName'].iloc[0]
+        bloc_name = self.block_names.get(bloc_id, f"Bloc {bloc_id}")
         
-        print(f"\n  📦 Bloc {bloc_id} : {bloc_name}")
+        self._log(f"\n  📦 Bloc {bloc_id} : {bloc_name}")
         
         # ===================================
         # 1. SCORE SBERT (40%)
         # ===================================
-        bloc_similarities = [
-            s for s in all_similarities 
-            if s['block_id'] == bloc_id
-        ]
-        
-        detected_comps = [s for s in bloc_similarities if s['similarity'] > 0.3]
+        detected_comps = self._detected_competencies_for_block(all_similarities, bloc_id)
         
         if detected_comps:
             top_sims = sorted([s['similarity'] for s in detected_comps], reverse=True)[:10]
@@ -394,7 +1518,7 @@ class SemanticAnalyzer:
         else:
             sbert_score = 0.0
         
-        print(f"    🧠 Score SBERT : {sbert_score:.3f} ({len(detected_comps)} compétences)")
+        self._log(f"    🧠 Score SBERT : {sbert_score:.3f} ({len(detected_comps)} compétences)")
         
         # ===================================
         # 2. SCORE LIKERT (30%)
@@ -403,10 +1527,10 @@ class SemanticAnalyzer:
         for domaine, niveau in q3_niveaux.items():
             if self.domain_to_block.get(domaine) == bloc_id:
                 likert_score = niveau / 5.0
-                print(f"    📊 Score Likert : {likert_score:.3f} (niveau {niveau}/5)")
+                self._log(f"    📊 Score Likert : {likert_score:.3f} (niveau {niveau}/5)")
                 break        
         if likert_score == 0.0:
-            print(f"    📊 Score Likert : 0.000 (domaine non sélectionné)")
+            self._log(f"    📊 Score Likert : 0.000 (domaine non sélectionné)")
         
         # ===================================
         # 3. SCORE OUTILS (20%) 
@@ -417,9 +1541,9 @@ class SemanticAnalyzer:
             q1_parcours
         )
         
-        print(f"    🔧 Score Outils : {tools_score:.3f}")
-        print(f"       • Outils sélectionnés Q4 pertinents : {nb_q4}")
-        print(f"       • Outils détectés dans texte Q1 : {nb_q1}")
+        self._log(f"    🔧 Score Outils : {tools_score:.3f}")
+        self._log(f"       • Outils sélectionnés Q4 pertinents : {nb_q4}")
+        self._log(f"       • Outils détectés dans texte Q1 : {nb_q1}")
         
         # ===================================
         # 4. BONUS EXPÉRIENCE (10%) - NALYSE TOUS LES TEXTES Q5
@@ -427,6 +1551,7 @@ class SemanticAnalyzer:
         experience_score = 0.0
         best_semantic_quality = 0.0
         best_text_source = None
+        experience_quality = experience_quality or {}
         
         if q5_experiences:
             # ✅ NOUVEAU : Analyser TOUS les textes d'expérience, peu importe le domaine
@@ -439,29 +1564,12 @@ class SemanticAnalyzer:
                     # Texte trop court, on passe
                     continue
                 
-                # NALYSE SÉMANTIQUE : Calculer similarité avec compétences du bloc actuel
-                # Encoder le texte d'expérience
-                exp_embedding = self.model.encode(experience_text, convert_to_tensor=True)
-                
-                # Calculer similarités avec les compétences de CE BLOC UNIQUEMENT
-                bloc_similarities = []
-                for idx, comp_id in enumerate(self.competency_ids):
-                    comp_row = self.competencies_df[
-                        self.competencies_df['CompetencyID'] == comp_id
-                    ].iloc[0]
-                    
-                    # Filtrer uniquement les compétences du bloc actuel
-                    if comp_row['BlockID'] == bloc_id:
-                        comp_embedding = self.competency_embeddings[idx]
-                        similarity = util.cos_sim(exp_embedding, comp_embedding).item()
-                        bloc_similarities.append(similarity)
-                
-                # Score de qualité sémantique (moyenne des top 5 similarités)
-                if bloc_similarities:
-                    top_sims = sorted(bloc_similarities, reverse=True)[:5]
-                    semantic_quality = np.mean(top_sims)
-                else:
-                    semantic_quality = 0.0
+                # NALYSE SÉMANTIQUE : qualité = moyenne des top 5 similarités
+                # avec les compétences de CE BLOC UNIQUEMENT
+                if source_domain not in experience_quality:
+                    similarities = self._text_similarities([experience_text])[experience_text]
+                    experience_quality[source_domain] = self._block_topk_means(similarities, k=5)
+                semantic_quality = experience_quality[source_domain][bloc_id]
                 
                 # Score de longueur (max à 50 mots)
                 length_score = min(word_count / 50.0, 1.0)
@@ -484,14 +1592,14 @@ class SemanticAnalyzer:
                 best_semantic_quality = best_exp['semantic_quality']
                 best_text_source = best_exp['source_domain']
                 
-                print(f"    💼 Score Expérience : {experience_score:.3f}")
-                print(f"       • Source : {best_text_source}")
-                print(f"       • Qualité sémantique : {best_semantic_quality:.3f}")
-                print(f"       • Longueur : {best_exp['length_score']:.3f} ({best_exp['word_count']} mots)")
+                self._log(f"    💼 Score Expérience : {experience_score:.3f}")
+                self._log(f"       • Source : {best_text_source}")
+                self._log(f"       • Qualité sémantique : {best_semantic_quality:.3f}")
+                self._log(f"       • Longueur : {best_exp['length_score']:.3f} ({best_exp['word_count']} mots)")
             else:
-                print(f"    💼 Score Expérience : 0.000 (textes trop courts < 20 mots)")
+                self._log(f"    💼 Score Expérience : 0.000 (textes trop courts < 20 mots)")
         else:
-            print(f"    💼 Score Expérience : 0.000 (pas d'expérience déclarée)")
+            self._log(f"    💼 Score Expérience : 0.000 (pas d'expérience déclarée)")
         
         # ===================================
         # CALCUL FINAL PONDÉRÉ
@@ -510,10 +1618,9 @@ class SemanticAnalyzer:
             weights['experience'] * experience_score
         )
         
-        print(f"    ⭐ SCORE FINAL BLOC {bloc_id} : {bloc_score:.3f}")
+        self._log(f"    ⭐ SCORE FINAL BLOC {bloc_id} : {bloc_score:.3f}")
         
-        # Stocker les résultats
-        self.block_scores[f'bloc{bloc_id}'] = {
+        return {
             'score': bloc_score,
             'sbert_score': sbert_score,
             'likert_score': likert_score,
@@ -521,18 +1628,22 @@ class SemanticAnalyzer:
             'experience_score': experience_score,
             'detected_competencies': detected_comps
         }
-        
-        self.detected_competencies[f'bloc{bloc_id}'] = detected_comps
     
     
-    def _calculate_global_coverage_score(self):
+    def _calculate_global_coverage_score(self, block_scores: Dict) -> float:
         """
         ÉTAPE 4 : Calculer le Coverage Score global
         Formule : moyenne pondérée des 5 blocs
+        
+        Args:
+            block_scores: Scores détaillés par bloc
+            
+        Returns:
+            Coverage score (0-1)
         """
-        print("\n" + "=" * 60)
-        print("📊 CALCUL DU COVERAGE SCORE GLOBAL")
-        print("=" * 60)
+        self._log("\n" + "=" * 60)
+        self._log("📊 CALCUL DU COVERAGE SCORE GLOBAL")
+        self._log("=" * 60)
         
         weights = {
             'bloc1': 1.0,
@@ -543,30 +1654,45 @@ class SemanticAnalyzer:
         }
         
         numerator = sum(
-            weights[bloc_key] * self.block_scores[bloc_key]['score']
-            for bloc_key in self.block_scores
+            weights[bloc_key] * block_scores[bloc_key]['score']
+            for bloc_key in block_scores
         )
         denominator = sum(weights.values())
         
-        self.coverage_score = numerator / denominator
+        coverage_score = numerator / denominator
         
-        print(f"\n✨ COVERAGE SCORE GLOBAL : {self.coverage_score:.3f}")
-        print("=" * 60)
+        self._log(f"\n✨ COVERAGE SCORE GLOBAL : {coverage_score:.3f}")
+        self._log("=" * 60)
         
-        print("\n📋 Détail des scores par bloc :")
-        for bloc_key in sorted(self.block_scores.keys()):
-            score = self.block_scores[bloc_key]['score']
-            print(f"  • {bloc_key.upper()} : {score:.3f}")
+        self._log("\n📋 Détail des scores par bloc :")
+        for bloc_key in sorted(block_scores.keys()):
+            score = block_scores[bloc_key]['score']
+            self._log(f"  • {bloc_key.upper()} : {score:.3f}")
+        
+        return coverage_score
     
     
-    def _recommend_jobs(self):
+    def _recommend_jobs(self, block_scores: Dict, detected_competencies: Dict) -> List[Dict]:
         """
         ÉTAPE 5 : Recommander les 3 meilleurs métiers
         Match le profil utilisateur avec les 15 métiers
+        
+        Args:
+            block_scores: Scores détaillés par bloc
+            detected_competencies: Compétences détectées par bloc
+            
+        Returns:
+            TOP 3 des métiers triés par score de match
         """
-        print("\n" + "=" * 60)
-        print("🎯 RECOMMANDATION DES MÉTIERS")
-        print("=" * 60)
+        self._log("\n" + "=" * 60)
+        self._log("🎯 RECOMMANDATION DES MÉTIERS")
+        self._log("=" * 60)
+        
+        detected_ids = {
+            comp['competency_id']
+            for comps in detected_competencies.values()
+            for comp in comps
+        }
         
         job_scores = []
         
@@ -575,7 +1701,7 @@ class SemanticAnalyzer:
             job_title = job_row['JobTitle']
             required_comps = job_row['RequiredCompetencies'].split(';')
             
-            match_score = self._calculate_job_match(required_comps)
+            match_score = self._calculate_job_match(required_comps, block_scores, detected_ids)
             
             job_scores.append({
                 'job_id': job_id,
@@ -586,21 +1712,30 @@ class SemanticAnalyzer:
         
         job_scores.sort(key=lambda x: x['match_score'], reverse=True)
         
-        self.recommended_jobs = job_scores[:3]
+        recommended_jobs = job_scores[:3]
+        
+        self._log("\n🏆 TOP 3 MÉTIERS RECOMMANDÉS :")
+        for i, job in enumerate(recommended_jobs, 1):
+            self._log(f"  {i}. {job['job_title']} - Score : {job['match_score']:.1f}%")
         
-        print("\n🏆 TOP 3 MÉTIERS RECOMMANDÉS :")
-        for i, job in enumerate(self.recommended_jobs, 1):
-            print(f"  {i}. {job['job_title']} - Score : {job['match_score']:.1f}%")
+        self._log("=" * 60)
         
-        print("=" * 60)
+        return recommended_jobs
     
     
-    def _calculate_job_match(self, required_competencies: List[str]) -> float:
+    def _calculate_job_match(
+        self,
+        required_competencies: List[str],
+        block_scores: Dict,
+        detected_ids: set
+    ) -> float:
         """
         Calculer le score de match entre profil utilisateur et un métier
         
         Args:
             required_competencies: Liste des IDs de compétences requises
+            block_scores: Scores détaillés par bloc
+            detected_ids: IDs des compétences détectées par SBERT
             
         Returns:
             Score de match en pourcentage (0-100)
@@ -613,21 +1748,16 @@ class SemanticAnalyzer:
         for comp_id in required_competencies:
             comp_id = comp_id.strip()
             
-            comp_row = self.competencies_df[
-                self.competencies_df['CompetencyID'] == comp_id
-            ]
+            idx = self.competency_index.get(comp_id)
             
-            if comp_row.empty:
+            if idx is None:
                 continue
             
-            bloc_id = comp_row.iloc[0]['BlockID']
+            bloc_id = self.competency_block_ids[idx]
             bloc_key = f'bloc{bloc_id}'
             
-            if bloc_key in self.block_scores:
-                bloc_score = self.block_scores[bloc_key]['score']
-                
-                detected_comps = self.detected_competencies.get(bloc_key, [])
-                detected_ids = [c['competency_id'] for c in detected_comps]
+            if bloc_key in block_scores:
+                bloc_score = block_scores[bloc_key]['score']
                 
                 if comp_id in detected_ids:
                     comp_score = min(bloc_score * 1.2, 1.0)
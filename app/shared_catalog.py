@@ -0,0 +1,174 @@
+"""
+AISCA - Segment Partagé du Catalogue entre Processus
+L'interface Streamlit, le scorer par lot et les workers d'API tournent sur la même
+machine : plutôt que chacun garde sa copie de la matrice des compétences, le premier
+analyseur publie un segment (fichier mmap, dans /dev/shm si disponible) contenant :
+- la matrice stockée (float32 / float16 / int8) et ses échelles
+- les lignes de chaque bloc (tableau concaténé + offsets)
+- la table des CompetencyID
+
+Les autres analyseurs s'y attachent sans copie : les tableaux NumPy sont des vues
+en lecture seule sur les pages partagées. Le nom et l'en-tête du segment portent
+une empreinte de version (contenu encodé, blocs, modèle, stockage, projection) :
+un segment d'une autre version n'est jamais utilisé.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.embedding_store import EmbeddingMatrix
+
+
+SEGMENT_MAGIC = b'AISCASEG'
+SEGMENT_LAYOUT = 1
+
+# Alignement des tableaux dans le segment (lignes de cache)
+ALIGNMENT = 64
+
+
+def compute_segment_key(
+    model_id: str,
+    content_hash: str,
+    block_ids: np.ndarray,
+    storage: str,
+    projection_dim: Optional[int]
+) -> str:
+    """Empreinte de tout ce qui détermine le contenu du segment"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([SEGMENT_LAYOUT, model_id, content_hash, storage, projection_dim]).encode('utf-8'))
+    digest.update(np.ascontiguousarray(block_ids, dtype=np.int64).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+class SharedCatalogSegment:
+    """
+    Vues zéro copie sur un segment de catalogue publié
+    """
+
+    def __init__(self, path: str, key: str, matrix: EmbeddingMatrix,
+                 block_indices: Dict[int, np.ndarray], competency_ids: List[str]):
+        self.path = path
+        self.key = key
+        self.matrix = matrix
+        self.block_indices = block_indices
+        self.competency_ids = competency_ids
+
+    @staticmethod
+    def segment_path(directory: str, model_id: str, key: str) -> str:
+        safe_model_id = model_id.replace('/', '_')
+        return str(Path(directory) / f"aisca-{safe_model_id}-{key}.seg")
+
+    @classmethod
+    def publish(
+        cls,
+        directory: str,
+        model_id: str,
+        key: str,
+        matrix: EmbeddingMatrix,
+        block_indices: Dict[int, np.ndarray],
+        competency_ids: List[str]
+    ) -> str:
+        """
+        Écrire le segment (écriture atomique) et retirer ceux des versions précédentes
+
+        Returns:
+            Chemin du segment
+        """
+        block_ids = sorted(block_indices)
+        arrays = {
+            'data': matrix.data,
+            'block_rows': np.concatenate([block_indices[b] for b in block_ids]).astype(np.int64),
+            'block_offsets': np.cumsum([0] + [len(block_indices[b]) for b in block_ids]).astype(np.int64),
+            'ids': np.frombuffer('\n'.join(map(str, competency_ids)).encode('utf-8'), dtype=np.uint8)
+        }
+        if matrix.scales is not None:
+            arrays['scales'] = matrix.scales
+
+        # En-tête : version, mode de stockage, position et forme de chaque tableau
+        header = {'key': key, 'mode': matrix.mode, 'block_ids': block_ids, 'arrays': {}}
+        offset = 0
+        for name, array in arrays.items():
+            header['arrays'][name] = {'offset': offset, 'dtype': array.dtype.str, 'shape': list(array.shape)}
+            offset = _align(offset + array.nbytes)
+        header_bytes = json.dumps(header).encode('utf-8')
+        data_start = _align(len(SEGMENT_MAGIC) + 8 + len(header_bytes))
+
+        Path(directory).mkdir(parents=True, exist_ok=True)
+        path = cls.segment_path(directory, model_id, key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(SEGMENT_MAGIC)
+            f.write(len(header_bytes).to_bytes(8, 'little'))
+            f.write(header_bytes)
+            for name, array in arrays.items():
+                f.seek(data_start + header['arrays'][name]['offset'])
+                f.write(np.ascontiguousarray(array).tobytes())
+        os.replace(tmp_path, path)
+
+        # Les processus déjà attachés à un ancien segment gardent leur mapping
+        pattern = Path(cls.segment_path(directory, model_id, '?' * len(key))).name
+        for old in Path(directory).glob(pattern):
+            if str(old) != path:
+                try:
+                    old.unlink()
+                except OSError:
+                    pass
+
+        return path
+
+    @classmethod
+    def attach(cls, directory: str, model_id: str, key: str) -> Optional['SharedCatalogSegment']:
+        """
+        S'attacher au segment d'une version donnée
+
+        Returns:
+            Le segment, ou None s'il est absent, incomplet ou d'une autre version
+        """
+        path = cls.segment_path(directory, model_id, key)
+        try:
+            with open(path, 'rb') as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        try:
+            if buffer[:len(SEGMENT_MAGIC)] != SEGMENT_MAGIC:
+                return None
+            header_len = int.from_bytes(buffer[8:16], 'little')
+            header = json.loads(buffer[16:16 + header_len].decode('utf-8'))
+            if header.get('key') != key:
+                return None
+            data_start = _align(16 + header_len)
+
+            arrays = {}
+            for name, spec in header['arrays'].items():
+                dtype = np.dtype(spec['dtype'])
+                count = int(np.prod(spec['shape']))
+                start = data_start + spec['offset']
+                if start + count * dtype.itemsize > len(buffer):
+                    return None
+                # Vue directe sur les pages du fichier (lecture seule, aucune copie)
+                arrays[name] = np.frombuffer(buffer, dtype=dtype, count=count, offset=start).reshape(spec['shape'])
+        except (ValueError, KeyError):
+            return None
+
+        offsets = arrays['block_offsets']
+        block_indices = {
+            block_id: arrays['block_rows'][offsets[i]:offsets[i + 1]]
+            for i, block_id in enumerate(header['block_ids'])
+        }
+        competency_ids = bytes(arrays['ids']).decode('utf-8').split('\n') if len(arrays['ids']) else []
+        matrix = EmbeddingMatrix(arrays['data'], header['mode'], arrays.get('scales'))
+
+        return cls(path, key, matrix, block_indices, competency_ids)
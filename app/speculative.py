@@ -0,0 +1,108 @@
+"""
+AISCA - Encodage Spéculatif pendant le Questionnaire
+Q1 est saisi bien avant Q2-Q5, mais rien n'était encodé avant la page d'analyse.
+Dès qu'un texte libre est validé (Q1, ou une expérience Q5 d'au moins 20 mots),
+ses morceaux sont encodés en arrière-plan : les embeddings vont dans le cache
+d'embeddings de l'analyseur, et l'analyse finale n'a presque plus rien à encoder.
+
+Un SpeculativeEncoder par session (un texte en attente par champ : une nouvelle
+version du texte remplace l'ancienne si son encodage n'a pas commencé) ; un
+exécuteur à un seul thread partagé par le processus, pour ne pas concurrencer
+les analyses en cours. La spéculation est sans garantie : une erreur est ignorée.
+"""
+
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Sequence
+
+from app import config
+
+
+def make_executor(max_workers: int = 1) -> ThreadPoolExecutor:
+    """Exécuteur partagé des encodages spéculatifs"""
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='aisca-speculative')
+
+
+class SpeculativeEncoder:
+    """
+    Encodages d'avance des textes d'une session, par champ du questionnaire
+    """
+
+    def __init__(self, analyzer_loader: Callable, executor: Executor = None):
+        """
+        Args:
+            analyzer_loader: Renvoie le SemanticAnalyzer partagé (appelé dans le thread
+                             de fond : le modèle peut se charger pendant que l'utilisateur répond)
+            executor: Exécuteur partagé (défaut : un exécuteur propre à un thread)
+        """
+        self.analyzer_loader = analyzer_loader
+        self.executor = executor or make_executor()
+        self._pending = {}
+        self._lock = threading.Lock()
+
+        # Statistiques
+        self.submitted = 0
+        self.superseded = 0
+        self.completed = 0
+        self.failed = 0
+
+    def submit(self, field: str, texts: Sequence[str]) -> Future:
+        """
+        Encoder en arrière-plan les textes validés d'un champ
+
+        Args:
+            field: Champ du questionnaire ('q1', 'q5:<domaine>'...)
+            texts: Textes du champ (textes vides ignorés)
+
+        Returns:
+            Future (True si encodé), ou None s'il n'y a rien à encoder
+        """
+        texts = tuple(text for text in texts if text and text.strip())
+        if not texts:
+            return None
+        with self._lock:
+            previous = self._pending.get(field)
+            if previous is not None:
+                if previous[0] == texts:
+                    return previous[1]
+                # Texte modifié : l'ancienne version n'est plus utile
+                if previous[1].cancel():
+                    self.superseded += 1
+            future = self.executor.submit(self._encode, texts)
+            self._pending[field] = (texts, future)
+            self.submitted += 1
+        return future
+
+    def _encode(self, texts) -> bool:
+        try:
+            analyzer = self.analyzer_loader()
+            with analyzer._quiet_logs():
+                analyzer.prefetch(list(texts))
+        except Exception as e:
+            self.failed += 1
+            print(f"⚠️ Encodage spéculatif ignoré : {type(e).__name__}: {e}")
+            return False
+        self.completed += 1
+        return True
+
+    def wait(self, timeout: float = config.SPECULATIVE_MAX_WAIT_S) -> bool:
+        """
+        Attendre les encodages en cours de la session (plutôt que de refaire le même travail)
+
+        Returns:
+            True si tous sont terminés dans le délai
+        """
+        with self._lock:
+            futures = [future for _, future in self._pending.values()]
+        if not futures:
+            return True
+        _, not_done = wait(futures, timeout)
+        return not not_done
+
+    def stats(self) -> Dict:
+        return {
+            'submitted': self.submitted,
+            'superseded': self.superseded,
+            'completed': self.completed,
+            'failed': self.failed
+        }
@@ -0,0 +1,96 @@
+"""
+AISCA - Découpage des Textes Longs
+Le modèle SBERT tronque silencieusement les textes au-delà de sa longueur maximale
+(128 tokens pour MiniLM, soit ~80 mots) : un long parcours Q1 perdait donc
+l'essentiel de son contenu.
+
+Les textes longs sont découpés en morceaux de phrases (au plus max_words mots),
+tous les morceaux sont encodés dans le même batch, puis les similarités
+sont agrégées par compétence (max ou moyenne des k meilleurs morceaux).
+Le coût d'encodage devient linéaire en la longueur du texte, et borné.
+"""
+
+import re
+from typing import List
+
+import numpy as np
+
+
+POOLING_MODES = ('max', 'topk')
+
+_SENTENCE_END = re.compile(r'(?<=[.!?;])\s+|\n+')
+
+
+def _word_windows(words: List[str], max_words: int, overlap: int) -> List[str]:
+    """Fenêtres glissantes de mots (phrases trop longues pour un seul morceau)"""
+    step = max(1, max_words - overlap)
+    windows = []
+    for start in range(0, len(words), step):
+        windows.append(' '.join(words[start:start + max_words]))
+        if start + max_words >= len(words):
+            break
+    return windows
+
+
+def split_into_chunks(text: str, max_words: int = 80, max_chunks: int = 32, overlap: int = 10) -> List[str]:
+    """
+    Découper un texte en morceaux de phrases d'au plus max_words mots
+
+    Args:
+        text: Texte utilisateur
+        max_words: Taille maximale d'un morceau (0 : pas de découpage)
+        max_chunks: Nombre maximal de morceaux (les suivants sont ignorés)
+        overlap: Mots partagés entre deux fenêtres d'une même phrase trop longue
+
+    Returns:
+        [text] si le texte est assez court, sinon la liste des morceaux
+    """
+    if max_words <= 0 or len(text.split()) <= max_words:
+        return [text]
+
+    chunks = []
+    current = []
+    for sentence in _SENTENCE_END.split(text):
+        words = sentence.split()
+        if not words:
+            continue
+        if len(words) > max_words:
+            if current:
+                chunks.append(' '.join(current))
+                current = []
+            chunks.extend(_word_windows(words, max_words, overlap))
+            continue
+        if len(current) + len(words) > max_words:
+            chunks.append(' '.join(current))
+            current = []
+        current.extend(words)
+    if current:
+        chunks.append(' '.join(current))
+
+    return chunks[:max_chunks]
+
+
+def pool_chunk_similarities(similarities: np.ndarray, mode: str = 'max', k: int = 2) -> np.ndarray:
+    """
+    Agréger les similarités des morceaux d'un texte, compétence par compétence
+
+    Args:
+        similarities: Matrice (nb_morceaux, nb_compétences) ; -inf = non retrouvée
+        mode: 'max' (meilleur morceau) ou 'topk' (moyenne des k meilleurs morceaux)
+        k: Nombre de morceaux moyennés en mode 'topk'
+
+    Returns:
+        Vecteur (nb_compétences,)
+    """
+    if mode not in POOLING_MODES:
+        raise ValueError(f"❌ Agrégation inconnue : {mode} (attendu : {POOLING_MODES})")
+    if len(similarities) == 1:
+        return similarities[0]
+    if mode == 'max':
+        return similarities.max(axis=0)
+
+    top = np.sort(similarities, axis=0)[-k:]
+    finite = np.isfinite(top)
+    counts = finite.sum(axis=0)
+    sums = np.where(finite, top, 0.0).sum(axis=0)
+    return np.where(counts > 0, sums / np.maximum(counts, 1), -np.inf).astype(np.float32)
@@ -1,6 +1,52 @@
 import sys
 from pathlib import Path
 
+import pytest
+
 # Ajouter la racine du projet au PYTHONPATH
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 sys.path.append(str(PROJECT_ROOT))
+
+
+@pytest.fixture(scope="session")
+def analyzer(tmp_path_factory):
+    """
+    Analyseur partagé par tous les tests, construit avec l'encodeur
+    déterministe (aucun modèle à télécharger)
+    """
+    from app.encoders import HashingEncoder
+    from app.semantic_analysis import SemanticAnalyzer
+
+    return SemanticAnalyzer(
+        competencies_path="data/competencies.csv",
+        jobs_path="data/jobs.csv",
+        use_result_cache=False,
+        encoder=HashingEncoder(),
+        artifact_dir=str(tmp_path_factory.mktemp("catalog"))
+    )
+
+
+@pytest.fixture
+def example_responses():
+    """
+    Questionnaire complet réaliste
+    """
+    return {
+        "q1_parcours": (
+            "J'ai 3 ans d'expérience en Data Science. Je maîtrise Python, Pandas et NumPy "
+            "pour le nettoyage et l'analyse de données. J'ai créé des dashboards avec Plotly. "
+            "J'utilise Scikit-learn et XGBoost pour des modèles de classification, et SBERT "
+            "pour de l'analyse de sentiments."
+        ),
+        "q2_domaines": ["Data Analysis & Visualization", "Machine Learning Supervisé"],
+        "q3_niveaux": {"Data Analysis & Visualization": 4, "Machine Learning Supervisé": 3},
+        "q4_outils": ["Python (Pandas, NumPy)", "Plotly", "Scikit-learn", "XGBoost"],
+        "q5_experiences": {
+            "Data Analysis & Visualization": (
+                "J'ai développé plusieurs dashboards interactifs avec Plotly pour visualiser "
+                "les KPIs de vente et automatisé le nettoyage de données avec Pandas pour "
+                "traiter plus de 50 000 lignes par jour."
+            ),
+            "Machine Learning Supervisé": "Modèle de churn avec Random Forest.",
+        },
+    }
@@ -0,0 +1,53 @@
+import threading
+
+import pytest
+
+from app.admission import AdmissionController, Overloaded
+from app.cancellation import AnalysisCancelled, CancellationToken
+
+
+def test_queue_is_fifo_with_positions_and_sheds_when_full():
+    controller = AdmissionController(max_active=1, max_queue=2)
+
+    first = controller.enqueue()
+    second = controller.enqueue()
+    third = controller.enqueue()
+    assert first.admitted and not second.admitted
+    assert (second.position, third.position) == (1, 2)
+
+    with pytest.raises(Overloaded):
+        controller.enqueue()
+    assert controller.shed == 1
+
+    first.release()
+    assert second.admitted and third.position == 1
+    # Durée d'une analyse connue : attente estimée = une vague
+    assert third.eta_s == pytest.approx(controller.mean_service_s)
+
+    second.release()
+    third.release()
+    assert controller.stats()["active"] == 0 and controller.admitted == 3
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    controller = AdmissionController(max_active=1, max_queue=4)
+    running = controller.enqueue()
+    token = CancellationToken()
+    positions = []
+
+    def on_wait(ticket):
+        positions.append(ticket.position)
+        token.cancel("page quittée")
+
+    with pytest.raises(AnalysisCancelled):
+        controller.admit(token, on_wait=on_wait, poll_interval=0.01)
+
+    assert positions == [1]
+    assert controller.queued == 0 and controller.abandoned == 1
+
+    # Le créneau libéré passe à la demande suivante, pas à celle qui est partie
+    waiter = threading.Thread(target=lambda: controller.admit(poll_interval=0.01).release())
+    waiter.start()
+    running.release()
+    waiter.join(5)
+    assert not waiter.is_alive() and controller.admitted == 2
@@ -0,0 +1,95 @@
+import numpy as np
+
+from app.ann_index import IVFIndex, recall_benchmark
+from app.embedding_store import EmbeddingMatrix
+
+
+def clustered_catalog(n=3000, dim=32, seed=0):
+    rng = np.random.default_rng(seed)
+    themes = rng.normal(size=(30, dim))
+    matrix = themes[rng.integers(30, size=n)] + 0.5 * rng.normal(size=(n, dim))
+    matrix = (matrix / np.linalg.norm(matrix, axis=1, keepdims=True)).astype(np.float32)
+    block_ids = rng.integers(1, 6, size=n)
+    return matrix, block_ids
+
+
+def test_recall_reaches_brute_force_when_all_lists_are_probed():
+    """
+    Le rappel augmente avec n_probe et vaut 1 quand toutes les listes sont explorées
+    """
+    matrix, block_ids = clustered_catalog()
+    queries = matrix[:50] + 0.1 * np.random.default_rng(1).normal(size=(50, 32)).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    rows = recall_benchmark(matrix, block_ids, queries, k=10, n_probes=(4, 16, 10000), n_lists=64)
+
+    recalls = [row['recall@10'] for row in rows]
+    assert recalls == sorted(recalls)
+    assert recalls[1] > 0.9
+    assert recalls[-1] == 1.0
+
+
+def test_block_filter_and_exact_rescoring():
+    """
+    La recherche filtrée ne renvoie que des compétences du bloc, avec leurs
+    similarités exactes, même si les premières listes n'en contiennent pas assez
+    """
+    matrix, block_ids = clustered_catalog()
+    store = EmbeddingMatrix.from_float(matrix)
+    index = IVFIndex.build(matrix, block_ids, n_lists=64)
+
+    ids, sims = index.search(matrix[0], store, k=40, n_probe=1, block_id=3)
+
+    assert len(ids) == 40
+    assert set(block_ids[ids]) == {3}
+    np.testing.assert_allclose(sims, matrix[ids] @ matrix[0], rtol=1e-5)
+    assert np.all(np.diff(sims) <= 0)
+
+
+def test_saved_index_is_reused_only_for_the_same_catalog(tmp_path):
+    matrix, block_ids = clustered_catalog(n=500)
+    index = IVFIndex.build(matrix, block_ids, n_lists=16)
+    path = str(tmp_path / "ann_index.npz")
+    index.save(path, {'content_hash': 'abc'})
+
+    reloaded = IVFIndex.load(path, {'content_hash': 'abc'})
+    assert reloaded is not None
+    np.testing.assert_array_equal(reloaded.list_ids, index.list_ids)
+    assert IVFIndex.load(path, {'content_hash': 'autre'}) is None
+
+
+def test_analyzer_with_ivf_index_reuses_artifact_and_matches_exact_scores(analyzer, example_responses, tmp_path):
+    """
+    Un analyseur avec index IVF relit les embeddings sauvegardés (aucun ré-encodage)
+    et donne des scores proches de la recherche exhaustive
+    """
+    from app.encoders import HashingEncoder
+    from app.semantic_analysis import SemanticAnalyzer
+
+    class CountingEncoder(HashingEncoder):
+        calls = 0
+
+        def encode(self, texts, **kwargs):
+            CountingEncoder.calls += len(texts)
+            return super().encode(texts, **kwargs)
+
+    def build():
+        return SemanticAnalyzer(
+            use_result_cache=False,
+            use_micro_batching=False,
+            encoder=CountingEncoder(),
+            artifact_dir=str(tmp_path),
+            ann_index='ivf',
+            warmup='none'
+        )
+
+    build()
+    encoded_at_first_load = CountingEncoder.calls
+    ivf_analyzer = build()
+
+    assert CountingEncoder.calls == encoded_at_first_load
+    assert ivf_analyzer.ann_index is not None
+
+    exact = analyzer.analyze_many([example_responses])[0]
+    approx = ivf_analyzer.analyze_many([example_responses])[0]
+    assert abs(exact['coverage_score'] - approx['coverage_score']) < 0.02
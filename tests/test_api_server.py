@@ -0,0 +1,137 @@
+import http.client
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.api_server import ScoreBatcher, ScoringHTTPServer, ScoringService
+from app.cancellation import CancellationToken, DeadlineExceeded
+
+
+@pytest.fixture(scope="module")
+def service(analyzer):
+    service = ScoringService(analyzer=analyzer, max_concurrency=8, micro_batch_wait_ms=20).start()
+    assert service.ready.wait(30)
+    return service
+
+
+@pytest.fixture(scope="module")
+def server(service):
+    server = ScoringHTTPServer(("127.0.0.1", 0), service)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def request(server, method, path, body=None):
+    conn = http.client.HTTPConnection(*server.server_address, timeout=30)
+    payload = json.dumps(body).encode("utf-8") if body is not None else None
+    conn.request(method, path, payload, {"Content-Type": "application/json"})
+    response = conn.getresponse()
+    data = json.loads(response.read())
+    conn.close()
+    return response.status, data
+
+
+def test_probes_report_warm_model(server, analyzer):
+    status, health = request(server, "GET", "/healthz")
+    assert status == 200 and health["status"] == "ok"
+
+    status, readiness = request(server, "GET", "/readyz")
+    assert status == 200
+    assert readiness["ready"] and readiness["model"] == analyzer.model_id
+    assert readiness["warmup_ms"] is not None
+
+
+def test_not_ready_until_loaded():
+    service = ScoringService(analyzer_kwargs={"encoder_backend": "inconnu"})
+    assert service.readiness()["ready"] is False
+    with pytest.raises(Exception, match="non prêt"):
+        service.score({"q1_parcours": "Python"})
+
+    service._load()
+    assert service.state == "failed" and not service.ready.is_set()
+    assert service.health()["status"] == "failed"
+
+
+def test_score_and_batch_match_analyze_many(server, analyzer, example_responses):
+    expected = analyzer.analyze_many([example_responses])[0]
+
+    status, body = request(server, "POST", "/score", {"responses": example_responses})
+    assert status == 200
+    assert body["results"]["coverage_score"] == pytest.approx(expected["coverage_score"])
+    assert set(body["results"]) == {"coverage_score", "block_scores", "detected_competencies", "recommended_jobs"}
+
+    status, body = request(server, "POST", "/score:batch", {"responses": [example_responses] * 3})
+    assert status == 200
+    assert [r["coverage_score"] for r in body["results"]] == pytest.approx([expected["coverage_score"]] * 3)
+
+
+def test_concurrent_scores_are_micro_batched(server, service, example_responses):
+    batches_before = service.batcher.batches
+
+    def score(i):
+        responses = dict(example_responses, q1_parcours=f"{example_responses['q1_parcours']} Profil {i}.")
+        return request(server, "POST", "/score", {"responses": responses})[0]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        statuses = list(pool.map(score, range(16)))
+
+    assert statuses == [200] * 16
+    assert service.batcher.batches - batches_before < 16
+
+
+def test_invalid_requests_are_rejected(server, service):
+    assert request(server, "POST", "/score", {"responses": {"q2_domaines": "NLP"}})[0] == 400
+    assert request(server, "POST", "/score", {"autre": 1})[0] == 400
+    assert request(server, "POST", "/score:batch", {"responses": [{}] * (service.max_batch_items + 1)})[0] == 413
+    assert request(server, "GET", "/inconnu")[0] == 404
+
+
+def test_requests_past_their_deadline_get_504(server, service, analyzer, example_responses, monkeypatch):
+    text_similarities = analyzer._text_similarities
+
+    def slow_similarities(*args, **kwargs):
+        time.sleep(0.2)
+        return text_similarities(*args, **kwargs)
+
+    monkeypatch.setattr(service, "request_timeout_s", 0.05)
+    monkeypatch.setattr(analyzer, "_text_similarities", slow_similarities)
+    timed_out = service.timed_out
+
+    status, body = request(server, "POST", "/score:batch", {"responses": [dict(example_responses, q1_parcours="NLP et spaCy")]})
+    assert status == 504 and "échéance" in body["error"]
+    assert service.timed_out == timed_out + 1
+
+
+def test_score_batcher_isolates_failures_and_skips_expired_requests():
+    """
+    Un questionnaire qui fait échouer analyze_many n'échoue que pour sa requête ;
+    une requête dont l'échéance est passée n'est pas analysée
+    """
+    calls = []
+
+    def analyze(responses_list, cancel_token=None):
+        calls.append([responses["id"] for responses in responses_list])
+        if any(responses.get("bad") for responses in responses_list):
+            raise ValueError("questionnaire invalide")
+        return [{"id": responses["id"]} for responses in responses_list]
+
+    expired = CancellationToken(timeout=0.01)
+    time.sleep(0.02)
+    items = [
+        ({"id": 0}, CancellationToken()),
+        ({"id": 1, "bad": True}, CancellationToken()),
+        ({"id": 2}, expired),
+        ({"id": 3}, CancellationToken()),
+    ]
+
+    outcomes = ScoreBatcher(analyze)._process(items)
+
+    assert outcomes[0] == {"id": 0} and outcomes[3] == {"id": 3}
+    assert isinstance(outcomes[1], ValueError)
+    assert isinstance(outcomes[2], DeadlineExceeded)
+    assert calls == [[0, 1, 3], [0], [1], [3]]
@@ -0,0 +1,106 @@
+import json
+
+from app.batch_scorer import run_batch
+
+
+def write_responses(directory, name, responses):
+    path = directory / f"responses_{name}.json"
+    path.write_text(json.dumps({"timestamp": name, "responses": responses}), encoding="utf-8")
+    return path
+
+
+def test_batch_scoring_is_resumable(tmp_path, example_responses):
+    """
+    Tous les fichiers sont scorés une seule fois, même après relance
+    """
+    inputs = tmp_path / "responses"
+    inputs.mkdir()
+    for i in range(3):
+        write_responses(inputs, str(i), dict(example_responses, q1_parcours=f"Projet {i} en Python"))
+    (inputs / "responses_broken.json").write_text("{", encoding="utf-8")
+    output = tmp_path / "results.jsonl"
+
+    stats = run_batch([str(inputs)], str(output), workers=1, encoder_backend="hashing")
+    write_responses(inputs, "3", example_responses)
+    resumed = run_batch([str(inputs)], str(output), workers=1, encoder_backend="hashing")
+
+    records = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert (stats["scored"], stats["errors"]) == (3, 1)
+    assert (resumed["scored"], resumed["skipped"]) == (1, 4)
+    assert len({record["source"] for record in records}) == len(records) == 5
+    assert sum("error" in record for record in records) == 1
+
+
+def test_batch_timings_cover_every_stage(tmp_path, example_responses):
+    inputs = tmp_path / "responses"
+    inputs.mkdir()
+    write_responses(inputs, "0", example_responses)
+    output = tmp_path / "results.jsonl"
+
+    stats = run_batch([str(inputs)], str(output), workers=1, encoder_backend="hashing", timings=True)
+
+    record = json.loads(output.read_text(encoding="utf-8"))
+    assert set(record["timings_ms"]) == {
+        "similarity_batch", "block1", "block2", "block3", "block4", "block5", "coverage", "jobs"
+    }
+    assert set(stats["mean_stage_ms"]) == set(record["timings_ms"])
+
+
+def test_malformed_questionnaire_only_fails_its_own_file(tmp_path, example_responses):
+    """
+    Un questionnaire malformé dans un lot n'empêche pas de scorer les autres fichiers
+    du même lot, et il est marqué traité avec son erreur
+    """
+    inputs = tmp_path / "responses"
+    inputs.mkdir()
+    write_responses(inputs, "0", example_responses)
+    write_responses(inputs, "1", dict(example_responses, q1_parcours=None))
+    write_responses(inputs, "2", dict(example_responses, q1_parcours="Projet en Python"))
+    output = tmp_path / "results.jsonl"
+
+    stats = run_batch([str(inputs)], str(output), workers=1, encoder_backend="hashing", timings=True)
+    resumed = run_batch([str(inputs)], str(output), workers=1, encoder_backend="hashing")
+
+    records = {
+        json.loads(line)["source"].rsplit("_", 1)[-1]: json.loads(line)
+        for line in output.read_text(encoding="utf-8").splitlines()
+    }
+    assert (stats["scored"], stats["errors"]) == (2, 1)
+    assert "error" in records["1.json"]
+    assert "results" in records["0.json"] and "results" in records["2.json"]
+    assert "block1" in records["2.json"]["timings_ms"]
+    assert (resumed["scored"], resumed["skipped"]) == (0, 3)
+
+
+def test_crashed_worker_only_fails_its_own_file(tmp_path, example_responses, monkeypatch):
+    """
+    Un worker qui s'arrête (BrokenProcessPool) ne stoppe pas le traitement : le pool
+    est recréé, le fichier fautif est marqué en erreur et tous les autres sont scorés
+    """
+    import os
+
+    from app import batch_scorer
+
+    analyze = batch_scorer._analyze
+
+    def crashing_analyze(responses_list, *args):
+        if any(responses.get("q1_parcours") == "crash" for responses in responses_list):
+            os._exit(1)
+        return analyze(responses_list, *args)
+
+    # Workers forkés : ils héritent de la fonction remplacée
+    monkeypatch.setattr(batch_scorer, "_analyze", crashing_analyze)
+
+    inputs = tmp_path / "responses"
+    inputs.mkdir()
+    for i in range(6):
+        write_responses(inputs, str(i), dict(example_responses, q1_parcours=f"Projet {i} en Python"))
+    write_responses(inputs, "crash", dict(example_responses, q1_parcours="crash"))
+    output = tmp_path / "results.jsonl"
+
+    stats = run_batch([str(inputs)], str(output), workers=2, chunk_size=2, encoder_backend="hashing")
+
+    records = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert (stats["scored"], stats["errors"]) == (6, 1)
+    assert len({record["source"] for record in records}) == len(records) == 7
+    assert [record["source"] for record in records if "error" in record] == [str(inputs / "responses_crash.json")]
@@ -0,0 +1,155 @@
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.catalog import CatalogWatcher
+
+
+@pytest.fixture
+def reloadable_analyzer(tmp_path):
+    """Analyseur sur une copie modifiable du catalogue"""
+    from app.encoders import HashingEncoder
+    from app.semantic_analysis import SemanticAnalyzer
+
+    shutil.copy("data/competencies.csv", tmp_path / "competencies.csv")
+    shutil.copy("data/jobs.csv", tmp_path / "jobs.csv")
+    return SemanticAnalyzer(
+        competencies_path=str(tmp_path / "competencies.csv"),
+        jobs_path=str(tmp_path / "jobs.csv"),
+        use_result_cache=False,
+        use_micro_batching=False,
+        encoder=HashingEncoder(),
+        artifact_dir=str(tmp_path / "catalog"),
+        warmup="none"
+    )
+
+
+def drop_last_competency(path):
+    df = pd.read_csv(path)
+    df.iloc[:-1].to_csv(path, index=False)
+
+
+def test_reload_swaps_snapshot_but_in_flight_analysis_keeps_the_old_one(reloadable_analyzer, example_responses):
+    analyzer = reloadable_analyzer
+    old_catalog = analyzer.catalog
+    drop_last_competency(analyzer.competencies_path)
+
+    with analyzer._pinned_catalog():
+        assert analyzer.reload_catalog()
+        # Analyse « en cours » : toujours l'ancien instantané, de bout en bout
+        assert analyzer.catalog is old_catalog
+        assert len(analyzer.competency_embeddings) == 430
+
+    assert analyzer.catalog is not old_catalog
+    assert len(analyzer.competency_embeddings) == 429
+    assert analyzer.catalog_version != old_catalog.catalog_version
+    assert analyzer.reload_catalog() is False
+
+    results = analyzer.analyze_many([example_responses])[0]
+    assert 0 <= results['coverage_score'] <= 1
+
+
+def test_watcher_waits_for_stable_files_and_keeps_catalog_on_invalid_file(reloadable_analyzer):
+    analyzer = reloadable_analyzer
+    watcher = CatalogWatcher(analyzer, interval=60)
+    old_catalog = analyzer.catalog
+
+    drop_last_competency(analyzer.competencies_path)
+    assert watcher.check() is False  # changement vu, écriture peut-être en cours
+    assert watcher.check() is True
+    assert watcher.reloads == 1
+
+    new_catalog = analyzer.catalog
+    assert new_catalog is not old_catalog
+
+    with open(analyzer.competencies_path, "w", encoding="utf-8") as f:
+        f.write("pas,un,catalogue\n1,2,3\n")
+    watcher.check()
+    assert watcher.check() is False
+    assert analyzer.catalog is new_catalog
+
+
+def test_reload_encodes_only_new_or_modified_rows(reloadable_analyzer):
+    """
+    Une modification de quelques lignes ne ré-encode que ces lignes ;
+    le résultat est identique à un encodage complet
+    """
+    analyzer = reloadable_analyzer
+    encoded = []
+    encode = analyzer.model.encode
+    analyzer.model.encode = lambda texts, **kwargs: (encoded.extend(texts), encode(texts, **kwargs))[1]
+
+    df = pd.read_csv(analyzer.competencies_path)
+    df.loc[0, 'Description'] = "Nouvelle description de la compétence"
+    df.loc[1, 'BlockID'] = 5  # changement de bloc : embedding inchangé
+    new_row = df.iloc[[2]].assign(CompetencyID="NEW01", Competency="Compétence ajoutée")
+    df = pd.concat([df.drop(index=3), new_row], ignore_index=True)
+    df.to_csv(analyzer.competencies_path, index=False)
+
+    assert analyzer.reload_catalog()
+
+    assert len(encoded) == 2
+    catalog = analyzer.catalog
+    expected = analyzer._normalize(encode(catalog.competency_texts))
+    np.testing.assert_allclose(catalog.competency_embeddings.to_float32(), expected, atol=1e-6)
+    assert catalog.competency_block_ids[1] == 5
+
+
+def test_block_change_invalidates_saved_ivf_index(tmp_path):
+    """
+    Changer une compétence de bloc (texte inchangé) reconstruit l'index IVF
+    au lieu de relire un index dont les blocs sont périmés
+    """
+    from app.encoders import HashingEncoder
+    from app.semantic_analysis import SemanticAnalyzer
+
+    shutil.copy("data/competencies.csv", tmp_path / "competencies.csv")
+    shutil.copy("data/jobs.csv", tmp_path / "jobs.csv")
+    analyzer = SemanticAnalyzer(
+        competencies_path=str(tmp_path / "competencies.csv"),
+        jobs_path=str(tmp_path / "jobs.csv"),
+        use_result_cache=False,
+        use_micro_batching=False,
+        encoder=HashingEncoder(),
+        artifact_dir=str(tmp_path / "catalog"),
+        ann_index="ivf",
+        warmup="none"
+    )
+    df = pd.read_csv(analyzer.competencies_path)
+    old_block = analyzer.catalog.competency_block_ids[1]
+    df.loc[1, "BlockID"] = 5 if old_block != 5 else 1
+    df.to_csv(analyzer.competencies_path, index=False)
+    content_hash = analyzer.catalog.content_hash
+
+    assert analyzer.reload_catalog()
+
+    catalog = analyzer.catalog
+    assert catalog.content_hash == content_hash
+    np.testing.assert_array_equal(catalog.ann_index.block_ids, catalog.competency_block_ids)
+
+
+def test_concurrent_artifact_saves_never_share_a_temporary_file(tmp_path):
+    """
+    Deux écrivains simultanés (threads ou processus) ne se disputent pas le même
+    fichier temporaire : les sauvegardes réussissent et l'artefact reste lisible
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    from app.catalog_artifact import CatalogArtifact, load_npz, save_npz
+
+    artifact = CatalogArtifact(str(tmp_path), "model")
+    embeddings = np.random.default_rng(0).normal(size=(200, 64)).astype(np.float32)
+    row_hashes = [str(i) for i in range(200)]
+
+    def save(_):
+        artifact.save(embeddings, "hash", row_hashes)
+        save_npz(artifact.index_path, {"centroids": embeddings}, {"content_hash": "hash"})
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(save, range(32)))
+
+    np.testing.assert_array_equal(artifact.load("hash"), embeddings)
+    assert load_npz(artifact.index_path, {"content_hash": "hash"}) is not None
+    assert not list(artifact.directory.glob("*.tmp"))
@@ -0,0 +1,119 @@
+import numpy as np
+
+from app.embedding_cache import EmbeddingCache, MemmapEmbeddingStore, make_embedding_key
+
+
+def test_key_depends_on_model():
+    """
+    Un même texte encodé par deux modèles n'a pas la même clé
+    """
+    assert make_embedding_key("model-a", "texte") != make_embedding_key("model-b", "texte")
+
+
+def test_memory_budget_evicts_least_recently_used():
+    """
+    Le budget mémoire est respecté en évinçant l'entrée la plus ancienne
+    """
+    vector = np.ones(16, dtype=np.float32)  # 64 octets
+    cache = EmbeddingCache(max_bytes=128)
+
+    cache.put("a", vector)
+    cache.put("b", vector)
+    cache.get("a")
+    cache.put("c", vector)
+
+    assert cache.memory_bytes <= 128
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+
+
+def test_float16_storage_returns_float32():
+    """
+    Le stockage float16 divise la mémoire par deux et renvoie du float32
+    """
+    vector = np.random.default_rng(0).normal(size=384).astype(np.float32)
+    cache = EmbeddingCache(dtype="float16")
+    cache.put("key", vector)
+
+    restored = cache.get("key")
+
+    assert restored.dtype == np.float32
+    assert cache.memory_bytes == 384 * 2
+    assert np.allclose(restored, vector, atol=1e-2)
+
+
+def test_persistent_cache_survives_restart(tmp_path):
+    """
+    Les vecteurs persistés sont relus par une nouvelle instance
+    """
+    path = str(tmp_path / "embeddings" / "model")
+    vector = np.arange(8, dtype=np.float32)
+
+    cache = EmbeddingCache(persist_path=path, persist_capacity=4)
+    cache.put("key", vector)
+    cache.flush()
+
+    reloaded = EmbeddingCache(persist_path=path, persist_capacity=4)
+
+    assert np.array_equal(reloaded.get("key"), vector)
+
+
+def test_persistent_cache_ring_overwrites_oldest(tmp_path):
+    """
+    Au-delà de la capacité disque, les plus anciens vecteurs sont remplacés
+    """
+    path = str(tmp_path / "model")
+    cache = EmbeddingCache(persist_path=path, persist_capacity=2, max_bytes=1)
+    for i in range(3):
+        cache.put(f"key{i}", np.full(4, i, dtype=np.float32))
+    cache.flush()
+
+    reloaded = EmbeddingCache(persist_path=path, persist_capacity=2)
+
+    assert reloaded.get("key0") is None
+    assert np.array_equal(reloaded.get("key2"), np.full(4, 2, dtype=np.float32))
+
+
+def test_stores_sharing_a_path_do_not_overwrite_each_other(tmp_path):
+    """
+    Deux processus sur le même fichier allouent des emplacements distincts,
+    et un emplacement réattribué par l'autre n'est jamais relu sous l'ancienne clé
+    """
+    path = str(tmp_path / "model")
+    first = MemmapEmbeddingStore(path, dtype="float32", capacity=3)
+    second = MemmapEmbeddingStore(path, dtype="float32", capacity=3)
+
+    first.put("key0", np.full(4, 0, dtype=np.float32))
+    first.put("key1", np.full(4, 1, dtype=np.float32))
+    second.put("key2", np.full(4, 2, dtype=np.float32))
+
+    assert np.array_equal(first.get("key1"), np.full(4, 1, dtype=np.float32))
+    assert np.array_equal(second.get("key2"), np.full(4, 2, dtype=np.float32))
+
+    # Anneau plein : le prochain emplacement alloué par l'autre processus est celui de key0
+    second.put("key3", np.full(4, 3, dtype=np.float32))
+
+    assert first.get("key0") is None
+    assert np.array_equal(first.get("key1"), np.full(4, 1, dtype=np.float32))
+
+
+def test_journal_is_compacted_on_reopen(tmp_path):
+    """
+    Le journal ne garde qu'une ligne par vecteur encore présent, sans perdre la position de l'anneau
+    """
+    path = str(tmp_path / "model")
+    store = MemmapEmbeddingStore(path, dtype="float32", capacity=2)
+    for i in range(10):
+        store.put(f"key{i}", np.full(4, i, dtype=np.float32))
+
+    reopened = MemmapEmbeddingStore(path, dtype="float32", capacity=2)
+    with open(f"{path}.index", encoding="utf-8") as f:
+        lines = f.read().splitlines()
+
+    assert len(lines) == 1 + 2
+    assert np.array_equal(reopened.get("key9"), np.full(4, 9, dtype=np.float32))
+
+    reopened.put("key10", np.full(4, 10, dtype=np.float32))
+
+    assert reopened.get("key8") is None
+    assert np.array_equal(reopened.get("key9"), np.full(4, 9, dtype=np.float32))
@@ -0,0 +1,149 @@
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app.embedding_server import EmbeddingServer, RemoteEncoder, pack_texts, unpack_texts
+
+
+@pytest.fixture(scope="module")
+def server(tmp_path_factory):
+    """Démon servi dans un thread (socket dans un répertoire court : limite de 108 octets)"""
+    from app.encoders import HashingEncoder
+    from app.semantic_analysis import SemanticAnalyzer
+
+    analyzer = SemanticAnalyzer(
+        use_result_cache=False,
+        use_micro_batching=True,
+        encoder=HashingEncoder(),
+        artifact_dir=str(tmp_path_factory.mktemp("catalog"))
+    )
+    socket_dir = tempfile.mkdtemp(prefix="aisca-")
+    server = EmbeddingServer(analyzer, str(Path(socket_dir) / "embeddings.sock"))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    analyzer.encoding_service.stop()
+    shutil.rmtree(socket_dir, ignore_errors=True)
+
+
+def client_analyzer(server, **kwargs):
+    from app.semantic_analysis import SemanticAnalyzer
+
+    return SemanticAnalyzer(use_result_cache=False, embedding_server=server.socket_path, **kwargs)
+
+
+def test_texts_round_trip():
+    texts = ["", "Données", "NLP avec SBERT 🚀"]
+    assert unpack_texts(pack_texts(texts)) == texts
+
+
+def test_client_scores_like_the_server_without_a_local_model(server, example_responses):
+    client = client_analyzer(server)
+
+    assert isinstance(client.model, RemoteEncoder)
+    assert client.model_id == server.analyzer.model_id
+    assert client.competency_embeddings is None
+    assert client.encoding_service is None
+    assert client._scoring_signature() == server.analyzer._scoring_signature()
+
+    expected = server.analyzer.analyze_many([example_responses])[0]
+    result = client.analyze_many([example_responses])[0]
+    assert result['coverage_score'] == pytest.approx(expected['coverage_score'])
+    assert result['block_scores'] == expected['block_scores']
+
+    vectors = client.model.encode(["Régression logistique", "Clustering"])
+    np.testing.assert_allclose(vectors, server.analyzer.model.encode(["Régression logistique", "Clustering"]), atol=1e-6)
+
+
+def test_concurrent_requests_are_batched(server):
+    encoder = RemoteEncoder(server.socket_path)
+    service = server.analyzer.encoding_service
+    batches_before = service.batches
+
+    texts = [f"Analyse de données numéro {i}" for i in range(32)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        vectors = list(pool.map(lambda text: encoder.encode([text])[0], texts))
+
+    np.testing.assert_allclose(np.stack(vectors), server.analyzer.model.encode(texts), atol=1e-6)
+    assert service.batches - batches_before < len(texts)
+
+
+def test_connection_burst_is_absorbed(server):
+    """
+    64 threads clients se connectent en même temps (une connexion chacun) :
+    aucune connexion refusée par la file d'attente du démon
+    """
+    encoder = RemoteEncoder(server.socket_path)
+    texts = [f"Tableau de bord {i}" for i in range(64)]
+
+    start = threading.Barrier(len(texts))
+
+    def encode(text):
+        start.wait()
+        return encoder.encode([text])[0]
+
+    with ThreadPoolExecutor(max_workers=len(texts)) as pool:
+        vectors = list(pool.map(encode, texts))
+
+    np.testing.assert_allclose(np.stack(vectors), server.analyzer.model.encode(texts), atol=1e-6)
+
+
+def test_client_waits_for_a_restarting_daemon(server):
+    """
+    Socket absent au moment de la connexion (démon en cours de redémarrage) :
+    le client réessaie jusqu'à ce que le démon écoute
+    """
+    socket_dir = tempfile.mkdtemp(prefix="aisca-")
+    socket_path = str(Path(socket_dir) / "restart.sock")
+    restarted = []
+
+    def restart():
+        restarted.append(EmbeddingServer(server.analyzer, socket_path))
+        threading.Thread(target=restarted[0].serve_forever, daemon=True).start()
+
+    timer = threading.Timer(0.3, restart)
+    timer.start()
+    try:
+        encoder = RemoteEncoder(socket_path)
+        assert encoder.model_id == server.analyzer.model_id
+    finally:
+        timer.join()
+        restarted[0].shutdown()
+        restarted[0].server_close()
+        shutil.rmtree(socket_dir, ignore_errors=True)
+
+
+def test_other_catalog_is_refused(server, tmp_path):
+    competencies = tmp_path / "competencies.csv"
+    lines = Path("data/competencies.csv").read_text(encoding="utf-8").splitlines()
+    competencies.write_text("\n".join(lines[:-1]) + "\n", encoding="utf-8")
+
+    client = client_analyzer(server, competencies_path=str(competencies))
+    with pytest.raises(RuntimeError, match="catalogue"):
+        client.analyze_many([{"q1_parcours": "Python et Pandas pour l'analyse de données"}])
+
+
+def test_client_warmup_sends_a_short_probe(server, monkeypatch):
+    """
+    Le modèle du démon est déjà chaud : le préchauffage d'un client n'encode
+    qu'un texte court (pas le balayage de tailles de batch du mode local)
+    """
+    encoded = []
+    encode = RemoteEncoder.encode
+
+    def counting_encode(self, texts, *args, **kwargs):
+        encoded.append(len(texts))
+        return encode(self, texts, *args, **kwargs)
+
+    monkeypatch.setattr(RemoteEncoder, "encode", counting_encode)
+    client = client_analyzer(server, warmup="sync")
+
+    assert client.ready.is_set()
+    assert encoded == [1]
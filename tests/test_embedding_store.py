@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from app import embedding_store
+from app.embedding_store import EmbeddingMatrix, storage_drift_report, top_k_indices
+
+
+def random_unit_vectors(n, dim=64, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.mark.parametrize("mode, tolerance", [("float16", 1e-3), ("int8", 2e-2)])
+def test_reduced_precision_similarities_stay_close(mode, tolerance, monkeypatch):
+    """
+    Les similarités en précision réduite restent proches du float32,
+    y compris quand le calcul est découpé en plusieurs blocs de lignes
+    """
+    monkeypatch.setattr(embedding_store, "CHUNK_ROWS", 7)
+    matrix = random_unit_vectors(50)
+    queries = random_unit_vectors(3, seed=1)
+
+    store = EmbeddingMatrix.from_float(matrix, mode)
+
+    assert store.similarities(queries).shape == (3, 50)
+    assert np.abs(store.similarities(queries) - queries @ matrix.T).max() < tolerance
+    assert np.abs(store.rows([4, 9]) - matrix[[4, 9]]).max() < tolerance
+
+
+def test_int8_storage_is_about_four_times_smaller():
+    """
+    Le stockage int8 (+ échelle par ligne) divise la mémoire par ~4
+    """
+    matrix = random_unit_vectors(100, dim=384)
+    report = storage_drift_report(matrix, matrix[:10])
+
+    assert report["int8"]["compression"] > 3.9
+    assert report["float16"]["compression"] == pytest.approx(2.0)
+    assert report["int8"]["top10_agreement"] > 0.9
+
+
+def test_drift_report_excludes_self_matches():
+    """
+    Requêtes issues du catalogue : chacune est exclue de son propre classement
+    (sinon elle occupe toujours la première place des deux top-k)
+    """
+    matrix = random_unit_vectors(100, dim=384)
+    ids = np.arange(10)
+    sims = matrix[:10] @ matrix.T
+
+    assert all(i not in top for i, top in zip(ids, top_k_indices(sims, 5, ids)))
+    assert all(i in top for i, top in zip(ids, top_k_indices(sims, 5)))
+
+    report = storage_drift_report(matrix, matrix[:10], k=5, query_ids=ids)
+    assert report["float32"]["top5_agreement"] == 1.0
+
+
+def test_unknown_storage_mode_is_rejected():
+    with pytest.raises(ValueError):
+        EmbeddingMatrix.from_float(random_unit_vectors(2), "int4")
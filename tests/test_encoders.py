@@ -0,0 +1,100 @@
+import json
+
+import numpy as np
+import pytest
+
+from app.encoders import HashingEncoder, check_backend_parity, load_encoder
+
+
+def test_load_encoder_builds_the_hashing_backend():
+    """
+    Le backend 'hashing' produit des vecteurs normalisés et reproductibles
+    """
+    encoder = load_encoder("hashing")
+    vectors = encoder.encode(["Python et Pandas", "Dashboards Plotly"])
+
+    assert isinstance(encoder, HashingEncoder)
+    assert vectors.shape == (2, 384)
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0)
+    assert np.array_equal(vectors, HashingEncoder().encode(["Python et Pandas", "Dashboards Plotly"]))
+
+
+def test_load_encoder_rejects_unknown_backend():
+    with pytest.raises(ValueError):
+        load_encoder("tensorflow")
+
+
+def test_backend_parity_report(analyzer, example_responses, tmp_path):
+    """
+    Un analyseur est à parité avec lui-même ; un encodeur différent est détecté
+    """
+    from app.semantic_analysis import SemanticAnalyzer
+
+    responses_list = [example_responses, dict(example_responses, q1_parcours="Clustering KMeans et SQL.")]
+    other = SemanticAnalyzer(
+        use_result_cache=False,
+        encoder=HashingEncoder(dimension=128, ngram_sizes=(3,)),
+        artifact_dir=str(tmp_path)
+    )
+
+    same = check_backend_parity(analyzer, analyzer, responses_list)
+    different = check_backend_parity(analyzer, other, responses_list, tolerance=0.0)
+
+    assert same["passed"] and same["max_block_delta"] == 0.0
+    assert same["responses"] == 2
+    assert not different["passed"]
+    assert different["max_block_delta"] >= different["mean_block_delta"] > 0.0
+
+
+def write_tiny_onnx_export(export_dir, dim=8):
+    """
+    Export ONNX minimal (table d'embeddings de mots + tokenizer WordPiece),
+    au format attendu par ONNXEncoder, sans téléchargement
+    """
+    onnx = pytest.importorskip("onnx")
+    transformers = pytest.importorskip("transformers")
+    from onnx import TensorProto, helper, numpy_helper
+
+    words = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "python", "pandas", "data", "science", "plotly"]
+    (export_dir / "vocab.txt").write_text("\n".join(words) + "\n", encoding="utf-8")
+    transformers.BertTokenizerFast(str(export_dir / "vocab.txt")).save_pretrained(str(export_dir))
+
+    embeddings = np.random.default_rng(0).normal(size=(len(words), dim)).astype(np.float32)
+    graph = helper.make_graph(
+        [helper.make_node("Gather", ["embeddings", "input_ids"], ["last_hidden_state"])],
+        "tiny-encoder",
+        [
+            helper.make_tensor_value_info("input_ids", TensorProto.INT64, ["batch", "tokens"]),
+            helper.make_tensor_value_info("attention_mask", TensorProto.INT64, ["batch", "tokens"]),
+        ],
+        [helper.make_tensor_value_info("last_hidden_state", TensorProto.FLOAT, ["batch", "tokens", dim])],
+        [numpy_helper.from_array(embeddings, "embeddings")],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)])
+    model.ir_version = 8
+    onnx.save(model, str(export_dir / "model.onnx"))
+    (export_dir / "aisca_encoder.json").write_text(
+        json.dumps({"max_seq_length": 16, "normalize": True}), encoding="utf-8"
+    )
+    return words, embeddings
+
+
+def test_onnx_encoder_mean_pools_and_normalizes(tmp_path):
+    """
+    ONNXEncoder : mean pooling masqué puis normalisation, quel que soit le découpage en batchs
+    """
+    pytest.importorskip("onnxruntime")
+    from app.encoders import ONNXEncoder
+
+    words, embeddings = write_tiny_onnx_export(tmp_path)
+    encoder = ONNXEncoder("tiny", export_dir=str(tmp_path))
+    texts = ["python pandas", "data science plotly python", "pandas"]
+
+    vectors = encoder.encode(texts, batch_size=2)
+
+    for text, vector in zip(texts, vectors):
+        tokens = [words.index("[CLS]")] + [words.index(word) for word in text.split()] + [words.index("[SEP]")]
+        expected = embeddings[tokens].mean(axis=0)
+        assert np.allclose(vector, expected / np.linalg.norm(expected), atol=1e-5)
+    assert np.allclose(vectors, encoder.encode(texts, batch_size=1), atol=1e-6)
+    assert encoder.model_id == "tiny@onnx"
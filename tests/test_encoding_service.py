@@ -0,0 +1,99 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from app.encoding_service import EncodingService
+
+
+class CountingEncoder:
+    """Encodeur factice : vecteur = [longueur du texte], compte les appels"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(len(texts))
+        return np.array([[len(text)] for text in texts], dtype=np.float32)
+
+
+def test_concurrent_requests_are_batched_and_dispatched():
+    """
+    Des demandes simultanées sont regroupées et chacun reçoit ses vecteurs
+    """
+    encoder = CountingEncoder()
+    service = EncodingService(encoder, max_batch_size=64, max_wait_ms=50)
+    results = {}
+
+    def worker(i):
+        results[i] = service.encode(["x" * i, "y" * (i + 100)])
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    service.stop()
+
+    for i in range(16):
+        assert results[i][:, 0].tolist() == [i, i + 100]
+    assert sum(encoder.calls) == 32
+    assert len(encoder.calls) < 16
+
+
+def test_batch_size_limit_is_respected():
+    """
+    Un batch ne dépasse pas la taille maximale (sauf demande isolée plus grande)
+    """
+    encoder = CountingEncoder()
+    service = EncodingService(encoder, max_batch_size=4, max_wait_ms=20)
+
+    futures = [service.submit(["a", "b"]) for _ in range(6)]
+    for future in futures:
+        future.result(timeout=5)
+    service.stop()
+
+    assert max(encoder.calls) <= 4
+
+
+def test_encoder_errors_are_propagated():
+    """
+    Une erreur du modèle est renvoyée à l'appelant
+    """
+    def failing(texts):
+        raise RuntimeError("modèle indisponible")
+
+    service = EncodingService(failing, max_wait_ms=1)
+
+    with pytest.raises(RuntimeError, match="modèle indisponible"):
+        service.encode(["texte"], timeout=5)
+    service.stop()
+
+
+def test_several_workers_encode_batches_in_parallel():
+    """
+    Avec plusieurs threads de fond, plusieurs batchs sont encodés en même temps
+    """
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def slow_encoder(texts):
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+        time.sleep(0.05)
+        with lock:
+            active.pop()
+        return np.zeros((len(texts), 1), dtype=np.float32)
+
+    service = EncodingService(slow_encoder, max_batch_size=1, max_wait_ms=1, workers=3)
+    threads = [threading.Thread(target=service.encode, args=(["texte"],)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    service.stop()
+
+    assert max(peak) == 3 and service.batches == 6
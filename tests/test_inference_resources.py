@@ -0,0 +1,143 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from app import config
+from app.inference_resources import InferenceResources, partition_cores
+
+
+class SlowEncoder:
+    """Encodeur factice : coût fixe par batch, compte les appels simultanés"""
+
+    backend = 'fake'
+    model_id = 'fake'
+
+    def __init__(self, batch_cost=0.002):
+        self.batch_cost = batch_cost
+        self.active = 0
+        self.max_active = 0
+        self.batch_sizes = []
+        self._lock = threading.Lock()
+
+    def encode(self, texts, batch_size=32, show_progress_bar=False):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            self.batch_sizes.append(batch_size)
+        time.sleep(self.batch_cost * -(-len(texts) // batch_size))
+        with self._lock:
+            self.active -= 1
+        return np.zeros((len(texts), 4), dtype=np.float32)
+
+
+def test_semaphore_caps_concurrent_encodes():
+    encoder = SlowEncoder(batch_cost=0.01)
+    resources = InferenceResources(intra_op_threads=1, max_concurrent=2)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda i: resources.encode(encoder, ["texte"]), range(16)))
+
+    assert encoder.max_active == 2
+    assert resources.encodes == 16
+    assert resources.mean_wait_ms > 0
+
+
+def test_calibration_picks_the_fastest_batch_size():
+    encoder = SlowEncoder()
+    resources = InferenceResources(intra_op_threads=1, max_concurrent=1)
+
+    throughput = resources.calibrate(encoder, ["texte"] * 200, candidates=(4, 16, 64))
+
+    assert set(throughput) == {4, 16, 64}
+    assert resources.batch_size == 64
+
+    resources.encode(encoder, ["texte"] * 10, batch_size=8)
+    assert encoder.batch_sizes[-1] == 64
+
+
+def test_analyzer_calibrates_during_warmup(tmp_path):
+    from app.encoders import HashingEncoder
+    from app.semantic_analysis import SemanticAnalyzer
+
+    analyzer = SemanticAnalyzer(
+        use_result_cache=False,
+        encoder=HashingEncoder(),
+        artifact_dir=str(tmp_path),
+        warmup="sync",
+        inference_resources=InferenceResources(intra_op_threads=1, max_concurrent=1)
+    )
+
+    assert analyzer.resources.batch_size in analyzer.resources.calibration
+    assert analyzer.resources.encodes > 0
+
+
+def test_partition_cores_gives_disjoint_subsets():
+    assert partition_cores(3, range(8)) == [(0, 1, 2), (3, 4, 5), (6, 7)]
+    # Plus de répliques que de cœurs : partage à tour de rôle
+    assert partition_cores(3, [0, 1]) == [(0,), (1,), (0,)]
+
+
+def test_replicas_are_checked_out_one_call_at_a_time():
+    replicas = []
+
+    def factory(cores):
+        replicas.append(SlowEncoder(batch_cost=0.01))
+        return replicas[-1]
+
+    primary = factory(None)
+    resources = InferenceResources(intra_op_threads=1, replicas=3)
+    resources.build_replicas(primary, factory)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda i: resources.encode(primary, ["texte"]), range(24)))
+
+    # Chaque réplique sert un appel à la fois, et toutes ont servi
+    assert len(replicas) == 3
+    assert all(encoder.max_active == 1 for encoder in replicas)
+    assert all(encoder.batch_sizes for encoder in replicas)
+
+    stats = resources.stats()["pool"]
+    assert stats["checkouts"] == 24 and stats["idle"] == 3
+    assert stats["max_wait_ms"] > 0
+    assert sum(replica["uses"] for replica in stats["per_replica"]) == 24
+
+
+def test_replicas_without_factory_fall_back_to_a_single_encoder():
+    """
+    Sans fabrique de répliques indépendantes (backend torch), un seul encodeur
+    est gardé avec les threads et la concurrence demandés
+    """
+    primary = SlowEncoder(batch_cost=0.0)
+    resources = InferenceResources(intra_op_threads=2, max_concurrent=3, replicas=4)
+
+    assert resources.build_replicas(primary) is None
+    assert (resources.replicas, resources.replica_cores, resources.pool) == (1, None, None)
+    assert (resources.max_concurrent, resources.intra_op_threads) == (3, 2)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda i: resources.encode(primary, ["texte"]), range(12)))
+
+    assert primary.max_active <= 3
+
+
+def test_replica_factory_pins_cores_only_when_enabled(analyzer, monkeypatch):
+    """
+    Pas de fabrique pour torch ; sans ENCODER_PIN_CORES, aucune affinité de cœurs
+    n'est transmise aux sessions ONNX
+    """
+    import app.semantic_analysis as semantic_analysis
+
+    calls = []
+    monkeypatch.setattr(semantic_analysis, "load_encoder", lambda *args, **kwargs: calls.append(kwargs))
+
+    assert analyzer._make_replica_factory("torch") is None
+    factory = analyzer._make_replica_factory("onnx")
+
+    monkeypatch.setattr(config, "ENCODER_PIN_CORES", True)
+    factory((2, 3))
+    monkeypatch.setattr(config, "ENCODER_PIN_CORES", False)
+    factory((2, 3))
+
+    assert [kwargs["cores"] for kwargs in calls] == [(2, 3), None]
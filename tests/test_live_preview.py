@@ -0,0 +1,74 @@
+import uuid
+
+from app.live_preview import LivePreview
+
+
+def sentence(run, i, topic="Pandas Scikit-learn dashboards"):
+    """Phrase de 30 mots : deux phrases par morceau de 80 mots au plus"""
+    return " ".join([f"Projet{i}", run] + topic.split() * 9 + ["données."])
+
+
+def test_preview_chunks_like_the_final_analysis(analyzer):
+    """
+    L'aperçu encode les mêmes morceaux que l'analyse finale : celle-ci n'a plus
+    rien à encoder et retrouve exactement les mêmes compétences
+    """
+    run = uuid.uuid4().hex
+    sentences = [sentence(run, i) for i in range(6)]
+    text = " ".join(sentences)
+
+    first = analyzer.preview_text(text)
+    assert (first["chunks"], first["encoded"], first["partial"]) == (3, 3, False)
+    assert sorted(first["block_scores"]) == [1, 2, 3, 4, 5]
+
+    misses = analyzer.embedding_cache.misses
+    pooled = analyzer._text_similarities([text])[text]
+    assert analyzer.embedding_cache.misses == misses
+    final = analyzer._top_competencies(analyzer._analyze_text_sbert(text, pooled), 5)
+    assert first["top_competencies"] == final
+
+
+def test_preview_encodes_only_changed_chunks(analyzer):
+    run = uuid.uuid4().hex
+    sentences = [sentence(run, i) for i in range(6)]
+    analyzer.preview_text(" ".join(sentences))
+
+    # Dernière phrase modifiée : seul le dernier morceau est ré-encodé
+    sentences[5] = sentence(run, 5, topic="clustering KMeans ACP")
+    second = analyzer.preview_text(" ".join(sentences))
+    assert (second["chunks"], second["encoded"]) == (3, 1)
+
+    # Latence bornée : au plus max_new_chunks morceaux nouveaux par aperçu
+    more = " ".join(sentences + [sentence(run, 10 + i) for i in range(5)])
+    bounded = analyzer.preview_text(more, max_new_chunks=2)
+    assert (bounded["encoded"], bounded["partial"], bounded["chunks"]) == (2, True, 5)
+
+    assert analyzer.preview_text("   ")["chunks"] == 0
+
+
+def test_live_preview_is_debounced_to_the_latest_text(analyzer):
+    preview = LivePreview(lambda: analyzer, debounce_ms=50)
+    texts = [f"Je fais du NLP avec spaCy {uuid.uuid4().hex[:i + 1]}." for i in range(5)]
+
+    for text in texts:
+        preview.request(text)
+    assert preview.wait(timeout=30)
+
+    assert preview.result_text == texts[-1]
+    assert preview.requests == 5 and preview.updates == 1
+    assert preview.result["elapsed_ms"] > 0
+
+
+def test_live_preview_uses_the_analyzer_resolved_by_the_caller(analyzer):
+    """
+    Analyseur résolu sur le thread du script : le chargeur n'est jamais appelé
+    depuis le thread de l'aperçu
+    """
+    def loader():
+        raise AssertionError("chargeur appelé hors du thread du script")
+
+    preview = LivePreview(loader, debounce_ms=10)
+    preview.request(f"Séries temporelles avec Prophet {uuid.uuid4().hex}.", {"q2_domaines": []}, analyzer)
+    assert preview.wait(timeout=30)
+
+    assert preview.error is None and preview.result is not None
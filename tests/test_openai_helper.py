@@ -0,0 +1,67 @@
+import importlib
+import time
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+from app.cancellation import CancellationToken, DeadlineExceeded
+
+
+@pytest.fixture
+def helper(monkeypatch):
+    """Module importé avec une clé factice (aucun appel réseau)"""
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    return importlib.import_module("app.openai_helper")
+
+
+class StallingClient:
+    """
+    Client OpenAI factice : le flux reste bloqué au-delà de l'échéance,
+    ou l'appel échoue sur le délai du client
+    """
+
+    def __init__(self, stall_s=0.0, error=None):
+        self.stall_s = stall_s
+        self.error = error
+        self.options = None
+        self.closed = False
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def with_options(self, **options):
+        self.options = options
+        return self
+
+    def _create(self, **kwargs):
+        if self.error is not None:
+            raise self.error
+        return self
+
+    def __iter__(self):
+        time.sleep(self.stall_s)
+        delta = SimpleNamespace(content="trop tard")
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+    def close(self):
+        self.closed = True
+
+
+def test_chat_completion_stalled_past_deadline_raises_deadline_exceeded(helper, monkeypatch):
+    stub = StallingClient(stall_s=0.2)
+    monkeypatch.setattr(helper, "client", stub)
+
+    with pytest.raises(DeadlineExceeded):
+        helper._chat_completion([], 10, CancellationToken(timeout=0.1))
+
+    # Délai borné par le budget restant, sans nouvelle tentative du client
+    assert stub.options["max_retries"] == 0 and 0 < stub.options["timeout"] <= 0.1
+    assert stub.closed
+
+
+def test_chat_completion_client_timeout_raises_deadline_exceeded(helper, monkeypatch):
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    monkeypatch.setattr(helper, "client", StallingClient(error=openai.APITimeoutError(request=request)))
+
+    with pytest.raises(DeadlineExceeded):
+        helper._chat_completion([], 10, CancellationToken(timeout=30))
@@ -0,0 +1,110 @@
+import gc
+import os
+
+import pytest
+
+from app import prefork
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="fork indisponible")
+
+
+def test_forked_workers_share_the_preloaded_analyzer(tmp_path, example_responses, monkeypatch):
+    """
+    Chaque worker analyse avec l'analyseur du parent (catalogue en lecture seule)
+    """
+    from app.encoders import HashingEncoder
+
+    monkeypatch.setattr(prefork, "_preloaded_analyzer", None)
+    analyzer = prefork.preload(
+        use_result_cache=False,
+        encoder=HashingEncoder(),
+        artifact_dir=str(tmp_path / "catalog")
+    )
+    assert not analyzer.competency_embeddings.data.flags.writeable
+
+    def worker(index):
+        shared = prefork.get_preloaded_analyzer()
+        assert shared is analyzer
+        score = shared.analyze_many([example_responses])[0]['coverage_score']
+        (tmp_path / f"worker{index}.txt").write_text(f"{os.getpid()} {score}")
+
+    exit_codes = prefork.launch(worker, workers=2, respawn=False)
+
+    assert exit_codes == {0: 0, 1: 0}
+    outputs = [(tmp_path / f"worker{i}.txt").read_text().split() for i in range(2)]
+    assert outputs[0][0] != outputs[1][0]
+    assert outputs[0][1] == outputs[1][1]
+    gc.unfreeze()
+
+
+def test_workers_encode_with_torch_after_the_parent_encoded(tmp_path, example_responses, monkeypatch):
+    """
+    Le parent encode le catalogue avec torch avant le fork : les workers encodent
+    ensuite sur plusieurs threads sans rester bloqués sur le pool OpenMP du parent
+    """
+    torch = pytest.importorskip("torch")
+    import signal
+
+    from app.encoders import HashingEncoder
+    from app.inference_resources import InferenceResources
+
+    class TorchEncoder(HashingEncoder):
+        """Encodeur lexical suivi d'un MLP torch (opérations parallélisées par OpenMP)"""
+
+        backend = "torch"
+
+        def __init__(self):
+            super().__init__()
+            self.model_id = "hashing-torch-mlp"
+            generator = torch.Generator().manual_seed(0)
+            self.hidden = torch.randn(384, 4096, generator=generator)
+            self.output = torch.randn(4096, 384, generator=generator)
+
+        def encode(self, texts, batch_size=32, show_progress_bar=False):
+            features = torch.from_numpy(super().encode(texts))
+            with torch.no_grad():
+                return (torch.relu(features @ self.hidden) @ self.output).numpy()
+
+    previous_threads = torch.get_num_threads()
+    monkeypatch.setattr(prefork, "_preloaded_analyzer", None)
+    init_worker = prefork._init_worker
+
+    def init_worker_with_watchdog(*args):
+        # Un worker bloqué est tué au lieu de bloquer la suite de tests
+        signal.alarm(60)
+        init_worker(*args)
+
+    monkeypatch.setattr(prefork, "_init_worker", init_worker_with_watchdog)
+    try:
+        analyzer = prefork.preload(
+            use_result_cache=False,
+            use_micro_batching=False,
+            encoder=TorchEncoder(),
+            inference_resources=InferenceResources(intra_op_threads=4),
+            artifact_dir=str(tmp_path / "catalog")
+        )
+        # Parent monothread, préchauffage reporté dans les workers
+        assert torch.get_num_threads() == 1
+        assert analyzer is prefork.get_preloaded_analyzer() and analyzer.warmup_ms is None
+
+        def worker(index):
+            shared = prefork.get_preloaded_analyzer()
+            assert shared.ready.is_set()
+            assert torch.get_num_threads() == 4
+            score = shared.analyze_many([example_responses])[0]['coverage_score']
+            (tmp_path / f"worker{index}.txt").write_text(str(score))
+
+        exit_codes = prefork.launch(worker, workers=2, respawn=False)
+    finally:
+        gc.unfreeze()
+        torch.set_num_threads(previous_threads)
+
+    assert exit_codes == {0: 0, 1: 0}
+    scores = {(tmp_path / f"worker{i}.txt").read_text() for i in range(2)}
+    assert len(scores) == 1
+
+
+def test_memory_report_reads_proc():
+    usage = prefork.memory_usage(os.getpid())
+    assert usage["Rss"] > 0
+    assert "parent" in prefork.memory_report({"parent": os.getpid()})
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from app.projection import Projection, projection_report
+
+
+def low_rank_catalog(n=400, dim=96, rank=16, seed=0):
+    rng = np.random.default_rng(seed)
+    matrix = rng.normal(size=(n, rank)) @ rng.normal(size=(rank, dim)) + 0.01 * rng.normal(size=(n, dim))
+    return (matrix / np.linalg.norm(matrix, axis=1, keepdims=True)).astype(np.float32)
+
+
+def test_projection_preserves_similarities_of_a_low_rank_catalog():
+    """
+    Sans centrage ni renormalisation, les produits scalaires projetés
+    approchent les similarités cosinus d'origine
+    """
+    matrix = low_rank_catalog()
+    projection = Projection.fit(matrix, 24)
+
+    projected = projection.transform(matrix)
+
+    assert projected.shape == (400, 24)
+    assert projection.explained_ratio(matrix) > 0.99
+    assert np.abs(projected[:20] @ projected.T - matrix[:20] @ matrix.T).max() < 0.05
+
+
+def test_projection_rejects_a_dimension_not_smaller_than_the_input():
+    with pytest.raises(ValueError):
+        Projection.fit(low_rank_catalog(dim=32), 32)
+
+
+def test_projection_report_covers_requested_dimensions():
+    matrix = low_rank_catalog()
+    block_ids = np.arange(len(matrix)) % 5 + 1
+
+    report = projection_report(matrix, block_ids, matrix[:50], dims=(8, 32, 500), k=10)
+
+    assert set(report) == {"8", "32"}
+    assert report["32"]["top10_agreement"] >= report["8"]["top10_agreement"]
+    assert report["32"]["mean_abs_block_score_error"] < 0.01
+
+
+def test_projection_report_excludes_self_matches():
+    """
+    Requêtes issues du catalogue : la compétence elle-même, toujours en tête,
+    masquerait la perte de rappel d'une projection trop petite
+    """
+    matrix = low_rank_catalog()
+    block_ids = np.arange(len(matrix)) % 5 + 1
+
+    with_self = projection_report(matrix, block_ids, matrix[:50], dims=(8, 32), k=1)
+    without_self = projection_report(matrix, block_ids, matrix[:50], dims=(8, 32), k=1, query_ids=np.arange(50))
+
+    assert without_self["8"]["top1_agreement"] < with_self["8"]["top1_agreement"]
+    assert without_self["32"]["top1_agreement"] == 1.0
+
+
+def test_analyzer_projects_catalog_and_user_texts(example_responses, tmp_path):
+    from app.encoders import HashingEncoder
+    from app.semantic_analysis import SemanticAnalyzer
+
+    analyzer = SemanticAnalyzer(
+        use_result_cache=False,
+        use_micro_batching=False,
+        encoder=HashingEncoder(),
+        artifact_dir=str(tmp_path),
+        projection_dim=128
+    )
+
+    assert analyzer.competency_embeddings.shape == (430, 128)
+    assert (tmp_path / "hashing-384-3-4" / "projection_128.npz").exists()
+
+    results = analyzer.analyze_many([example_responses])[0]
+    assert 0 <= results['coverage_score'] <= 1
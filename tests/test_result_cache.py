@@ -0,0 +1,91 @@
+from app.result_cache import ResultCache, make_result_key
+
+
+SIGNATURE = {"engine": "test", "model": "fake-model", "catalog": "abc123"}
+
+
+def make_responses(**overrides):
+    responses = {
+        "q1_parcours": "J'ai travaillé avec Python et Pandas",
+        "q2_domaines": ["Data Analysis & Visualization", "Machine Learning Supervisé"],
+        "q3_niveaux": {"Data Analysis & Visualization": 4},
+        "q4_outils": ["SQL", "Plotly"],
+        "q5_experiences": {},
+    }
+    responses.update(overrides)
+    return responses
+
+
+def test_key_ignores_selection_order():
+    """
+    L'ordre des cases cochées ne change pas la clé
+    """
+    key_a = make_result_key(make_responses(), SIGNATURE)
+    key_b = make_result_key(make_responses(q4_outils=["Plotly", "SQL"]), SIGNATURE)
+
+    assert key_a == key_b
+
+
+def test_key_depends_on_text_and_signature():
+    """
+    Un texte ou une version différente produit une autre clé
+    """
+    key = make_result_key(make_responses(), SIGNATURE)
+
+    assert key != make_result_key(make_responses(q1_parcours="Autre texte"), SIGNATURE)
+    assert key != make_result_key(make_responses(), {**SIGNATURE, "catalog": "def456"})
+
+
+def test_lru_eviction_and_disk_fallback(tmp_path):
+    """
+    Les entrées évincées de la mémoire restent disponibles sur disque
+    """
+    cache = ResultCache(cache_dir=str(tmp_path), max_entries=2)
+    for i in range(3):
+        cache.put(f"key{i}", {"coverage_score": i / 10})
+
+    assert len(cache) == 2
+    assert cache.get("key0") == {"coverage_score": 0.0}
+    assert cache.get("missing") is None
+
+
+def test_get_returns_independent_copy(tmp_path):
+    """
+    Modifier un résultat renvoyé ne corrompt pas le cache
+    """
+    cache = ResultCache(cache_dir=str(tmp_path), persist=False)
+    cache.put("key", {"block_scores": {}})
+
+    results = cache.get("key")
+    results["progression_plan"] = "..."
+
+    assert cache.get("key") == {"block_scores": {}}
+
+
+def test_disk_tier_is_bounded(tmp_path):
+    """
+    Au-delà de max_files, les fichiers les plus anciens sont supprimés du disque
+    """
+    cache = ResultCache(cache_dir=str(tmp_path), max_entries=1, max_files=10)
+    for i in range(25):
+        cache.put(f"key{i}", {"coverage_score": i})
+
+    files = list(tmp_path.glob("*.json"))
+    assert len(files) <= 10
+    assert cache.evicted_files >= 15
+    assert cache.get("key24") == {"coverage_score": 24}
+    assert cache.get("key0") is None
+
+
+def test_existing_disk_tier_is_pruned_at_startup(tmp_path):
+    """
+    Un répertoire déjà trop gros est réduit à l'ouverture du cache
+    """
+    ResultCache(cache_dir=str(tmp_path), max_files=0).put("key", {})
+    for i in range(20):
+        (tmp_path / f"old{i}.json").write_text("{}")
+
+    cache = ResultCache(cache_dir=str(tmp_path), max_files=10)
+
+    assert len(list(tmp_path.glob("*.json"))) <= 10
+    assert cache.evicted_files > 0
@@ -1,30 +1,25 @@
+import time
+import uuid
+
 import pytest
-from app.semantic_analysis import SemanticAnalyzer
+
+from app.result_cache import ResultCache
 
 
-def test_analyzer_initialization():
+def test_analyzer_initialization(analyzer):
     """
     Vérifie que le moteur sémantique se lance correctement
     """
-    analyzer = SemanticAnalyzer(
-        competencies_path="data/competencies.csv",
-        jobs_path="data/jobs.csv"
-    )
-
     assert analyzer is not None
     assert analyzer.competencies_df is not None
     assert analyzer.jobs_df is not None
+    assert len(analyzer.competency_embeddings) == len(analyzer.competencies_df)
 
 
-def test_results_summary_structure():
+def test_results_summary_structure(analyzer):
     """
     Vérifie la structure du résumé des résultats
     """
-    analyzer = SemanticAnalyzer(
-        competencies_path="data/competencies.csv",
-        jobs_path="data/jobs.csv"
-    )
-
     # Faux résultats minimaux
     analyzer.block_scores = {
         "bloc1": {"score": 0.5},
@@ -41,3 +36,177 @@ def test_results_summary_structure():
     assert "coverage_score" in results
     assert "block_scores" in results
     assert "recommended_jobs" in results
+
+
+def test_analyze_user_responses_scores_every_block(analyzer, example_responses):
+    """
+    Une analyse complète produit 5 blocs, un coverage et un TOP 3 métiers
+    """
+    analyzer.analyze_user_responses(example_responses)
+    results = analyzer.get_results_summary()
+
+    assert sorted(results["block_scores"]) == [f"bloc{i}" for i in range(1, 6)]
+    assert 0.0 <= results["coverage_score"] <= 1.0
+    assert len(results["recommended_jobs"]) == 3
+    # Likert 4/5 déclaré sur le bloc 1
+    assert results["block_scores"]["bloc1"]["likert_score"] == pytest.approx(0.8)
+
+
+def test_analyze_many_matches_single_analysis(analyzer, example_responses):
+    """
+    Le scoring par lot donne les mêmes scores que l'analyse unitaire
+    """
+    other = dict(example_responses, q1_parcours="Je fais du clustering KMeans et des tests statistiques.")
+
+    batch_results = analyzer.analyze_many([example_responses, other])
+
+    for responses, batch in zip([example_responses, other], batch_results):
+        analyzer.analyze_user_responses(responses)
+        single = analyzer.get_results_summary()
+        assert batch["coverage_score"] == pytest.approx(single["coverage_score"], abs=1e-6)
+        for bloc_key, bloc in single["block_scores"].items():
+            assert batch["block_scores"][bloc_key]["score"] == pytest.approx(bloc["score"], abs=1e-6)
+
+
+def test_analyze_many_deduplicates_texts_and_keeps_analyzer_state(analyzer, example_responses):
+    """
+    Le lot encode chaque texte distinct une seule fois, renvoie les résultats
+    dans l'ordre des réponses et ne touche pas à l'état de l'analyseur
+    """
+    from app import analysis_events
+
+    other = dict(example_responses, q1_parcours="Je fais du clustering KMeans et des tests statistiques.")
+    analyzer.block_scores = {"sentinel": {"score": 1.0}}
+    events = []
+
+    results = analyzer.analyze_many([example_responses, other, example_responses], on_event=events.append)
+
+    similarity = [event for event in events if event.kind == analysis_events.SIMILARITY]
+    # Q1 x 2 + l'expérience Q5 longue, commune aux deux questionnaires
+    assert similarity[0].data == {"texts": 3}
+    assert len(results) == 3
+    assert results[0] == results[2]
+    assert results[0]["block_scores"] != results[1]["block_scores"]
+    assert analyzer.block_scores == {"sentinel": {"score": 1.0}}
+    assert analyzer.analyze_many([]) == []
+
+
+def test_result_cache_skips_recomputation(analyzer, example_responses, tmp_path, monkeypatch):
+    """
+    Une seconde analyse des mêmes réponses est servie par le cache
+    """
+    monkeypatch.setattr(analyzer, "result_cache", ResultCache(cache_dir=str(tmp_path)))
+    analyzer.analyze_user_responses(example_responses)
+    first = analyzer.get_results_summary()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("le scoring ne doit pas être relancé")
+
+    monkeypatch.setattr(analyzer, "_compute_results", fail)
+    analyzer.analyze_user_responses(example_responses)
+
+    assert analyzer.get_results_summary()["coverage_score"] == pytest.approx(first["coverage_score"])
+
+
+def test_warmup_sets_readiness(analyzer, tmp_path):
+    """
+    Le préchauffage en arrière-plan lève le drapeau de disponibilité ;
+    sans préchauffage, l'analyseur est prêt dès sa construction
+    """
+    from app.encoders import HashingEncoder
+    from app.semantic_analysis import SemanticAnalyzer
+
+    assert analyzer.wait_until_ready(timeout=30)
+    assert analyzer.warmup_ms is not None
+
+    cold = SemanticAnalyzer(
+        use_result_cache=False,
+        encoder=HashingEncoder(),
+        artifact_dir=str(tmp_path),
+        warmup="none"
+    )
+    assert cold.ready.is_set() and cold.warmup_ms is None
+
+
+def test_iter_analysis_yields_each_stage_then_the_results(analyzer, example_responses, tmp_path, monkeypatch):
+    """
+    Les événements suivent les étapes de l'analyse, avec une progression croissante,
+    et aboutissent aux mêmes résultats qu'analyze_many (aussi depuis le cache)
+    """
+    from app import analysis_events
+
+    monkeypatch.setattr(analyzer, "result_cache", ResultCache(cache_dir=str(tmp_path)))
+    events = list(analyzer.iter_analysis(example_responses))
+
+    assert [event.stage for event in events] == [
+        "started", "similarity", "block1", "block2", "block3", "block4", "block5", "coverage", "jobs", "done"
+    ]
+    progress = [event.progress for event in events]
+    assert progress == sorted(progress) and progress[-1] == 1.0
+    assert events[1].data["top_competencies"]
+
+    expected = analyzer.analyze_many([example_responses])[0]
+    assert events[-1].data["coverage_score"] == pytest.approx(expected["coverage_score"])
+    assert analyzer.get_results_summary()["coverage_score"] == pytest.approx(expected["coverage_score"])
+
+    replayed = list(analyzer.iter_analysis(example_responses))
+    assert replayed[1].kind == analysis_events.CACHED
+    assert [event.stage for event in replayed[2:]] == [event.stage for event in events[2:]]
+
+
+def test_cancelled_analysis_stops_at_next_checkpoint(analyzer, example_responses):
+    """
+    Un jeton annulé pendant l'analyse l'interrompt au bloc suivant sans modifier
+    l'analyseur ; une échéance dépassée interrompt analyze_many
+    """
+    from app import analysis_events
+    from app.cancellation import AnalysisCancelled, CancellationToken, DeadlineExceeded
+
+    analyzer.analyze_user_responses(example_responses)
+    previous = analyzer.block_scores
+
+    token = CancellationToken()
+    stages = []
+    with pytest.raises(AnalysisCancelled, match="utilisateur parti"):
+        for event in analyzer.iter_analysis(example_responses, cancel_token=token):
+            stages.append(event.stage)
+            if event.kind == analysis_events.BLOCK:
+                token.cancel("utilisateur parti")
+
+    assert stages[-1] == "block1"
+    assert analyzer.block_scores is previous
+
+    expired = CancellationToken(timeout=1e-6)
+    time.sleep(0.01)
+    with pytest.raises(DeadlineExceeded):
+        analyzer.analyze_many([example_responses], cancel_token=expired)
+
+
+def test_cancellation_between_encode_batches_keeps_finished_batches(analyzer, monkeypatch):
+    """
+    Le jeton est vérifié entre deux batchs d'encodage : les batchs déjà
+    encodés restent dans le cache d'embeddings
+    """
+    from app.cancellation import AnalysisCancelled, CancellationToken
+    from app.embedding_cache import make_embedding_key
+
+    run = uuid.uuid4().hex
+    texts = [f"Profil {run} numéro {i} : analyse de données" for i in range(80)]
+    token = CancellationToken()
+    calls = []
+    encode_batch = analyzer._encode_batch
+
+    def encode_then_cancel(batch, batch_size=32):
+        calls.append(len(batch))
+        token.cancel()
+        return encode_batch(batch, batch_size=batch_size)
+
+    monkeypatch.setattr(analyzer.resources, "batch_size", 16)
+    monkeypatch.setattr(analyzer, "_encode_batch", encode_then_cancel)
+
+    with pytest.raises(AnalysisCancelled):
+        analyzer.analyze_many([{"q1_parcours": text} for text in texts], cancel_token=token)
+
+    assert calls == [16]
+    keys = [make_embedding_key(analyzer.model_id, text) for text in texts]
+    assert len(analyzer.embedding_cache.get_many(keys)) == 16
@@ -0,0 +1,73 @@
+import mmap
+
+import numpy as np
+import pytest
+
+from app.encoders import HashingEncoder
+from app.shared_catalog import SharedCatalogSegment
+
+
+class CountingEncoder(HashingEncoder):
+    def __init__(self):
+        super().__init__()
+        self.encoded = 0
+
+    def encode(self, texts, **kwargs):
+        self.encoded += len(texts)
+        return super().encode(texts, **kwargs)
+
+
+def root_buffer(array):
+    while isinstance(array, np.ndarray) and array.base is not None:
+        array = array.base
+    return array.obj if isinstance(array, memoryview) else array
+
+
+def build_analyzer(tmp_path, encoder, **kwargs):
+    from app.semantic_analysis import SemanticAnalyzer
+
+    return SemanticAnalyzer(
+        use_result_cache=False,
+        use_micro_batching=False,
+        encoder=encoder,
+        artifact_dir=None,
+        shared_catalog_dir=str(tmp_path / "shm"),
+        warmup="none",
+        **kwargs
+    )
+
+
+@pytest.mark.parametrize("storage", ["float32", "int8"])
+def test_second_analyzer_attaches_without_encoding_or_copying(tmp_path, example_responses, storage):
+    publisher = build_analyzer(tmp_path, HashingEncoder(), embedding_storage=storage)
+    encoder = CountingEncoder()
+    attached = build_analyzer(tmp_path, encoder, embedding_storage=storage)
+
+    assert encoder.encoded == 0
+    matrix = attached.competency_embeddings
+    assert isinstance(root_buffer(matrix.data), mmap.mmap)
+    assert not matrix.data.flags.writeable
+    np.testing.assert_array_equal(matrix.to_float32(), publisher.competency_embeddings.to_float32())
+    np.testing.assert_array_equal(attached.block_indices[3], publisher.block_indices[3])
+
+    expected = publisher.analyze_many([example_responses])[0]
+    assert attached.analyze_many([example_responses])[0]['coverage_score'] == pytest.approx(expected['coverage_score'])
+
+
+def test_segment_of_another_version_is_never_used(tmp_path):
+    publisher = build_analyzer(tmp_path, HashingEncoder())
+    key = publisher._shared_catalog_key(publisher.catalog)
+    directory = str(tmp_path / "shm")
+
+    assert SharedCatalogSegment.attach(directory, publisher.model_id, key) is not None
+    assert SharedCatalogSegment.attach(directory, publisher.model_id, "0" * 16) is None
+
+    # Fichier renommé : l'empreinte de l'en-tête ne correspond plus à son nom
+    path = SharedCatalogSegment.segment_path(directory, publisher.model_id, key)
+    other = SharedCatalogSegment.segment_path(directory, publisher.model_id, "1" * 16)
+    (tmp_path / "shm" / other.rsplit("/", 1)[-1]).write_bytes(open(path, "rb").read())
+    assert SharedCatalogSegment.attach(directory, publisher.model_id, "1" * 16) is None
+
+    encoder = CountingEncoder()
+    build_analyzer(tmp_path, encoder, embedding_storage="float16")
+    assert encoder.encoded == 430
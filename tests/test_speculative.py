@@ -0,0 +1,52 @@
+import threading
+import uuid
+
+from app.speculative import SpeculativeEncoder, make_executor
+
+
+def test_committed_texts_are_encoded_before_the_analysis(analyzer, example_responses, monkeypatch):
+    """
+    Les textes encodés pendant le questionnaire ne sont pas ré-encodés par l'analyse
+    """
+    run = uuid.uuid4().hex
+    responses = dict(
+        example_responses,
+        q1_parcours=f"Profil {run}. " + example_responses["q1_parcours"],
+        q5_experiences={
+            domain: f"Projet {run}. {text}" for domain, text in example_responses["q5_experiences"].items()
+        }
+    )
+    speculative = SpeculativeEncoder(lambda: analyzer)
+
+    speculative.submit("q1", [responses["q1_parcours"]])
+    for domain, text in responses["q5_experiences"].items():
+        speculative.submit(f"q5:{domain}", [text])
+    assert speculative.wait(timeout=30)
+    assert speculative.completed == 3
+
+    def fail(*args, **kwargs):
+        raise AssertionError("les textes auraient dû être déjà encodés")
+
+    monkeypatch.setattr(analyzer, "_encode_batch", fail)
+    monkeypatch.setattr(analyzer, "encoding_service", None)
+    assert analyzer.analyze_many([responses])[0]["block_scores"]
+
+
+def test_edited_text_supersedes_the_pending_version(analyzer):
+    """
+    Une nouvelle version d'un champ remplace l'ancienne encore en attente
+    """
+    executor = make_executor()
+    gate = threading.Event()
+    executor.submit(gate.wait)
+    speculative = SpeculativeEncoder(lambda: analyzer, executor)
+
+    first = speculative.submit("q1", ["Première version du parcours"])
+    assert speculative.submit("q1", ["Première version du parcours"]) is first
+    second = speculative.submit("q1", ["Version corrigée du parcours"])
+    gate.set()
+
+    assert first.cancelled() and second.result(timeout=30) is True
+    assert speculative.stats() == {"submitted": 2, "superseded": 1, "completed": 1, "failed": 0}
+    assert speculative.submit("q2", ["", "  "]) is None
+    executor.shutdown()
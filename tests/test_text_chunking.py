@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from app.text_chunking import pool_chunk_similarities, split_into_chunks
+
+
+def test_short_texts_are_not_split():
+    text = "J'utilise Pandas pour nettoyer des données."
+    assert split_into_chunks(text, max_words=80) == [text]
+
+
+def test_long_texts_are_split_on_sentences_without_losing_words():
+    sentence = "J'ai entraîné des modèles de classification avec XGBoost sur des données clients."
+    text = " ".join([sentence] * 30)
+    long_sentence = " ".join(f"mot{i}" for i in range(150))
+
+    chunks = split_into_chunks(text + " " + long_sentence, max_words=40, overlap=10)
+
+    assert all(len(chunk.split()) <= 40 for chunk in chunks)
+    assert chunks[0].startswith("J'ai") and chunks[0].endswith("clients.")
+    assert "mot149" in chunks[-1]
+    assert len(split_into_chunks(text, max_words=40, max_chunks=3)) == 3
+
+
+def test_pooling_max_and_topk_ignore_unretrieved_competencies():
+    sims = np.array([
+        [0.9, 0.1, -np.inf],
+        [0.5, 0.3, 0.4],
+        [0.1, -np.inf, -np.inf],
+    ], dtype=np.float32)
+
+    np.testing.assert_allclose(pool_chunk_similarities(sims, 'max'), [0.9, 0.3, 0.4])
+    np.testing.assert_allclose(pool_chunk_similarities(sims, 'topk', k=2), [0.7, 0.2, 0.4])
+    with pytest.raises(ValueError):
+        pool_chunk_similarities(sims, 'mean')
+
+
+def test_long_q1_is_encoded_in_chunks_in_one_batch(analyzer):
+    """
+    Tous les morceaux sont encodés ensemble et le score d'une compétence
+    est celui du morceau qui lui ressemble le plus
+    """
+    sentences = [f"Projet {i} : analyse de données et visualisation de tableaux de bord." for i in range(20)]
+    long_text = " ".join(sentences)
+
+    similarities = analyzer._text_similarities([long_text])[long_text]
+    chunks = split_into_chunks(long_text, 80, 32)
+    chunk_sims = analyzer._chunk_similarities(chunks)
+
+    assert len(chunks) > 1
+    np.testing.assert_allclose(similarities, chunk_sims.max(axis=0), atol=1e-6)